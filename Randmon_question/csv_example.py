@@ -1,118 +1,150 @@
+import sys
+
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-from sklearn.preprocessing import LabelEncoder, StandardScaler
 from sklearn.cluster import KMeans
-from sklearn.decomposition import PCA
 
-# -----------------------------
-# Load Dataset
-# -----------------------------
+from product_cache import load_encoder, load_fingerprints, load_or_build, load_scaled
+from product_elbow import elbow_search
+from product_export import ClusterExporter, export_clusters
+from product_incremental import update_clusters
+from product_ingest import peek, read_columns
+from product_model import MODEL_DIR, save_model
+from product_plot import incremental_projection, plot_clusters
+from product_stream import stream_cluster
+
 file_path = r"C:\Users\Admin\Downloads\product+classification+and+clustering\pricerunner_aggregate.csv"
 
-df = pd.read_csv(file_path)
+stream_k = 4   # K used by --stream mode (no elbow sweep there)
+
+output_dir = "clustered_products"   # one file per cluster + manifest.json
+output_format = "csv"               # "csv", "csv.gz", "parquet" (pyarrow) or "npy"
+
+
+def stream_main():
+    # -----------------------------
+    # Streaming mode: MiniBatchKMeans over chunks, flat memory, no plots
+    # -----------------------------
+    exporter = ClusterExporter(output_dir, list(read_columns(file_path).values()), fmt=output_format)
+    result = stream_cluster(file_path, stream_k, exporter=exporter)
+
+    print("\nCluster Counts:")
+    print(pd.Series(result["counts"]).rename_axis("Cluster"))
+
+    print("\nCluster Centers:")
+    print(result["kmeans"].cluster_centers_)
+
+    print(f"\nStreamed {result['rows']} rows in {result['seconds']:.1f}s")
+    print("Clustered dataset saved as:", result["output_file"])
+
+
+def update_main(new_file):
+    # -----------------------------
+    # Incremental mode: assign only new/changed rows against the saved model
+    # -----------------------------
+    result = update_clusters(new_file)
+
+    print(f"\nRows: {result['rows']} | added: {result['added']} | changed: {result['changed']} "
+          f"| removed: {result['removed']}")
+    print(f"Largest centre shift: {result['shift']:.4f}")
+    print(f"Updated in {result['seconds']:.1f}s → delta saved as: {result['delta_file']}")
+
+
+def main():
+    if "--stream" in sys.argv:
+        stream_main()
+        return
+    if "--update" in sys.argv:
+        update_main(sys.argv[sys.argv.index("--update") + 1])
+        return
+
+    # -----------------------------
+    # Load Dataset (chunked, typed, cached)
+    # -----------------------------
+    print("First 5 Rows:")
+    print(peek(file_path))
+
+    # -----------------------------
+    # Remove Missing Values + Convert Categorical Columns + Feature Scaling
+    # (built once per file/config in float32, then read back from .product_cache;
+    #  the raw features stay memory-mapped and are only touched by the export)
+    # -----------------------------
+    cache = load_or_build(file_path)
+    features = cache["features"]
+    # the one owned float32 buffer from here to PCA (KMeans centres it in place)
+    scaled_data = load_scaled(cache, writable=True)
+    columns = cache["columns"]
+    scaler = cache["scaler"]
+
+    print("\nDataset Shape:", (cache["rows_read"], len(columns)))
+    print("Rows after dropping missing values:", cache["rows_kept"])
+    print("Loaded from cache:", cache["cached"])
+
+    print("\nColumns:")
+    print(columns)
+
+    # -----------------------------
+    # Elbow Method (parallel, subsampled, stops once the curve flattens)
+    # -----------------------------
+    elbow = elbow_search(scaled_data, range(1, 11))
+    print(f"\nElbow sweep: K={elbow['ks'][0]}..{elbow['ks'][-1]} on {elbow['rows']} rows "
+          f"in {elbow['seconds']:.1f}s → suggested K={elbow['k']}")
+
+    plt.figure(figsize=(8,5))
+    plt.plot(elbow["ks"], elbow["wcss"], marker='o')
+    plt.title("Elbow Method")
+    plt.xlabel("Number of Clusters")
+    plt.ylabel("WCSS")
+    plt.grid(True)
+    plt.show()
+
+    # -----------------------------
+    # K-Means Clustering
+    # -----------------------------
+    k = elbow["k"]   # picked from the elbow curve; override if the graph says otherwise
+
+    kmeans = KMeans(
+        n_clusters=k,
+        random_state=42,
+        n_init=10,
+        copy_x=False   # centre scaled_data in place (restored after fit) instead of copying it
+    )
+
+    clusters = kmeans.fit_predict(scaled_data)
 
-print("First 5 Rows:")
-print(df.head())
+    print("\nCluster Counts:")
+    print(pd.Series(np.bincount(clusters), name="count").rename_axis("Cluster").sort_values(ascending=False))
 
-print("\nDataset Shape:", df.shape)
+    # saved so --update can re-cluster only new/changed products later
+    # (fingerprints were taken while the cache was built, not by re-reading the CSV)
+    encoder = load_encoder(cache)
+    ids, hashes = load_fingerprints(cache)
+    save_model(MODEL_DIR, kmeans.cluster_centers_, scaler, encoder, columns, ids, hashes, clusters)
 
-print("\nColumns:")
-print(df.columns)
+    # -----------------------------
+    # PCA Visualization (IncrementalPCA + density / stratified sample)
+    # -----------------------------
+    pca, reduced_data = incremental_projection(scaled_data)
 
-# -----------------------------
-# Remove Missing Values
-# -----------------------------
-df = df.dropna()
+    plot_clusters(reduced_data, clusters)
 
-# -----------------------------
-# Convert Categorical Columns
-# -----------------------------
-label_encoder = LabelEncoder()
+    # -----------------------------
+    # Cluster Centers
+    # -----------------------------
+    print("\nCluster Centers:")
+    print(kmeans.cluster_centers_)
 
-for column in df.columns:
-    if df[column].dtype == 'object':
-        df[column] = label_encoder.fit_transform(df[column].astype(str))
+    # -----------------------------
+    # Save Clustered Dataset (original values rebuilt block by block from the
+    # cached matrix + exact ids + vocabularies, written in parallel per cluster)
+    # -----------------------------
+    manifest = export_clusters(features, cache["ids"], clusters, columns, encoder, output_dir, fmt=output_format)
 
-# -----------------------------
-# Feature Scaling
-# -----------------------------
-scaler = StandardScaler()
-scaled_data = scaler.fit_transform(df)
+    print(f"\nClustered dataset saved in: {output_dir} "
+          f"({len(manifest['parts'])} {output_format} files, {manifest['seconds']:.1f}s)")
 
-# -----------------------------
-# Elbow Method
-# -----------------------------
-wcss = []
 
-for i in range(1, 11):
-    kmeans = KMeans(
-        n_clusters=i,
-        random_state=42,
-        n_init=10
-    )
-    kmeans.fit(scaled_data)
-    wcss.append(kmeans.inertia_)
-
-plt.figure(figsize=(8,5))
-plt.plot(range(1,11), wcss, marker='o')
-plt.title("Elbow Method")
-plt.xlabel("Number of Clusters")
-plt.ylabel("WCSS")
-plt.grid(True)
-plt.show()
-
-# -----------------------------
-# K-Means Clustering
-# -----------------------------
-k = 4   # Change according to elbow graph
-
-kmeans = KMeans(
-    n_clusters=k,
-    random_state=42,
-    n_init=10
-)
-
-clusters = kmeans.fit_predict(scaled_data)
-
-df["Cluster"] = clusters
-
-print("\nCluster Counts:")
-print(df["Cluster"].value_counts())
-
-# -----------------------------
-# PCA Visualization
-# -----------------------------
-pca = PCA(n_components=2)
-
-reduced_data = pca.fit_transform(scaled_data)
-
-plt.figure(figsize=(10,7))
-
-plt.scatter(
-    reduced_data[:,0],
-    reduced_data[:,1],
-    c=clusters,
-    cmap="viridis",
-    s=40
-)
-
-plt.title("K-Means Clustering")
-plt.xlabel("Principal Component 1")
-plt.ylabel("Principal Component 2")
-plt.colorbar(label="Cluster")
-plt.show()
-
-# -----------------------------
-# Cluster Centers
-# -----------------------------
-print("\nCluster Centers:")
-print(kmeans.cluster_centers_)
-
-# -----------------------------
-# Save Clustered Dataset
-# -----------------------------
-output_file = "clustered_products.csv"
-df.to_csv(output_file, index=False)
-
-print("\nClustered dataset saved as:", output_file)
\ No newline at end of file
+# the elbow search uses a process pool; on Windows the workers re-import this file
+if __name__ == "__main__":
+    main()
@@ -29,77 +29,108 @@
 
 
 
-import matplotlib.pyplot as plt
+def demo_plots():
+    import matplotlib.pyplot as plt
 
-# Data for plots
-x = [1, 2, 3, 4, 5]
-y = [2, 4, 6, 8, 10]
+    # Data for plots
+    x = [1, 2, 3, 4, 5]
+    y = [2, 4, 6, 8, 10]
 
-# 1️⃣ Line Plot
-plt.figure(figsize=(8, 4))
-plt.plot(x, y, color='blue', marker='o')
-plt.title("Line Plot")
-plt.xlabel("X-axis")
-plt.ylabel("Y-axis")
-plt.show()
+    # 1️⃣ Line Plot
+    plt.figure(figsize=(8, 4))
+    plt.plot(x, y, color='blue', marker='o')
+    plt.title("Line Plot")
+    plt.xlabel("X-axis")
+    plt.ylabel("Y-axis")
+    plt.show()
 
-# 2️⃣ Bar Plot
-plt.figure(figsize=(8, 4))
-plt.bar(x, y, color='orange')
-plt.title("Bar Plot")
-plt.xlabel("Categories")
-plt.ylabel("Values")
-plt.show()
+    # 2️⃣ Bar Plot
+    plt.figure(figsize=(8, 4))
+    plt.bar(x, y, color='orange')
+    plt.title("Bar Plot")
+    plt.xlabel("Categories")
+    plt.ylabel("Values")
+    plt.show()
 
 
 
 # Sample AI-Powered SEO System (Simplified)
+# Nothing heavy happens at import: models load on first use through seo_models
+# (or stay warm in `python seo_models.py serve`, see SEO_WORKER below).
+
+import os
+import sys
 
 import pandas as pd
-from sklearn.model_selection import train_test_split
-from sentence_transformers import SentenceTransformer, util
-from transformers import GPT2LMHeadModel, GPT2Tokenizer
 
-# 1. Load sample dataset
-data = pd.DataFrame({
-    "keyword": ["bridal couture", "designer sarees", "luxury boutique"],
-    "page_url": ["page1.html", "page2.html", "page3.html"]
-})
+import seo_models
+
+SEO_WORKER = os.environ.get("SEO_WORKER")   # host:port of a warm worker, if one is running
 
-# 2. Split dataset: 70% train, 15% val, 15% test
-train, temp = train_test_split(data, test_size=0.3, random_state=42)
-val, test = train_test_split(temp, test_size=0.5, random_state=42)
 
-# 3. Semantic Keyword Embeddings (BERT)
-bert_model = SentenceTransformer('all-MiniLM-L6-v2')
-embeddings = bert_model.encode(train['keyword'].tolist(), convert_to_tensor=True)
+def load_data():
+    # 1. Load sample dataset
+    return pd.DataFrame({
+        "keyword": ["bridal couture", "designer sarees", "luxury boutique"],
+        "page_url": ["page1.html", "page2.html", "page3.html"]
+    })
 
-# Sample similarity
-sim = util.pytorch_cos_sim(embeddings[0], embeddings[1])
-print(f"Keyword similarity: {sim.item():.4f}")
 
-# 4. GPT-based Meta Description
-tokenizer = GPT2Tokenizer.from_pretrained("gpt2")
-model = GPT2LMHeadModel.from_pretrained("gpt2")
+def services():
+    """(embedder, generator): the warm worker when SEO_WORKER is set, else in-process models."""
+    if SEO_WORKER:
+        client = seo_models.WorkerClient(SEO_WORKER)
+        return client, client
+    return seo_models.embedder(), seo_models.generator()
+
 
 def generate_meta(keyword):
-    prompt = f"SEO meta description for: '{keyword}'"
-    inputs = tokenizer(prompt, return_tensors="pt")
-    outputs = model.generate(**inputs, max_length=40)
-    return tokenizer.decode(outputs[0], skip_special_tokens=True)
-
-# Generate meta for sample keywords
-for kw in train['keyword']:
-    print(f"Keyword: {kw}")
-    print(f"Meta: {generate_meta(kw)}\n")
-
-# 5. Placeholder for crawling & APIs
-def crawl_site(url): print(f"Crawling {url}... [sample]")
-def fetch_backlinks(keyword): print(f"Fetching backlinks for '{keyword}'... [sample]")
-def fetch_performance(page): print(f"Fetching performance for {page}... [sample]")
-
-# Sample workflow
-for _, row in train.iterrows():
-    crawl_site(row['page_url'])
-    fetch_backlinks(row['keyword'])
-    fetch_performance(row['page_url'])
+    return seo_models.generator().generate([keyword])[0]
+
+
+# 5. Crawling & APIs: one concurrent fetch stage (pooled keep-alive connections,
+# per-host rate limit, ETag cache). Without SEO_FETCH_BASE a local stand-in answers.
+def fetch_all(pages, keywords):
+    from seo_fetch import StandInServer, run_fetch_stage
+
+    if os.environ.get("SEO_FETCH_BASE"):
+        return run_fetch_stage(pages, keywords, os.environ["SEO_FETCH_BASE"])
+    with StandInServer() as server:
+        return run_fetch_stage(pages, keywords, server.url)
+
+
+def main():
+    if "--plots" in sys.argv:
+        demo_plots()
+
+    data = load_data()
+    embedder, generator = services()
+
+    # 2.-5. Split (70/15/15, one shot), embed, score, generate and fetch in one
+    # column-wise batch job; every keyword / URL is processed once
+    from seo_batch import run_batch
+
+    result, timings = run_batch(data, embedder, generator, fetch_all)
+    train = result[result["split"] == "train"]
+
+    # Sample similarity (vectors are normalised and cached, so this is a lookup + dot product)
+    embeddings = embedder.embed(train['keyword'].tolist())
+    if len(embeddings) > 1:
+        print(f"Keyword similarity: {float(embeddings[0] @ embeddings[1]):.4f}")
+
+    # Most similar keywords (exact search for small sets, IVF index for large ones)
+    from seo_similarity import KeywordIndex
+
+    keywords = list(dict.fromkeys(train['keyword']))
+    keyword_index = KeywordIndex(keywords, embedder.embed(keywords), embedder)
+    for kw, similar in zip(keywords, keyword_index.top_k(keywords, k=3)):
+        print(f"{kw} → " + ", ".join(f"{other} ({score:.2f})" for other, score in similar if other != kw))
+
+    # GPT-based meta descriptions + crawl / backlink / performance results
+    print()
+    print(train[["keyword", "page_url", "score", "meta", "lcp_ms", "backlinks"]].to_string(index=False))
+    print(f"\nSplit sizes: {result['split'].value_counts().to_dict()}")
+    print(f"Stage timings: { {k: round(v, 3) for k, v in timings.items() if isinstance(v, float)} }")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+"""
+Benchmark suite for the product clustering pipeline stages (csv_example.py).
+
+- Generates synthetic pricerunner-shaped CSVs (same columns, leading spaces in
+  the header, realistic cardinalities) at 10k / 1M / 10M rows; files are kept
+  in BENCH_DIR and reused by later runs
+- Times every stage separately: load, encode, scale, elbow, kmeans, pca, write
+- Tracks peak RSS per stage with a background sampler, so timings are not
+  slowed by tracemalloc; with psutil the sample is this process's RSS plus the
+  unique memory (USS) of all its children (the elbow pool workers), otherwise
+  /proc or getrusage for this process, plus the largest finished child per
+  stage (RUSAGE_CHILDREN)
+- Saves results as JSON (one file per run) for trend comparison
+- The default run is the baseline: a stage-for-stage copy of the original
+  csv_example.py (float64 DataFrame, LabelEncoder, fit_transform, sequential
+  elbow loop, PCA, df.to_csv)
+- --lean runs the float32 in-place path (raw matrix memory-mapped, one owned
+  scaled buffer, KMeans(copy_x=False), vocabularies parked on disk between
+  encode and write); --compare runs the baseline and the lean path in
+  separate processes, each exporting to its own folder, and reports the
+  peak RSS ratio twice: whole process, and above the RSS both start from
+  once imports are done (the ~50% target applies to the latter; at 10k the
+  imports are nearly all of either peak)
+- A CSV path can be given instead of a size to benchmark a real file
+
+Usage:
+    python product_benchmark.py [10k] [1m] [10m] [file.csv ...] [--lean | --compare]
+
+Requires: pip install pandas numpy scikit-learn (psutil optional)
+"""
+
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import KMeans
+from sklearn.decomposition import PCA
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+from product_cache import fit_scaler, scale_inplace
+from product_elbow import elbow_search
+from product_encoding import CategoricalEncoder
+from product_export import export_clusters
+from product_ingest import build_feature_matrix, iter_chunks, trim_heap
+from product_plot import incremental_projection
+
+# -----------------------------
+# Config
+# -----------------------------
+SIZES = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+BENCH_DIR = "benchmarks"
+K = 4
+SAMPLE_EVERY = 0.01       # seconds between RSS samples
+HEADER = ["Product ID", " Product Title", " Merchant ID", " Cluster ID",
+          " Cluster Label", " Category ID", " Category Label"]
+CATEGORIES = ["Mobile Phones", "TVs", "CPUs", "Digital Cameras", "Microwaves",
+              "Dishwashers", "Washing Machines", "Freezers", "Fridge Freezers", "Fridges"]
+BRANDS = ["apple", "samsung", "sony", "lg", "bosch", "intel", "amd", "canon", "nikon", "panasonic",
+          "hotpoint", "beko", "indesit", "whirlpool", "miele", "hisense", "philips", "huawei", "xiaomi", "nokia"]
+
+# -----------------------------
+# Synthetic data
+# -----------------------------
+def generate_csv(path, rows, seed=42, chunk=1_000_000):
+    """Writes a pricerunner-shaped CSV with `rows` rows (titles ~90% unique)."""
+    rng = np.random.default_rng(seed)
+    n_clusters = max(rows // 3, 1)
+    first = True
+    for lo in range(0, rows, chunk):
+        n = min(chunk, rows - lo)
+        product_id = np.arange(lo + 1, lo + n + 1)
+        cluster_id = pd.Series(rng.integers(1, n_clusters + 1, n))
+        category = rng.integers(0, len(CATEGORIES), n)
+        brand = pd.Series(np.asarray(BRANDS, dtype=object)[rng.integers(0, len(BRANDS), n)])
+        model_no = pd.Series(rng.integers(0, max(rows, 10), n)).astype(str)
+        frame = pd.DataFrame({
+            HEADER[0]: product_id,
+            HEADER[1]: brand + " model " + model_no + " " + (cluster_id % 97).astype(str) + "gb",
+            HEADER[2]: rng.integers(1, 307, n),
+            HEADER[3]: cluster_id,
+            HEADER[4]: brand + " cluster " + cluster_id.astype(str),
+            HEADER[5]: category + 2612,
+            HEADER[6]: np.asarray(CATEGORIES, dtype=object)[category],
+        })
+        frame.to_csv(path, mode="w" if first else "a", header=first, index=False)
+        first = False
+    return path
+
+def dataset(size_name):
+    os.makedirs(BENCH_DIR, exist_ok=True)
+    path = os.path.join(BENCH_DIR, f"pricerunner_synthetic_{size_name}.csv")
+    if not os.path.exists(path):
+        start = time.perf_counter()
+        generate_csv(path, SIZES[size_name])
+        print(f"🧪 Generated {path} in {time.perf_counter() - start:.1f}s")
+    return path
+
+# -----------------------------
+# Measurement
+# -----------------------------
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    import resource
+except ImportError:      # Windows
+    resource = None
+
+def current_rss():
+    """
+    RSS of this process plus the unique memory (USS) of its live children:
+    forked workers start out sharing the parent's pages, which their own RSS
+    would count a second time.
+    """
+    if psutil is not None:
+        proc = psutil.Process()
+        total = proc.memory_info().rss
+        for child in proc.children(recursive=True):
+            try:
+                total += child.memory_full_info().uss
+            except psutil.Error:     # exited between listing and reading
+                pass
+        return total
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def children_peak():
+    """
+    Peak RSS (bytes) of the largest child waited for so far; 0 with psutil
+    (live children are already in current_rss) or where unavailable. A forked
+    child counts the parent's pages it started with, so this is an upper bound.
+    """
+    if psutil is not None or resource is None:
+        return 0
+    kb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return kb if sys.platform == "darwin" else kb * 1024    # macOS reports bytes
+
+class StageTimer:
+    """with timer.stage("load"): ...  → seconds, peak and delta RSS per stage."""
+
+    def __init__(self):
+        self.results = {}
+
+    def stage(self, name):
+        return _Stage(self, name)
+
+class _Stage:
+    def __init__(self, timer, name):
+        self.timer, self.name = timer, name
+
+    def _sample(self):
+        while not self.done.wait(SAMPLE_EVERY):
+            self.peak = max(self.peak, current_rss())
+
+    def __enter__(self):
+        self.children_before = children_peak()
+        self.before = self.peak = current_rss()
+        self.done = threading.Event()
+        self.sampler = threading.Thread(target=self._sample, daemon=True)
+        self.sampler.start()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.start
+        self.done.set()
+        self.sampler.join()
+        after = current_rss()
+        self.peak = max(self.peak, after)
+        # only counts if a child that finished in this stage set a new high
+        children = children_peak()
+        child_peak = children if children > self.children_before else 0
+        self.timer.results[self.name] = {
+            "seconds": round(seconds, 4),
+            "peak_rss_mb": round(self.peak / 2**20, 1),
+            "delta_rss_mb": round((after - self.before) / 2**20, 1),
+            "child_peak_mb": round(child_peak / 2**20, 1),
+        }
+        print(f"  {self.name:<8} {seconds:>9.3f}s  peak {self.peak / 2**20:>8.1f} MB"
+              + (f"  (largest child {child_peak / 2**20:.1f} MB)" if child_peak else ""))
+        return False
+
+# -----------------------------
+# Pipeline stages
+# -----------------------------
+def run_pipeline(path, k=K, out_dir=None):
+    """
+    The original csv_example.py, stage for stage: whole-file read_csv, dropna,
+    LabelEncoder over the text columns, float64 StandardScaler.fit_transform,
+    a sequential KMeans(n_init=10) elbow loop over K=1..10, KMeans, PCA(2) and
+    df.to_csv of the whole annotated frame. This is the --compare baseline.
+    """
+    timer = StageTimer()
+    with timer.stage("load"):
+        df = pd.read_csv(path)
+    with timer.stage("encode"):
+        df = df.dropna()
+        label_encoder = LabelEncoder()
+        for column in df.columns:
+            # text is "object" on pandas < 3 and "str" on pandas 3
+            if not pd.api.types.is_numeric_dtype(df[column]):
+                df[column] = label_encoder.fit_transform(df[column].astype(str))
+    with timer.stage("scale"):
+        scaled_data = StandardScaler().fit_transform(df)
+    with timer.stage("elbow"):
+        wcss = []
+        for i in range(1, 11):
+            wcss.append(KMeans(n_clusters=i, random_state=42, n_init=10).fit(scaled_data).inertia_)
+    with timer.stage("kmeans"):
+        clusters = KMeans(n_clusters=k, random_state=42, n_init=10).fit_predict(scaled_data)
+        df["Cluster"] = clusters
+    with timer.stage("pca"):
+        PCA(n_components=2).fit_transform(scaled_data)
+    with timer.stage("write"):
+        out_dir = out_dir or os.path.join(BENCH_DIR, "export_baseline")
+        os.makedirs(out_dir, exist_ok=True)
+        df.to_csv(os.path.join(out_dir, "clustered_products.csv"), index=False)
+    return timer.results, {"rows": len(df), "elbow_k": k}
+
+def run_lean_pipeline(path, k=K, out_dir=None):
+    """
+    Same stages, float32 throughout with one owned scaled buffer (csv_example.py's path).
+    Load and encode are two passes, like product_stream: load parses the typed
+    chunks and fits the vocabularies, encode re-reads them into the raw file.
+    """
+    timer = StageTimer()
+    with timer.stage("load"):
+        encoder = CategoricalEncoder()
+        for chunk in iter_chunks(path):
+            encoder.partial_fit(chunk)
+        trim_heap()
+    with timer.stage("encode"):
+        raw_path = os.path.join(BENCH_DIR, "raw.f32")
+        features, ids, columns, encoder, _, _ = build_feature_matrix(
+            path, out_path=raw_path, ids_path=os.path.join(BENCH_DIR, "ids.i64"), encoder=encoder)
+        # like a cache entry: the vocabularies wait on disk until the export needs them
+        vocab_path = os.path.join(BENCH_DIR, "vocab.npz")
+        encoder.save(vocab_path)
+        del encoder
+        trim_heap()
+    with timer.stage("scale"):
+        # read into the owned buffer directly: copying from the memmap would also fault its pages in
+        scaled = np.fromfile(raw_path, dtype=np.float32).reshape(features.shape)
+        scale_inplace(scaled, fit_scaler(scaled))
+    with timer.stage("elbow"):
+        elbow = elbow_search(scaled, range(1, 11))
+    with timer.stage("kmeans"):
+        labels = KMeans(n_clusters=k, random_state=42, n_init=10, copy_x=False).fit_predict(scaled)
+    with timer.stage("pca"):
+        incremental_projection(scaled)
+    del scaled
+    with timer.stage("write"):
+        export_clusters(features, ids, labels, columns, CategoricalEncoder.load(vocab_path),
+                        out_dir or os.path.join(BENCH_DIR, "export_lean"))
+    return timer.results, {"rows": len(features), "elbow_k": elbow["k"]}
+
+def peak_mb(stages):
+    # without psutil, children are only visible through their own peak
+    return max(max(stage["peak_rss_mb"], stage.get("child_peak_mb", 0.0)) for stage in stages.values())
+
+def cell(stage, key, spec):
+    """One --compare table cell; "-" for a stage one of the pipelines doesn't have."""
+    return f"{stage[key]:>8{spec}}" if stage else f"{'-':>8}"
+
+def working_mb(run):
+    """Peak above the RSS the pipeline started from (interpreter + imports)."""
+    return peak_mb(run["stages"]) - run["floor_mb"]
+
+# the child appends this folder to sys.path instead of running the file as a
+# script: the folder holds an empty csv.py that would shadow the stdlib csv
+CHILD = "import sys; sys.path.append({!r}); import product_benchmark; product_benchmark.main()"
+
+def run_isolated(path, lean):
+    """Runs one pipeline in a fresh interpreter so each gets its own peak RSS."""
+    code = CHILD.format(os.path.dirname(os.path.abspath(__file__)))
+    cmd = [sys.executable, "-c", code, path, "--child"] + (["--lean"] if lean else [])
+    out = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+def main():
+    args = sys.argv[1:]
+    flags = {a.lower() for a in args if a.startswith("--")}
+    files = [a for a in args if a.lower().endswith(".csv")]
+    names = [a.lower() for a in args if a.lower() in SIZES] or ([] if files else ["10k"])
+    lean, compare = "--lean" in flags, "--compare" in flags
+
+    if "--child" in flags:
+        path = files[0] if files else dataset(names[0])
+        floor = current_rss()
+        stages, info = (run_lean_pipeline if lean else run_pipeline)(path)
+        print(json.dumps({"stages": stages, "floor_mb": round(floor / 2**20, 1), **info}))
+        return
+
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "mode": "compare" if compare else "lean" if lean else "baseline",
+        "runs": {},
+    }
+    runs = [(name, dataset(name), f"{SIZES[name]} rows") for name in names]
+    runs += [(os.path.basename(path), path, path) for path in files]
+    for name, path, label in runs:
+        print(f"\n📊 {name} ({label})")
+        if compare:
+            base, lean_run = run_isolated(path, lean=False), run_isolated(path, lean=True)
+            ratio = peak_mb(lean_run["stages"]) / peak_mb(base["stages"])
+            working_ratio = working_mb(lean_run) / max(working_mb(base), 0.1)
+            for stage in dict.fromkeys([*base["stages"], *lean_run["stages"]]):
+                b, l = base["stages"].get(stage), lean_run["stages"].get(stage)
+                print(f"  {stage:<8} {cell(b, 'seconds', '.3f')}s → {cell(l, 'seconds', '.3f')}s  "
+                      f"peak {cell(b, 'peak_rss_mb', '.1f')} → {cell(l, 'peak_rss_mb', '.1f')} MB")
+            total = lambda run: sum(stage["seconds"] for stage in run["stages"].values())
+            print(f"  → total {total(base):.1f}s → {total(lean_run):.1f}s")
+            print(f"  → peak RSS {peak_mb(base['stages']):.1f} → {peak_mb(lean_run['stages']):.1f} MB "
+                  f"({ratio:.0%} of baseline)")
+            print(f"  → above imports ({base['floor_mb']:.0f} / {lean_run['floor_mb']:.0f} MB): "
+                  f"{working_mb(base):.1f} → {working_mb(lean_run):.1f} MB ({working_ratio:.0%} of baseline, "
+                  f"target {'met' if working_ratio <= 0.5 else 'missed'})")
+            report["runs"][name] = {"baseline": base, "lean": lean_run, "peak_ratio": round(ratio, 3),
+                                    "working_ratio": round(working_ratio, 3)}
+            continue
+        stages, info = (run_lean_pipeline if lean else run_pipeline)(path)
+        slowest = max(stages, key=lambda s: stages[s]["seconds"])
+        print(f"  → slowest stage: {slowest}, peak {peak_mb(stages):.1f} MB")
+        report["runs"][name] = {"stages": stages, **info}
+
+    out = os.path.join(BENCH_DIR, f"product_bench_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(BENCH_DIR, exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✅ Results saved as: {out}")
+
+# the elbow stage uses a process pool; on Windows the workers re-import this file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+On-disk cache of the preprocessed product feature matrix.
+
+- Keyed by the SHA-256 of the source CSV plus the preprocessing config, so a
+  changed file or changed dtypes/version builds a fresh entry
+- File hashes are memoised by (path, size, mtime), so repeat runs don't re-read
+  a multi-GB file just to find out it hasn't changed
+- Each entry stores the encoded matrix (raw.f32), the scaled matrix (scaled.npy),
+  the exact int64 ID columns (ids.i64), the per-row fingerprints used by
+  --update (fingerprints.npz), the CategoricalEncoder vocabularies and the
+  StandardScaler state; the matrices are opened as read-only memory maps, so
+  a cache hit costs milliseconds and never re-reads the CSV
+- Entries are built in a temp folder and renamed into place (no half-written cache)
+- Scaling is done in float32, in place, chunk by chunk (no float64 copy), and
+  load_scaled() maps the scaled matrix read-only; load_scaled(writable=True)
+  reads one owned, contiguous float32 buffer that KMeans(copy_x=False) can
+  centre in place
+- hashes.json is written to a temp file and renamed, so concurrent runs never
+  read a half-written memo
+
+Requires: pip install pandas numpy scikit-learn
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+from sklearn.preprocessing import StandardScaler
+
+import product_ingest
+from product_encoding import CategoricalEncoder
+
+# -----------------------------
+# Config
+# -----------------------------
+CACHE_DIR = ".product_cache"
+CACHE_VERSION = 6
+HASH_BLOCK = 8 * 1024 * 1024
+SCALE_ROWS = 100_000          # rows per step (partial_fit upcasts each step to float64)
+
+# -----------------------------
+# Keys
+# -----------------------------
+def file_digest(file_path, cache_dir=CACHE_DIR):
+    """SHA-256 of the file, memoised in cache_dir/hashes.json by size + mtime."""
+    stat = os.stat(file_path)
+    memo_path = os.path.join(cache_dir, "hashes.json")
+    memo = {}
+    if os.path.exists(memo_path):
+        try:
+            with open(memo_path) as f:
+                memo = json.load(f)
+        except ValueError:
+            memo = {}       # unreadable memo: just re-hash
+    key = os.path.abspath(file_path)
+    entry = memo.get(key)
+    if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+        return entry["sha256"]
+
+    h = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b""):
+            h.update(block)
+    memo[key] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": h.hexdigest()}
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{memo_path}.tmp{os.getpid()}"
+    with open(tmp_path, "w") as f:
+        json.dump(memo, f)
+    os.replace(tmp_path, memo_path)
+    return memo[key]["sha256"]
+
+def default_config():
+    return {
+        "version": CACHE_VERSION,
+        "dtypes": product_ingest.DTYPES,
+        "numeric_dtype": product_ingest.NUMERIC_DTYPE,
+        "dropna": True,
+        "scaler": "standard",
+    }
+
+def cache_key(file_path, config, cache_dir=CACHE_DIR):
+    blob = json.dumps([file_digest(file_path, cache_dir), config], sort_keys=True)
+    return hashlib.sha256(blob.encode()).hexdigest()[:32]
+
+# -----------------------------
+# Scaler state
+# -----------------------------
+def scaler_state(scaler):
+    return {
+        "mean": scaler.mean_.tolist(),
+        "scale": scaler.scale_.tolist(),
+        "var": scaler.var_.tolist(),
+        "n_samples_seen": int(np.max(scaler.n_samples_seen_)),
+    }
+
+def scaler_from_state(state):
+    scaler = StandardScaler()
+    scaler.mean_ = np.asarray(state["mean"], dtype=np.float64)
+    scaler.scale_ = np.asarray(state["scale"], dtype=np.float64)
+    scaler.var_ = np.asarray(state["var"], dtype=np.float64)
+    scaler.n_samples_seen_ = state["n_samples_seen"]
+    scaler.n_features_in_ = len(state["mean"])
+    return scaler
+
+# -----------------------------
+# Scaling (float32, in place)
+# -----------------------------
+def fit_scaler(X, chunk_rows=SCALE_ROWS):
+    scaler = StandardScaler()
+    for start in range(0, len(X), chunk_rows):
+        scaler.partial_fit(X[start:start + chunk_rows])
+    return scaler
+
+def scale_inplace(X, scaler, chunk_rows=SCALE_ROWS):
+    """Standardises X with a fitted StandardScaler without allocating a copy of it."""
+    mean = scaler.mean_.astype(X.dtype)
+    inv_scale = (1.0 / scaler.scale_).astype(X.dtype)
+    for start in range(0, len(X), chunk_rows):
+        block = X[start:start + chunk_rows]
+        block -= mean
+        block *= inv_scale
+    return X
+
+# -----------------------------
+# Build / Load
+# -----------------------------
+def _build(file_path, entry_dir):
+    from product_model import fingerprint_chunk   # product_model imports this module
+
+    prints = []
+    raw_path = os.path.join(entry_dir, "raw.f32")
+    features, ids, columns, encoder, rows_read, rows_kept = product_ingest.build_feature_matrix(
+        file_path, out_path=raw_path, ids_path=os.path.join(entry_dir, "ids.i64"),
+        on_chunk=lambda chunk: prints.append(fingerprint_chunk(chunk)))
+    np.savez(os.path.join(entry_dir, "fingerprints.npz"),
+             ids=np.concatenate([i for i, _ in prints]) if prints else np.empty(0, dtype=np.int64),
+             hashes=np.concatenate([h for _, h in prints]) if prints else np.empty(0, dtype=np.uint64))
+
+    scaler = fit_scaler(features)
+    scaled = np.lib.format.open_memmap(os.path.join(entry_dir, "scaled.npy"), mode="w+",
+                                       dtype=np.float32, shape=features.shape)
+    for start in range(0, rows_kept, SCALE_ROWS):
+        scaled[start:start + SCALE_ROWS] = features[start:start + SCALE_ROWS]
+    scale_inplace(scaled, scaler)
+    scaled.flush()
+    del scaled, features, ids
+
+    encoder.save(os.path.join(entry_dir, "vocab.npz"))
+    meta = {
+        "source": os.path.abspath(file_path),
+        "columns": columns,
+        "id_columns": product_ingest.id_columns(columns),
+        "rows_read": rows_read,
+        "rows_kept": rows_kept,
+        "scaler": scaler_state(scaler),
+        "created": time.time(),
+    }
+    with open(os.path.join(entry_dir, "meta.json"), "w") as f:
+        json.dump(meta, f)
+
+def load_entry(entry_dir):
+    """Opens a cache entry: memory-maps the matrices, loads metadata."""
+    with open(os.path.join(entry_dir, "meta.json")) as f:
+        meta = json.load(f)
+    rows = meta["rows_kept"]
+    return {
+        "dir": entry_dir,
+        "features": _open_raw(os.path.join(entry_dir, "raw.f32"), np.float32, (rows, len(meta["columns"]))),
+        "ids": _open_raw(os.path.join(entry_dir, "ids.i64"), np.int64, (rows, len(meta["id_columns"]))),
+        "scaled": np.load(os.path.join(entry_dir, "scaled.npy"), mmap_mode="r"),
+        "columns": meta["columns"],
+        "id_columns": meta["id_columns"],
+        "rows_read": meta["rows_read"],
+        "rows_kept": meta["rows_kept"],
+        "scaler": scaler_from_state(meta["scaler"]),
+    }
+
+def _open_raw(path, dtype, shape):
+    if shape[0] and shape[1]:
+        return np.memmap(path, dtype=dtype, mode="r", shape=shape)
+    return np.empty(shape, dtype=dtype)
+
+def load_scaled(entry, writable=False):
+    """
+    The scaled matrix as a read-only memory map (pages are file-backed and can
+    be dropped under pressure). writable=True reads it into RAM as one owned,
+    C-contiguous float32 array instead, for consumers that modify it in place.
+    """
+    path = os.path.join(entry["dir"], "scaled.npy")
+    return np.load(path) if writable else np.load(path, mmap_mode="r")
+
+def load_fingerprints(entry):
+    """(Product IDs, row hashes) of the entry's rows, in feature-matrix order."""
+    with np.load(os.path.join(entry["dir"], "fingerprints.npz")) as data:
+        return data["ids"], data["hashes"]
+
+def load_encoder(entry):
+    """Vocabularies are only read when needed (they can be large for titles)."""
+    return CategoricalEncoder.load(os.path.join(entry["dir"], "vocab.npz"))
+
+def load_or_build(file_path, config=None, cache_dir=CACHE_DIR):
+    """
+    Returns a cache entry dict (see load_entry) plus "cached": True/False.
+    Builds it on the first run for this file + config.
+    """
+    config = config or default_config()
+    key = cache_key(file_path, config, cache_dir)
+    entry_dir = os.path.join(cache_dir, key)
+    cached = os.path.exists(os.path.join(entry_dir, "meta.json"))
+    if not cached:
+        tmp_dir = entry_dir + f".tmp{os.getpid()}"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        try:
+            _build(file_path, tmp_dir)
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            os.replace(tmp_dir, entry_dir)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+    entry = load_entry(entry_dir)
+    entry["cached"] = cached
+    return entry
@@ -0,0 +1,157 @@
+"""
+Parallel elbow-method search for K (csv_example.py).
+
+- Fits one KMeans per K in a process pool; the data is copied once into shared
+  memory and every worker attaches to it (no per-task pickling of the matrix);
+  with a single worker the sweep runs in-process instead
+- Each worker is pinned to one BLAS/OpenMP thread so N workers don't fight over cores
+- Ks are submitted in ascending order to at most half as many workers as
+  there are Ks; the sweep stops early once the WCSS curve has flattened (the
+  elbow is behind us) and the Ks not started yet are cancelled
+- Optional row subsampling for the sweep; the final model still uses all rows
+
+Requires: pip install numpy scikit-learn
+"""
+
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import shared_memory, util
+
+import numpy as np
+from sklearn.cluster import KMeans
+from threadpoolctl import threadpool_limits
+
+# -----------------------------
+# Config
+# -----------------------------
+K_VALUES = range(1, 11)
+SAMPLE_SIZE = 200_000      # rows used for the sweep (None = all rows)
+FLAT_TOL = 0.05            # a drop smaller than 5% of the first drop counts as "flat"
+FLAT_PATIENCE = 2          # consecutive flat drops before stopping
+N_INIT = 10
+RANDOM_STATE = 42
+
+# -----------------------------
+# Worker side
+# -----------------------------
+_shared = {}
+
+def _attach(name, shape, dtype):
+    shm = shared_memory.SharedMemory(name=name)
+    _shared["shm"] = shm
+    _shared["data"] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    # pool workers leave through os._exit, which skips atexit but runs these
+    util.Finalize(None, _detach, exitpriority=10)
+
+def _detach():
+    _shared.pop("data", None)      # the view must go before the mapping can close
+    shm = _shared.pop("shm", None)
+    if shm is not None:
+        shm.close()
+
+def _fit_k(k, n_init, random_state):
+    with threadpool_limits(limits=1):
+        model = KMeans(n_clusters=k, random_state=random_state, n_init=n_init)
+        model.fit(_shared["data"])
+    return k, float(model.inertia_)
+
+# -----------------------------
+# Elbow detection
+# -----------------------------
+def find_elbow(ks, wcss):
+    """K whose point lies furthest below the straight line from the first to the last point."""
+    if len(ks) < 3:
+        return ks[-1]
+    x = np.asarray(ks, dtype=np.float64)
+    y = np.asarray(wcss, dtype=np.float64)
+    x = (x - x[0]) / (x[-1] - x[0])
+    span = y[0] - y[-1]
+    y = (y - y[-1]) / span if span > 0 else np.zeros_like(y)
+    # line goes from (0, 1) to (1, 0): distance is proportional to 1 - x - y
+    return ks[int(np.argmax(1.0 - x - y))]
+
+def has_flattened(wcss, tol=FLAT_TOL, patience=FLAT_PATIENCE):
+    if len(wcss) < patience + 2:
+        return False
+    first_drop = wcss[0] - wcss[1]
+    if first_drop <= 0:
+        return True
+    drops = [wcss[i - 1] - wcss[i] for i in range(len(wcss) - patience, len(wcss))]
+    return all(d < tol * first_drop for d in drops)
+
+# -----------------------------
+# Search
+# -----------------------------
+def elbow_search(data, k_values=K_VALUES, workers=None, sample_size=SAMPLE_SIZE,
+                 early_stop=True, n_init=N_INIT, random_state=RANDOM_STATE):
+    """
+    Returns {"k", "ks", "wcss", "rows", "seconds"}.
+    ks/wcss only cover the Ks actually evaluated (early stop may cut the sweep short).
+    """
+    start = time.perf_counter()
+    k_values = sorted(k_values)
+    # fewer workers than Ks, so a flattened curve still leaves Ks to skip
+    workers = workers or max(1, min(len(k_values) // 2, os.cpu_count() or 1))
+
+    if sample_size and len(data) > sample_size:
+        rng = np.random.default_rng(random_state)
+        idx = np.sort(rng.choice(len(data), size=sample_size, replace=False))
+        data = data[idx]
+    data = np.ascontiguousarray(data, dtype=np.float32)
+
+    results = {}
+    if workers == 1:
+        done = _sweep_inline(data, k_values, results, early_stop, n_init, random_state)
+    else:
+        done = _sweep_pool(data, k_values, results, workers, early_stop, n_init, random_state)
+
+    # only the contiguous run of Ks from the start (early stop may cut the sweep short)
+    ks = k_values[:done]
+    wcss = [results[k] for k in ks]
+    return {
+        "k": find_elbow(ks, wcss),
+        "ks": ks,
+        "wcss": wcss,
+        "rows": len(data),
+        "seconds": time.perf_counter() - start,
+    }
+
+def _sweep_inline(data, k_values, results, early_stop, n_init, random_state):
+    """One worker: fit in this process (a pool would only add a fork and a shared copy)."""
+    done = 0
+    for done, k in enumerate(k_values, 1):
+        results[k] = float(KMeans(n_clusters=k, random_state=random_state, n_init=n_init).fit(data).inertia_)
+        if early_stop and has_flattened([results[k] for k in k_values[:done]]):
+            break
+    return done
+
+def _sweep_pool(data, k_values, results, workers, early_stop, n_init, random_state):
+    """Returns how many Ks from the start have results."""
+    shm = shared_memory.SharedMemory(create=True, size=max(data.nbytes, 1))
+    try:
+        np.ndarray(data.shape, dtype=data.dtype, buffer=shm.buf)[:] = data
+        done = 0                       # results[k_values[:done]] are all in
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach,
+                                 initargs=(shm.name, data.shape, data.dtype.str)) as pool:
+            todo = iter(k_values)
+            running = {pool.submit(_fit_k, k, n_init, random_state) for _, k in zip(range(workers), todo)}
+            while running:
+                finished, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    k, inertia = future.result()
+                    results[k] = inertia
+                while done < len(k_values) and k_values[done] in results:
+                    done += 1
+                if early_stop and has_flattened([results[k] for k in k_values[:done]]):
+                    for future in running:
+                        future.cancel()
+                    break
+                for k in todo:
+                    running.add(pool.submit(_fit_k, k, n_init, random_state))
+                    if len(running) >= workers:
+                        break
+    finally:
+        shm.close()
+        shm.unlink()
+    return done
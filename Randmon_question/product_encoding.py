@@ -0,0 +1,216 @@
+"""
+Vectorized categorical encoding with persistent vocabularies.
+
+- One vocabulary per text column: value -> int32 code in first-seen order
+- Lookups are done on the chunk's categories, then broadcast to rows through
+  the categorical codes, so each distinct value is hashed once
+- A vocabulary holds no Python object per value: values are one UTF-8 blob
+  plus offsets, looked up by a 128-bit hash in a sorted array (~28 bytes +
+  the text per value, about a third of an object Index for titles)
+- Vocabularies are saved (.npz: the arrays as they are, no re-hashing; .json:
+  the plain value lists) and re-applied to new files without refitting;
+  values never seen before (and missing values) get UNKNOWN (-1)
+
+Requires: pip install pandas numpy
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+
+UNKNOWN = -1
+HASH_KEYS = ("0123456789123456", "vocab-second-key")   # two 64-bit hashes: a 128-bit key per value
+
+
+def _keys(values):
+    """(h1, h2) uint64 hashes of an object array of values (text; anything else is hashed as str)."""
+    values = np.asarray(values, dtype=object)
+    return tuple(pd.util.hash_array(values, hash_key=key, categorize=False) for key in HASH_KEYS)
+
+
+class Vocabulary:
+    """
+    value -> int32 code in first-seen order, without a Python object per value:
+    values live in one UTF-8 blob (+ offsets) for decoding, and lookups go
+    through their 128-bit hash, kept sorted for searchsorted. Values come
+    back as str.
+    """
+
+    def __init__(self, values=()):
+        self.blob = bytearray()
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.h1 = np.empty(0, dtype=np.uint64)      # sorted
+        self.h2 = np.empty(0, dtype=np.uint64)
+        self.codes = np.empty(0, dtype=np.int32)
+        self.pending_index = None   # loader for (h1, h2, codes), read on first lookup
+        values = np.fromiter(values, dtype=object)
+        if len(values):
+            self.add(values)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def _index(self):
+        if self.pending_index is not None:
+            self.h1, self.h2, self.codes = self.pending_index()
+            self.pending_index = None
+
+    def _find(self, h1, h2):
+        self._index()
+        pos = np.searchsorted(self.h1, h1)
+        if not len(self.h1):
+            return np.full(len(h1), UNKNOWN, dtype=np.int32)
+        pos = np.minimum(pos, len(self.h1) - 1)
+        codes = np.where((self.h1[pos] == h1) & (self.h2[pos] == h2), self.codes[pos], UNKNOWN)
+        # a shared first hash (~1 in 2^64 per pair) puts the match further along the run
+        for i in np.flatnonzero((codes < 0) & (self.h1[pos] == h1)):
+            j = pos[i]
+            while j < len(self.h1) and self.h1[j] == h1[i]:
+                if self.h2[j] == h2[i]:
+                    codes[i] = self.codes[j]
+                    break
+                j += 1
+        return codes.astype(np.int32)
+
+    def lookup(self, values):
+        """int32 codes for an object array of values (UNKNOWN when absent)."""
+        return self._find(*_keys(values))
+
+    def add(self, values):
+        """Adds unique values not seen yet."""
+        values = pd.unique(np.asarray(values, dtype=object))
+        h1, h2 = _keys(values)
+        new = self._find(h1, h2) < 0
+        if not new.any():
+            return
+        encoded = [str(v).encode("utf-8") for v in values[new]]
+        if not isinstance(self.blob, bytearray):      # loaded read-only, first growth
+            self.blob = bytearray(self.blob)
+        codes = np.arange(len(self), len(self) + len(encoded), dtype=np.int32)
+        self.blob += b"".join(encoded)
+        ends = self.offsets[-1] + np.cumsum(np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)))
+        self.offsets = np.concatenate([self.offsets, ends])
+        # merge the new (sorted) keys into the sorted index in one pass
+        order = np.argsort(h1[new], kind="stable")
+        h1, h2 = h1[new][order], h2[new][order]
+        at = np.searchsorted(self.h1, h1)
+        self.h1 = np.insert(self.h1, at, h1)
+        self.h2 = np.insert(self.h2, at, h2)
+        self.codes = np.insert(self.codes, at, codes[order])
+
+    def decode(self, codes):
+        """Values of the given codes (all >= 0) as an object array of str."""
+        codes = np.asarray(codes)
+        unique, inverse = np.unique(codes, return_inverse=True)
+        view = memoryview(self.blob)
+        starts, ends = self.offsets[unique], self.offsets[unique + 1]
+        values = np.empty(len(unique), dtype=object)
+        values[:] = [str(view[a:b], "utf-8") for a, b in zip(starts.tolist(), ends.tolist())]
+        return values[inverse.reshape(codes.shape)]
+
+    def values(self):
+        return pd.Index(self.decode(np.arange(len(self))), dtype=object)
+
+    def arrays(self):
+        """The whole state as numpy arrays (what CategoricalEncoder.save writes to .npz)."""
+        self._index()
+        return {"blob": np.frombuffer(self.blob, dtype=np.uint8), "offsets": self.offsets,
+                "h1": self.h1, "h2": self.h2, "codes": self.codes}
+
+    @classmethod
+    def from_arrays(cls, blob, offsets, index):
+        """index() returns (h1, h2, codes); decoding alone never calls it."""
+        vocab = cls()
+        vocab.blob = blob           # kept as loaded; copied into a bytearray only if it grows
+        vocab.offsets = offsets
+        vocab.pending_index = index
+        return vocab
+
+
+def _distinct(series):
+    """Distinct non-null values of a column as an object array."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        values = series.cat.categories
+    else:
+        values = pd.unique(series.dropna())
+    return np.asarray(values, dtype=object)
+
+
+class CategoricalEncoder:
+    """
+    encoder = CategoricalEncoder()
+    encoder.partial_fit(chunk)          # any number of chunks
+    encoder.transform(chunk)            # text columns -> int32 codes, in place
+    encoder.save("vocab.npz"); CategoricalEncoder.load("vocab.npz")   # or .json
+    """
+
+    def __init__(self, vocabularies=None):
+        self.vocabularies = vocabularies or {}
+
+    @staticmethod
+    def text_columns(frame):
+        # object and pandas' string dtype ("str" by default since pandas 3) both count as text
+        return [col for col in frame.columns
+                if isinstance(frame[col].dtype, pd.CategoricalDtype)
+                or pd.api.types.is_string_dtype(frame[col].dtype)]
+
+    def partial_fit(self, frame):
+        for col in self.text_columns(frame):
+            self.vocabularies.setdefault(col, Vocabulary()).add(_distinct(frame[col]))
+        return self
+
+    def transform(self, frame):
+        """Replaces every known text column with int32 codes (in place) and returns the frame."""
+        for col, vocab in self.vocabularies.items():
+            if col not in frame.columns:
+                continue
+            series = frame[col]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                lookup = vocab.lookup(np.asarray(series.cat.categories, dtype=object))
+                # categorical code -1 (missing) lands on the appended UNKNOWN
+                lookup = np.append(lookup, np.int32(UNKNOWN))
+                codes = lookup[series.cat.codes.to_numpy()]
+            else:
+                codes = vocab.lookup(series.to_numpy(dtype=object))
+            frame[col] = codes
+        return frame
+
+    def fit_transform(self, frame):
+        return self.partial_fit(frame).transform(frame)
+
+    def decode(self, col, codes):
+        """Codes back to values (None for UNKNOWN)."""
+        codes = np.asarray(codes)
+        out = np.full(codes.shape, None, dtype=object)
+        known = codes >= 0
+        out[known] = self.vocabularies[col].decode(codes[known])
+        return out
+
+    def save(self, path):
+        if path.endswith(".npz"):
+            arrays = {"columns": np.frombuffer(json.dumps(list(self.vocabularies)).encode("utf-8"), dtype=np.uint8)}
+            for i, vocab in enumerate(self.vocabularies.values()):
+                arrays.update({f"{i}.{name}": array for name, array in vocab.arrays().items()})
+            with open(path, "wb") as f:
+                np.savez(f, **arrays)
+            return
+        data = {col: vocab.values().tolist() for col, vocab in self.vocabularies.items()}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path):
+        if path.endswith(".npz"):
+            def index(i):
+                with np.load(path) as data:
+                    return tuple(data[f"{i}.{name}"] for name in ("h1", "h2", "codes"))
+
+            with np.load(path) as data:
+                columns = json.loads(data["columns"].tobytes().decode("utf-8"))
+                return cls({col: Vocabulary.from_arrays(data[f"{i}.blob"], data[f"{i}.offsets"],
+                                                        lambda i=i: index(i))
+                            for i, col in enumerate(columns)})
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls({col: Vocabulary(values) for col, values in data.items()})
@@ -0,0 +1,353 @@
+"""
+Partitioned, parallel export of clustered products.
+
+- Rows are written as they come out of the assignment pass (frame + labels),
+  so the full annotated DataFrame is never built; rows keep their original
+  values (exact int64 ids from the side array, text decoded through the
+  vocabularies), like the old clustered_products.csv
+- Output is split into one file per cluster ("cluster") or per fixed row
+  range ("rows"), plus a manifest.json listing every part
+- Each partition belongs to one writer thread, so its rows stay in order and
+  different partitions are formatted / compressed / written in parallel
+  (pyarrow and zlib release the GIL while they work)
+- Formats: "csv", "csv.gz" (compressed CSV) and "parquet" (binary columnar,
+  needs pyarrow); without pyarrow CSV falls back to pandas and "npy" writes
+  one raw little-endian file per numeric column (text columns as JSON lines)
+  instead of parquet
+- Output is written to a temp folder and renamed into place on close; an
+  existing out_dir is only replaced if it holds a previous export (has a
+  manifest.json), never an unrelated non-empty folder
+
+Usage:
+    with ClusterExporter("clustered_products", columns, fmt="csv.gz") as out:
+        for frame, labels in ...:
+            out.write(frame, labels)
+
+Requires: pip install pandas numpy (pyarrow optional)
+"""
+
+import gzip
+import json
+import mmap
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from product_ingest import id_columns
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# -----------------------------
+# Config
+# -----------------------------
+OUTPUT_DIR = "clustered_products"
+FORMATS = ("csv", "csv.gz", "parquet", "npy")
+BLOCK_ROWS = 65_536         # rows handed to the writers per block
+ROWS_PER_PART = 1_000_000   # partition size in "rows" mode
+GZIP_LEVEL = 3              # 1 = fastest, 9 = smallest
+WORKERS = min(8, os.cpu_count() or 1)
+
+# -----------------------------
+# Partition writers (one per output file, used from one thread only)
+# -----------------------------
+class _CsvPart:
+    def __init__(self, path, columns, compress):
+        self.columns = columns
+        self.header = True
+        if pa is not None:
+            sink = pa.OSFile(path, "wb")
+            self.sink = pa.CompressedOutputStream(sink, "gzip") if compress else sink
+            self.writer = None
+        else:
+            self.sink = (gzip.open(path, "wt", newline="", compresslevel=GZIP_LEVEL) if compress
+                         else open(path, "w", newline=""))
+
+    def write(self, frame, labels):
+        if pa is not None:
+            table = _table(frame, labels, self.columns)
+            if self.writer is None:
+                self.writer = pa_csv.CSVWriter(self.sink, table.schema)
+            self.writer.write_table(table)
+        else:
+            frame = frame[self.columns].assign(Cluster=labels)
+            frame.to_csv(self.sink, header=self.header, index=False)
+            self.header = False
+
+    def close(self):
+        if pa is not None and self.writer is not None:
+            self.writer.close()
+        self.sink.close()
+
+class _ParquetPart:
+    def __init__(self, path, columns):
+        self.path, self.columns = path, columns
+        self.writer = None
+
+    def write(self, frame, labels):
+        table = _table(frame, labels, self.columns)
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.path, table.schema, compression="zstd")
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+class _NpyPart:
+    """
+    Folder of column files: numeric columns as raw little-endian <column>.i64 /
+    .f32 / ... (np.fromfile to read), text columns as <column>.jsonl (one JSON
+    string per line), and Cluster.i32.
+    """
+
+    def __init__(self, path, columns):
+        os.makedirs(path, exist_ok=True)
+        self.path, self.columns = path, columns
+        self.files = None       # opened on the first block, once the dtypes are known
+        self.labels = open(os.path.join(path, "Cluster.i32"), "wb")
+
+    def _open(self, frame):
+        self.files = []
+        for col in self.columns:
+            if _is_text(frame[col]):
+                name = f"{_safe(col)}.jsonl"
+            else:
+                dtype = frame[col].to_numpy().dtype
+                name = f"{_safe(col)}.{dtype.kind}{dtype.itemsize * 8}"
+            self.files.append(open(os.path.join(self.path, name), "wb"))
+
+    def write(self, frame, labels):
+        if self.files is None:
+            self._open(frame)
+        for col, f in zip(self.columns, self.files):
+            if f.name.endswith(".jsonl"):
+                f.write("".join(json.dumps(v) + "\n" for v in _text_values(frame[col])).encode("utf-8"))
+            else:
+                values = frame[col].to_numpy()
+                f.write(np.ascontiguousarray(values, dtype=values.dtype.newbyteorder("<")).tobytes())
+        self.labels.write(np.asarray(labels, dtype="<i4").tobytes())
+
+    def close(self):
+        for f in (self.files or []) + [self.labels]:
+            f.close()
+
+def _is_text(series):
+    return isinstance(series.dtype, pd.CategoricalDtype) or not pd.api.types.is_numeric_dtype(series.dtype)
+
+def _text_values(series):
+    """Object array of str / None (missing), whatever the text column's dtype."""
+    values = series.to_numpy(dtype=object)
+    values[pd.isna(values)] = None
+    return values
+
+def _table(frame, labels, columns):
+    # text always as plain strings, so every block of a part has the same schema
+    arrays = [pa.array(_text_values(frame[col]), type=pa.string()) if _is_text(frame[col])
+              else pa.array(frame[col].to_numpy()) for col in columns]
+    arrays.append(pa.array(np.asarray(labels, dtype=np.int32)))
+    return pa.Table.from_arrays(arrays, names=list(columns) + ["Cluster"])
+
+def _safe(name):
+    return "".join(ch if ch.isalnum() else "_" for ch in name)
+
+# -----------------------------
+# Exporter
+# -----------------------------
+class ClusterExporter:
+    def __init__(self, out_dir=OUTPUT_DIR, columns=(), fmt="csv", partition="cluster",
+                 rows_per_part=ROWS_PER_PART, workers=WORKERS):
+        if fmt not in FORMATS:
+            raise ValueError(f"fmt must be one of {FORMATS}, got {fmt!r}")
+        if fmt == "parquet" and pa is None:
+            raise ImportError("parquet export needs pyarrow (pip install pyarrow); use fmt='npy' instead")
+        if partition not in ("cluster", "rows"):
+            raise ValueError("partition must be 'cluster' or 'rows'")
+        self.out_dir, self.columns, self.fmt = out_dir, list(columns), fmt
+        self.partition, self.rows_per_part = partition, rows_per_part
+        self.workers = [ThreadPoolExecutor(max_workers=1) for _ in range(max(workers, 1))]
+        self.slots = threading.BoundedSemaphore(4 * len(self.workers))   # blocks in flight
+        self.parts = {}        # partition key -> writer
+        self.counts = {}       # partition key -> rows
+        self.pending = []
+        self.rows = 0
+        self.manifest = None
+        self.start = time.perf_counter()
+
+        _check_replaceable(out_dir)
+        self.tmp_dir = f"{os.path.normpath(out_dir)}.tmp{os.getpid()}"
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+        os.makedirs(self.tmp_dir)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+    def _path(self, key):
+        name = f"cluster_{key}" if self.partition == "cluster" else f"part_{key:05d}"
+        return os.path.join(self.tmp_dir, name if self.fmt == "npy" else f"{name}.{self.fmt}")
+
+    def _open(self, key):
+        path = self._path(key)
+        if self.fmt == "parquet":
+            return _ParquetPart(path, self.columns)
+        if self.fmt == "npy":
+            return _NpyPart(path, self.columns)
+        return _CsvPart(path, self.columns, compress=self.fmt == "csv.gz")
+
+    def _submit(self, key, frame, labels):
+        if key not in self.parts:
+            self.counts[key] = 0
+            self.parts[key] = None
+        self.counts[key] += len(labels)
+        self.slots.acquire()
+        worker = self.workers[hash(key) % len(self.workers)]
+        future = worker.submit(self._write_part, key, frame, labels)
+        future.add_done_callback(lambda _: self.slots.release())
+        self.pending.append(future)
+
+    def _write_part(self, key, frame, labels):
+        # only ever runs on the worker that owns `key`
+        if self.parts[key] is None:
+            self.parts[key] = self._open(key)
+        self.parts[key].write(frame, labels)
+
+    def _raise_errors(self):
+        still = []
+        for future in self.pending:
+            if future.done():
+                future.result()
+            else:
+                still.append(future)
+        self.pending = still
+
+    def write(self, frame, labels):
+        """Queues a DataFrame of rows (the exporter's columns, original values) and their cluster labels."""
+        self._raise_errors()
+        labels = np.asarray(labels, dtype=np.int32)
+        if self.partition == "rows":
+            lo = 0
+            while lo < len(labels):
+                key = (self.rows + lo) // self.rows_per_part
+                hi = min(len(labels), (key + 1) * self.rows_per_part - self.rows)
+                self._submit(key, frame.iloc[lo:hi], labels[lo:hi])
+                lo = hi
+        else:
+            order = np.argsort(labels, kind="stable")
+            sorted_labels = labels[order]
+            keys, starts = np.unique(sorted_labels, return_index=True)
+            bounds = list(starts[1:]) + [len(order)]
+            for key, lo, hi in zip(keys, starts, bounds):
+                self._submit(int(key), frame.take(order[lo:hi]), sorted_labels[lo:hi])
+        self.rows += len(labels)
+
+    def _finish(self):
+        for worker in self.workers:
+            worker.shutdown(wait=True)
+        errors = [f.exception() for f in self.pending if f.exception() is not None]
+        for part in self.parts.values():
+            if part is not None:
+                part.close()
+        return errors
+
+    def abort(self):
+        """Stops the writers and removes the temp folder; out_dir is left as it was."""
+        if self.manifest is None:
+            self._finish()
+            shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def close(self):
+        """Flushes every partition, writes manifest.json and moves the export into out_dir."""
+        if self.manifest is not None:
+            return self.manifest
+        errors = self._finish()
+        if errors:
+            shutil.rmtree(self.tmp_dir, ignore_errors=True)
+            raise errors[0]
+
+        manifest = {
+            "format": self.fmt,
+            "partition": self.partition,
+            "columns": self.columns + ["Cluster"],
+            "rows": self.rows,
+            "seconds": round(time.perf_counter() - self.start, 3),
+            "parts": [{"file": os.path.basename(self._path(key)), "rows": self.counts[key],
+                       **({"cluster": key} if self.partition == "cluster" else {})}
+                      for key in sorted(self.parts)],
+        }
+        with open(os.path.join(self.tmp_dir, "manifest.json"), "w") as f:
+            json.dump(manifest, f, indent=2)
+        _check_replaceable(self.out_dir)
+        if os.path.isdir(self.out_dir):
+            shutil.rmtree(self.out_dir)
+        os.replace(self.tmp_dir, self.out_dir)
+        self.manifest = manifest
+        return manifest
+
+def _check_replaceable(out_dir):
+    """Only an empty folder or a previous export (has manifest.json) may be replaced."""
+    if os.path.exists(out_dir) and not os.path.isdir(out_dir):
+        raise FileExistsError(f"{out_dir} exists and is not a folder")
+    if os.path.isdir(out_dir) and os.listdir(out_dir) and \
+            not os.path.exists(os.path.join(out_dir, "manifest.json")):
+        raise FileExistsError(f"{out_dir} is not empty and is not a previous export (no manifest.json); "
+                              "pick another output folder")
+
+# -----------------------------
+# One-shot export
+# -----------------------------
+def original_rows(block, ids, columns, encoder):
+    """
+    DataFrame of the original values for a block of the feature matrix: ID
+    columns from the exact int64 side array (see product_ingest.id_columns),
+    text columns decoded through the encoder's vocabularies, the rest as is.
+    """
+    id_cols = id_columns(columns)
+    data = {}
+    for i, col in enumerate(columns):
+        if col in id_cols:
+            data[col] = np.asarray(ids[:, id_cols.index(col)])
+        elif col in encoder.vocabularies:
+            data[col] = encoder.decode(col, block[:, i].astype(np.int32))
+        else:
+            data[col] = np.asarray(block[:, i])
+    return pd.DataFrame(data, columns=list(columns))
+
+def export_clusters(features, ids, labels, columns, encoder, out_dir=OUTPUT_DIR, fmt="csv",
+                    partition="cluster", block_rows=BLOCK_ROWS, **kwargs):
+    """
+    Streams the rows in blocks through a ClusterExporter with their original
+    values (see original_rows); works on memmaps, and drops the pages of
+    read-only ones once their rows are out, so RSS holds about one block.
+    """
+    with ClusterExporter(out_dir, columns, fmt=fmt, partition=partition, **kwargs) as out:
+        for lo in range(0, len(labels), block_rows):
+            hi = lo + block_rows
+            out.write(original_rows(features[lo:hi], ids[lo:hi], columns, encoder), labels[lo:hi])
+            _drop_pages(features, hi)
+            _drop_pages(ids, hi)
+    return out.manifest
+
+def _drop_pages(array, rows):
+    """Releases the clean pages behind array[:rows] of a read-only np.memmap (re-read from disk if touched again)."""
+    mm = getattr(array, "_mmap", None)
+    if mm is None or getattr(array, "mode", None) != "r" or not hasattr(mmap, "MADV_DONTNEED"):
+        return
+    end = (array.offset + min(rows, len(array)) * array.strides[0]) // mmap.PAGESIZE * mmap.PAGESIZE
+    if end > 0:
+        mm.madvise(mmap.MADV_DONTNEED, 0, end)
@@ -0,0 +1,144 @@
+"""
+Incremental re-clustering when the product catalog changes.
+
+- Loads the saved model (centres, scaler, encoder, row fingerprints)
+- Streams the new catalog file and compares each row's Product ID + row hash
+  with the fingerprints, so only added or changed rows are encoded and scaled
+- Warm-starts from the old cluster_centers_: every centre keeps its old rows
+  as a fixed weight and a few Lloyd steps fold in only the new rows
+- Writes a delta file (added / changed / removed rows with their cluster)
+  instead of rewriting clustered_products.csv, then saves the updated model
+
+Old rows' feature values aren't stored, so removed/changed rows only take
+their weight off the old centre; run a full csv_example.py now and then.
+
+Requires: pip install pandas numpy scikit-learn
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from product_ingest import CHUNK_SIZE, id_columns, iter_chunks
+from product_model import (ID_COLUMN, MODEL_DIR, fingerprint_chunk, load_model,
+                           nearest_centroid, save_model)
+
+# -----------------------------
+# Config
+# -----------------------------
+DELTA_FILE = "clustered_products_delta.csv"
+REFINE_ITERS = 3
+
+# -----------------------------
+# Update
+# -----------------------------
+def refine_centers(centers, counts, X, iters=REFINE_ITERS):
+    """Lloyd steps where each centre carries `counts` old rows at its old position."""
+    base = centers.astype(np.float64) * counts[:, None]
+    refined = centers
+    labels = nearest_centroid(X, refined)
+    for _ in range(iters):
+        sums = np.zeros_like(base)
+        for c in range(len(centers)):
+            members = labels == c
+            if members.any():
+                sums[c] = X[members].sum(axis=0, dtype=np.float64)
+        weight = counts + np.bincount(labels, minlength=len(centers))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            refined = np.where(weight[:, None] > 0, (base + sums) / weight[:, None], centers).astype(np.float32)
+        new_labels = nearest_centroid(X, refined)
+        if np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+    return refined, labels
+
+def _nullable_ids(frame):
+    for col in id_columns(frame.columns):
+        frame[col] = frame[col].astype("Int64")
+    return frame
+
+def update_clusters(file_path, model_dir=MODEL_DIR, delta_file=DELTA_FILE, chunksize=CHUNK_SIZE):
+    """
+    Returns {"rows", "added", "changed", "removed", "shift", "seconds", "delta_file"}.
+    """
+    start = time.perf_counter()
+    model = load_model(model_dir)
+    if model["ids"] is None:
+        raise ValueError(f"{model_dir} has no row fingerprints; save the model with ids/hashes/labels")
+    centers, scaler, encoder, columns = model["centers"], model["scaler"], model["encoder"], model["columns"]
+    old_ids, old_hashes, old_labels = model["ids"], model["hashes"], model["labels"]
+    k = len(centers)
+    counts = np.bincount(old_labels, minlength=k).astype(np.float64)
+    seen = np.zeros(len(old_ids), dtype=bool)
+
+    all_ids, all_hashes, all_labels = [], [], []
+    delta_frames, delta_X, delta_status = [], [], []
+    for chunk in iter_chunks(file_path, chunksize=chunksize):
+        ids, hashes = fingerprint_chunk(chunk)
+        if len(old_ids):
+            pos = np.minimum(np.searchsorted(old_ids, ids), len(old_ids) - 1)
+            known = old_ids[pos] == ids
+        else:
+            pos = np.zeros(len(ids), dtype=np.int64)
+            known = np.zeros(len(ids), dtype=bool)
+        seen[pos[known]] = True
+        changed = known & (old_hashes[pos] != hashes) if len(old_ids) else known
+        touched = changed | ~known
+
+        labels = np.where(known, old_labels[pos] if len(old_ids) else -1, -1).astype(np.int32)
+        labels[touched] = -1
+        all_ids.append(ids)
+        all_hashes.append(hashes)
+        all_labels.append(labels)
+
+        if touched.any():
+            # a changed row's old version leaves its old cluster
+            np.subtract.at(counts, old_labels[pos[changed]], 1)
+            sub = chunk[touched]
+            encoder.partial_fit(sub)
+            encoded = encoder.transform(sub.copy())
+            delta_X.append(scaler.transform(encoded[columns].to_numpy(dtype=np.float32)).astype(np.float32))
+            delta_frames.append(sub)   # original values in the delta file
+            delta_status.append(np.where(changed[touched], "changed", "added"))
+
+    removed = ~seen
+    np.subtract.at(counts, old_labels[removed], 1)
+    counts = np.maximum(counts, 0)
+
+    d = len(columns)
+    X = np.concatenate(delta_X) if delta_X else np.empty((0, d), dtype=np.float32)
+    new_centers, delta_labels = refine_centers(centers, counts, X) if len(X) else (centers, np.empty(0, dtype=np.int32))
+
+    # delta file: added/changed rows with their new cluster, then removed ids
+    # (ids as nullable Int64, so the removed rows' missing columns don't turn them into floats)
+    parts = []
+    if delta_frames:
+        delta = pd.concat(delta_frames, ignore_index=True)
+        delta["Cluster"] = delta_labels
+        delta["Change"] = np.concatenate(delta_status)
+        parts.append(delta)
+    if removed.any():
+        parts.append(pd.DataFrame({ID_COLUMN: old_ids[removed], "Cluster": old_labels[removed], "Change": "removed"}))
+    if parts:
+        delta = pd.concat([_nullable_ids(part) for part in parts], ignore_index=True)
+        delta.to_csv(delta_file, index=False)
+    else:
+        pd.DataFrame(columns=list(columns) + ["Cluster", "Change"]).to_csv(delta_file, index=False)
+
+    ids = np.concatenate(all_ids) if all_ids else np.empty(0, dtype=np.int64)
+    hashes = np.concatenate(all_hashes) if all_hashes else np.empty(0, dtype=np.uint64)
+    labels = np.concatenate(all_labels) if all_labels else np.empty(0, dtype=np.int32)
+    labels[labels < 0] = delta_labels
+    save_model(model_dir, new_centers, scaler, encoder, columns, ids, hashes, labels)
+
+    n_changed = int(sum((s == "changed").sum() for s in delta_status))
+    return {
+        "rows": len(ids),
+        "added": len(X) - n_changed,
+        "changed": n_changed,
+        "removed": int(removed.sum()),
+        "shift": float(np.linalg.norm(new_centers - centers, axis=1).max()) if k else 0.0,
+        "seconds": time.perf_counter() - start,
+        "delta_file": delta_file,
+    }
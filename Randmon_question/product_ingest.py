@@ -0,0 +1,165 @@
+"""
+Chunked, typed CSV ingestion for the product clustering pipeline (csv_example.py).
+
+- Reads the pricerunner aggregate file in chunks with compact dtypes
+  (category for text, Int64 for ids, float32 for anything numeric); columns
+  not in DTYPES are inferred by pandas, then stored as float32 or category
+- Drops rows with missing values per chunk instead of copying the whole frame
+- Encodes text columns with a CategoricalEncoder whose vocabularies grow chunk
+  by chunk, so codes stay consistent across the whole file
+- Builds the float32 feature matrix incrementally (in RAM, or appended to a
+  raw file on disk and memory-mapped) so working memory is one chunk
+- The heap is trimmed once the matrix is built: glibc otherwise keeps the
+  freed per-chunk parse memory in RSS for the rest of the run
+- ID columns also go to an int64 side array: float32 is exact only up to
+  2^24, so the feature matrix is for the model and the side array is where
+  exports and fingerprints read the real ids from
+
+Requires: pip install pandas numpy
+"""
+
+import ctypes
+
+import numpy as np
+import pandas as pd
+
+from product_encoding import CategoricalEncoder
+
+# -----------------------------
+# Config
+# -----------------------------
+CHUNK_SIZE = 50_000        # rows per read; larger chunks leave more parse memory behind in the heap
+
+# column name (stripped) -> dtype used while reading
+# ids are read as nullable Int64 so missing values don't fail the parse,
+# and turned into plain int64 once the chunk's nulls are dropped
+DTYPES = {
+    "Product ID": "Int64",
+    "Product Title": "category",
+    "Merchant ID": "Int64",
+    "Cluster ID": "Int64",
+    "Cluster Label": "category",
+    "Category ID": "Int64",
+    "Category Label": "category",
+}
+NUMERIC_DTYPE = "float32"    # unknown columns that parse as numbers
+ID_COLUMNS = tuple(name for name, dtype in DTYPES.items() if dtype == "Int64")
+
+# -----------------------------
+# Reading
+# -----------------------------
+def read_columns(file_path):
+    """
+    Header names as the chunked reader sees them -> stripped names. The
+    pricerunner header has leading spaces, which skipinitialspace already
+    removes, so DTYPES has to be keyed on the names parsed the same way.
+    """
+    header = pd.read_csv(file_path, nrows=0, skipinitialspace=True)
+    return {col: col.strip() for col in header.columns}
+
+def peek(file_path, rows=5):
+    """First few rows with the same dtypes the chunked reader uses."""
+    return next(iter_chunks(file_path, chunksize=rows, dropna=False))
+
+def iter_chunks(file_path, chunksize=CHUNK_SIZE, dropna=True):
+    """Yields typed DataFrame chunks with stripped column names and nulls removed."""
+    names = read_columns(file_path)
+    dtypes = {orig: DTYPES[name] for orig, name in names.items() if name in DTYPES}
+    reader = pd.read_csv(file_path, dtype=dtypes, chunksize=chunksize, skipinitialspace=True)
+    for chunk in reader:
+        chunk = compact_unknown(chunk.rename(columns=names))
+        if dropna:
+            chunk = chunk.dropna()
+        yield narrow_ids(chunk)
+
+def compact_unknown(chunk):
+    """Columns not in DTYPES, as pandas inferred them -> float32 if numeric, category if text (in place)."""
+    for col in chunk.columns:
+        if col in DTYPES:
+            continue
+        dtype = chunk[col].dtype
+        if pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype):
+            chunk[col] = chunk[col].astype(NUMERIC_DTYPE)
+        elif pd.api.types.is_string_dtype(dtype) or pd.api.types.is_bool_dtype(dtype):
+            chunk[col] = chunk[col].astype("category")
+    return chunk
+
+def narrow_ids(chunk):
+    """Nullable Int64 columns without missing values -> plain int64 (in place)."""
+    for col in chunk.columns:
+        if chunk[col].dtype == "Int64" and not chunk[col].hasnans:
+            chunk[col] = chunk[col].astype("int64")
+    return chunk
+
+def id_columns(columns):
+    """The ID columns present in `columns`, in their order (the side array's columns)."""
+    return [col for col in columns if col in ID_COLUMNS]
+
+# -----------------------------
+# Feature Matrix
+# -----------------------------
+def build_feature_matrix(file_path, out_path=None, chunksize=CHUNK_SIZE, encoder=None, ids_path=None,
+                         on_chunk=None):
+    """
+    Returns (features, ids, columns, encoder, rows_read, rows_kept).
+
+    features is float32 with one row per non-null input row; ids is int64 with
+    the exact values of id_columns(columns) for the same rows. With out_path
+    (and ids_path) the rows are appended to those raw files and returned as
+    read-only np.memmaps, so nothing larger than one chunk is ever held in memory.
+    Pass a fitted encoder to apply existing vocabularies without refitting.
+    on_chunk(chunk) sees every non-null chunk as read, before it is encoded.
+    """
+    fit = encoder is None
+    encoder = encoder or CategoricalEncoder()
+    blocks, id_blocks = [], []
+    columns = None
+    rows_read = rows_kept = 0
+    sink = open(out_path, "wb") if out_path else None
+    id_sink = open(ids_path, "wb") if ids_path else None
+    try:
+        for chunk in iter_chunks(file_path, chunksize=chunksize, dropna=False):
+            rows_read += len(chunk)
+            chunk = narrow_ids(chunk.dropna())
+            rows_kept += len(chunk)
+            if on_chunk is not None:
+                on_chunk(chunk)
+            columns = list(chunk.columns)
+            ids = chunk[id_columns(columns)].to_numpy(dtype=np.int64)
+            if fit:
+                encoder.partial_fit(chunk)
+            encoder.transform(chunk)
+            block = chunk.to_numpy(dtype=np.float32)
+            if sink:
+                sink.write(np.ascontiguousarray(block).tobytes())
+            else:
+                blocks.append(block)
+            if id_sink:
+                id_sink.write(np.ascontiguousarray(ids).tobytes())
+            else:
+                id_blocks.append(ids)
+    finally:
+        if sink:
+            sink.close()
+        if id_sink:
+            id_sink.close()
+
+    trim_heap()
+    columns = columns or []
+    features = _collect(out_path, blocks, np.float32, (rows_kept, len(columns)))
+    ids = _collect(ids_path, id_blocks, np.int64, (rows_kept, len(id_columns(columns))))
+    return features, ids, columns, encoder, rows_read, rows_kept
+
+def trim_heap():
+    """Returns freed heap memory to the OS (glibc's malloc_trim; a no-op elsewhere)."""
+    try:
+        ctypes.CDLL(None).malloc_trim(0)
+    except (AttributeError, OSError, TypeError):
+        pass
+
+def _collect(path, blocks, dtype, shape):
+    if path and shape[0] and shape[1]:
+        return np.memmap(path, dtype=dtype, mode="r", shape=shape)
+    if blocks and not path:
+        return np.concatenate(blocks)
+    return np.empty(shape, dtype=dtype)
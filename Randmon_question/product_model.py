@@ -0,0 +1,105 @@
+"""
+Saved clustering model for the product pipeline.
+
+A model folder holds everything needed to classify or update without refitting:
+
+    centers.npy   cluster centres (float32, in scaled space)
+    meta.json     columns + StandardScaler state
+    vocab.npz     CategoricalEncoder vocabularies (vocab.json in older models)
+    rows.npz      per-row fingerprints of the data it was trained on:
+                  Product ID, 64-bit row hash and assigned cluster
+
+Requires: pip install pandas numpy scikit-learn
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from product_cache import scaler_from_state, scaler_state
+from product_encoding import CategoricalEncoder
+from product_ingest import CHUNK_SIZE, iter_chunks
+
+# -----------------------------
+# Config
+# -----------------------------
+MODEL_DIR = "product_model"
+ID_COLUMN = "Product ID"
+MODEL_VERSION = 1
+
+# -----------------------------
+# Row fingerprints
+# -----------------------------
+def fingerprint_chunk(chunk):
+    """(ids int64, hashes uint64) of a raw (not yet encoded) chunk."""
+    ids = chunk[ID_COLUMN].to_numpy(dtype=np.int64)
+    hashes = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+    return ids, hashes
+
+def fingerprint_file(file_path, chunksize=CHUNK_SIZE):
+    """Fingerprints of every non-null row, in the same order as the feature matrix."""
+    ids, hashes = [], []
+    for chunk in iter_chunks(file_path, chunksize=chunksize):
+        i, h = fingerprint_chunk(chunk)
+        ids.append(i)
+        hashes.append(h)
+    if not ids:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.uint64)
+    return np.concatenate(ids), np.concatenate(hashes)
+
+# -----------------------------
+# Assignment
+# -----------------------------
+def nearest_centroid(X, centers):
+    """Index of the closest centre for every row (squared euclidean, via one matmul)."""
+    X = np.asarray(X, dtype=np.float32)
+    centers = np.asarray(centers, dtype=np.float32)
+    # ||x - c||^2 = ||x||^2 - 2 x.c + ||c||^2, and ||x||^2 doesn't change the argmin
+    scores = X @ centers.T
+    scores *= -2.0
+    scores += (centers * centers).sum(axis=1)
+    return scores.argmin(axis=1).astype(np.int32)
+
+# -----------------------------
+# Save / Load
+# -----------------------------
+def save_model(model_dir, centers, scaler, encoder, columns, ids=None, hashes=None, labels=None):
+    os.makedirs(model_dir, exist_ok=True)
+    np.save(os.path.join(model_dir, "centers.npy"), np.asarray(centers, dtype=np.float32))
+    encoder.save(os.path.join(model_dir, "vocab.npz"))
+    meta = {"version": MODEL_VERSION, "columns": list(columns), "scaler": scaler_state(scaler)}
+    with open(os.path.join(model_dir, "meta.json"), "w") as f:
+        json.dump(meta, f)
+    if ids is not None:
+        order = np.argsort(ids, kind="stable")
+        np.savez(os.path.join(model_dir, "rows.npz"),
+                 ids=np.asarray(ids, dtype=np.int64)[order],
+                 hashes=np.asarray(hashes, dtype=np.uint64)[order],
+                 labels=np.asarray(labels, dtype=np.int32)[order])
+
+def load_vocab(model_dir):
+    path = os.path.join(model_dir, "vocab.npz")
+    if not os.path.exists(path):
+        path = os.path.join(model_dir, "vocab.json")     # saved before vocab.npz
+    return CategoricalEncoder.load(path)
+
+def load_model(model_dir, with_rows=True):
+    """Returns {"centers", "scaler", "encoder", "columns", "ids", "hashes", "labels"} (rows sorted by id)."""
+    with open(os.path.join(model_dir, "meta.json")) as f:
+        meta = json.load(f)
+    model = {
+        "centers": np.load(os.path.join(model_dir, "centers.npy")),
+        "scaler": scaler_from_state(meta["scaler"]),
+        "encoder": load_vocab(model_dir),
+        "columns": meta["columns"],
+        "ids": None,
+        "hashes": None,
+        "labels": None,
+    }
+    rows_path = os.path.join(model_dir, "rows.npz")
+    if with_rows and os.path.exists(rows_path):
+        with np.load(rows_path) as rows:
+            model["ids"], model["hashes"], model["labels"] = rows["ids"], rows["hashes"], rows["labels"]
+    return model
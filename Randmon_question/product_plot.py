@@ -0,0 +1,113 @@
+"""
+Size-independent cluster plots for the product clustering pipeline.
+
+- IncrementalPCA fitted chunk by chunk and projected chunk by chunk into a
+  float32 (n, 2) buffer (works on memory-mapped matrices)
+- Density view: a fixed grid of 2D histogram cells per cluster, each cell
+  coloured by its dominant cluster and shaded by point count
+- Sample view: a stratified sample of at most N points per cluster, so small
+  clusters stay visible and the scatter has a fixed number of markers
+
+Either way matplotlib draws a bounded number of things, whatever the row count.
+
+Requires: pip install numpy scikit-learn matplotlib
+"""
+
+import numpy as np
+import matplotlib.pyplot as plt
+from sklearn.decomposition import IncrementalPCA
+
+# -----------------------------
+# Config
+# -----------------------------
+PCA_CHUNK = 100_000
+GRID = 300              # density cells per axis
+PER_CLUSTER = 2_000     # points per cluster in sample view
+RANDOM_STATE = 42
+
+# -----------------------------
+# Projection
+# -----------------------------
+def incremental_projection(data, n_components=2, chunk_rows=PCA_CHUNK):
+    """Returns (ipca, projected) with projected as float32 (n, n_components)."""
+    n = len(data)
+    chunk_rows = max(chunk_rows, n_components)
+    ipca = IncrementalPCA(n_components=n_components)
+    for lo in range(0, n, chunk_rows):
+        block = data[lo:lo + chunk_rows]
+        if len(block) < n_components:
+            break   # IncrementalPCA needs at least n_components rows per batch
+        ipca.partial_fit(block)
+
+    projected = np.empty((n, n_components), dtype=np.float32)
+    for lo in range(0, n, chunk_rows):
+        projected[lo:lo + chunk_rows] = ipca.transform(data[lo:lo + chunk_rows])
+    return ipca, projected
+
+# -----------------------------
+# Sampling
+# -----------------------------
+def stratified_sample(labels, per_cluster=PER_CLUSTER, random_state=RANDOM_STATE):
+    """Indices of up to per_cluster random rows from every cluster."""
+    labels = np.asarray(labels)
+    rng = np.random.default_rng(random_state)
+    order = rng.permutation(len(labels))
+    shuffled = labels[order]
+    by_label = np.argsort(shuffled, kind="stable")
+    grouped = order[by_label]
+    sorted_labels = shuffled[by_label]
+    clusters, starts, counts = np.unique(sorted_labels, return_index=True, return_counts=True)
+    picks = [grouped[s:s + min(c, per_cluster)] for s, c in zip(starts, counts)]
+    return np.sort(np.concatenate(picks)) if picks else np.empty(0, dtype=np.int64)
+
+# -----------------------------
+# Plots
+# -----------------------------
+def _style(title):
+    plt.title(title)
+    plt.xlabel("Principal Component 1")
+    plt.ylabel("Principal Component 2")
+
+def plot_sample(projected, labels, per_cluster=PER_CLUSTER):
+    idx = stratified_sample(labels, per_cluster)
+    plt.figure(figsize=(10,7))
+    plt.scatter(projected[idx, 0], projected[idx, 1], c=np.asarray(labels)[idx], cmap="viridis", s=12)
+    _style(f"K-Means Clustering ({len(idx)} of {len(labels)} points, ≤{per_cluster} per cluster)")
+    plt.colorbar(label="Cluster")
+    plt.show()
+
+def plot_density(projected, labels, grid=GRID):
+    labels = np.asarray(labels)
+    k = int(labels.max()) + 1 if len(labels) else 1
+    x, y = projected[:, 0], projected[:, 1]
+    x_edges = np.linspace(float(x.min()), float(x.max()), grid + 1)
+    y_edges = np.linspace(float(y.min()), float(y.max()), grid + 1)
+
+    counts = np.zeros((k, grid, grid), dtype=np.int64)
+    for c in range(k):
+        mask = labels == c
+        counts[c], _, _ = np.histogram2d(x[mask], y[mask], bins=(x_edges, y_edges))
+    total = counts.sum(axis=0)
+    dominant = np.ma.masked_where(total == 0, counts.argmax(axis=0))
+
+    plt.figure(figsize=(10,7))
+    extent = (x_edges[0], x_edges[-1], y_edges[0], y_edges[-1])
+    image = plt.imshow(dominant.T, origin="lower", extent=extent, aspect="auto", cmap="viridis",
+                       vmin=0, vmax=max(k - 1, 1), interpolation="nearest")
+    # darker cells = fewer points
+    shade = np.log1p(total.T) / max(np.log1p(total.max()), 1e-9)
+    alpha = np.where(total.T > 0, 0.6 * (1 - shade), 0.0)
+    plt.imshow(np.dstack([np.zeros_like(shade)] * 3 + [alpha]), origin="lower",
+               extent=extent, aspect="auto", interpolation="nearest")
+    _style(f"K-Means Clustering (density of {len(labels)} points)")
+    plt.colorbar(image, label="Dominant cluster")
+    plt.show()
+
+def plot_clusters(projected, labels, mode="auto", per_cluster=PER_CLUSTER):
+    """mode: "sample", "density" or "auto" (density once a full scatter gets heavy)."""
+    if mode == "auto":
+        mode = "density" if len(labels) > 50 * per_cluster else "sample"
+    if mode == "density":
+        plot_density(projected, labels)
+    else:
+        plot_sample(projected, labels, per_cluster)
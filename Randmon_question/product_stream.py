@@ -0,0 +1,122 @@
+"""
+Streaming (out-of-core) clustering mode for csv_example.py.
+
+- Pass 1: one read of the CSV to build the vocabularies and fit the scaler
+  with partial_fit (skipped when a fitted encoder and scaler are passed in)
+- Pass 2: MiniBatchKMeans.partial_fit over mini-batches cut from each chunk
+- Pass 3: assign clusters chunk by chunk and append to clustered_products.csv,
+  or hand each chunk to a ClusterExporter (partitioned / compressed output)
+
+Only one chunk is in memory at a time, so memory stays flat whatever the file
+size and throughput is bounded by reading the CSV.
+
+Requires: pip install pandas numpy scikit-learn
+"""
+
+import time
+
+import numpy as np
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.preprocessing import StandardScaler
+
+from product_encoding import CategoricalEncoder
+from product_ingest import CHUNK_SIZE, iter_chunks
+
+# -----------------------------
+# Config
+# -----------------------------
+BATCH_SIZE = 4096
+EPOCHS = 1
+RANDOM_STATE = 42
+OUTPUT_FILE = "clustered_products.csv"
+
+# -----------------------------
+# Helpers
+# -----------------------------
+def iter_encoded(file_path, encoder, chunksize=CHUNK_SIZE, fit=False):
+    """Yields (original chunk DataFrame, encoded float32 matrix) pairs."""
+    for chunk in iter_chunks(file_path, chunksize=chunksize):
+        if fit:
+            encoder.partial_fit(chunk)
+        yield chunk, encoder.transform(chunk.copy()).to_numpy(dtype=np.float32)
+
+def fit_scaler(file_path, encoder, chunksize=CHUNK_SIZE, fit_encoder=True):
+    scaler = StandardScaler()
+    for _, block in iter_encoded(file_path, encoder, chunksize, fit=fit_encoder):
+        if len(block):
+            scaler.partial_fit(block)
+    return scaler
+
+def _check_rows(file_path, rows, k):
+    if rows < k:
+        raise ValueError(f"{file_path} has {rows} rows without missing values, fewer than k={k} clusters")
+
+# -----------------------------
+# Streaming clustering
+# -----------------------------
+def stream_cluster(file_path, k, output_file=OUTPUT_FILE, scaler=None, encoder=None,
+                   chunksize=CHUNK_SIZE, batch_size=BATCH_SIZE, epochs=EPOCHS,
+                   random_state=RANDOM_STATE, exporter=None):
+    """
+    Clusters the file without loading it. Returns
+    {"kmeans", "scaler", "encoder", "rows", "counts", "seconds", "output_file"}.
+    A fitted encoder is applied as-is (new values become UNKNOWN).
+    With an exporter, rows go to exporter.write() and output_file is its out_dir.
+    Raises ValueError when the file has fewer usable rows than k.
+    """
+    start = time.perf_counter()
+    fit_encoder = encoder is None
+    encoder = encoder or CategoricalEncoder()
+    if scaler is None:
+        scaler = fit_scaler(file_path, encoder, chunksize, fit_encoder)
+        _check_rows(file_path, int(np.max(getattr(scaler, "n_samples_seen_", 0))), k)
+    elif fit_encoder:
+        raise ValueError("a fitted scaler needs the encoder it was fitted with")
+
+    kmeans = MiniBatchKMeans(n_clusters=k, batch_size=batch_size, random_state=random_state, n_init=3)
+    pending = None  # MiniBatchKMeans needs >= k rows for its first partial_fit
+    for _ in range(epochs):
+        for _, block in iter_encoded(file_path, encoder, chunksize):
+            scaled = scaler.transform(block)
+            for lo in range(0, len(scaled), batch_size):
+                batch = scaled[lo:lo + batch_size]
+                if pending is not None:
+                    batch = np.concatenate([pending, batch])
+                    pending = None
+                if not hasattr(kmeans, "cluster_centers_") and len(batch) < k:
+                    pending = batch
+                    continue
+                kmeans.partial_fit(batch)
+    if pending is not None and hasattr(kmeans, "cluster_centers_"):
+        kmeans.partial_fit(pending)
+    if not hasattr(kmeans, "cluster_centers_"):
+        _check_rows(file_path, 0 if pending is None else len(pending), k)
+
+    counts = np.zeros(k, dtype=np.int64)
+    rows = 0
+    first = True
+    for chunk, block in iter_encoded(file_path, encoder, chunksize):
+        if not len(block):
+            continue
+        labels = kmeans.predict(scaler.transform(block))
+        counts += np.bincount(labels, minlength=k)
+        rows += len(labels)
+        if exporter is not None:
+            exporter.write(chunk, labels)
+            continue
+        chunk["Cluster"] = labels
+        chunk.to_csv(output_file, mode="w" if first else "a", header=first, index=False)
+        first = False
+    if exporter is not None:
+        exporter.close()
+        output_file = exporter.out_dir
+
+    return {
+        "kmeans": kmeans,
+        "scaler": scaler,
+        "encoder": encoder,
+        "rows": rows,
+        "counts": counts,
+        "seconds": time.perf_counter() - start,
+        "output_file": output_file,
+    }
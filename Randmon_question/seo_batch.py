@@ -0,0 +1,171 @@
+"""
+Column-wise batch job for the SEO pipeline (replaces the iterrows workflow in modelexzm.py).
+
+- Keywords, URLs and (URL, keyword) pairs are deduplicated with pd.factorize;
+  every model call and fetch runs once per unique value and results are
+  broadcast back to the rows with integer codes (np.take), never per row.
+  Rows with a missing keyword or URL get NaN / None instead of a result
+- Splits are assigned in one shot from a seeded permutation (70/15/15 by
+  default) instead of two train_test_split calls
+- Like the old workflow, the models and the fetch only see the train split
+  (scope=("train",)); rows of other splits get NaN / None. scope=None (or
+  --all-splits) processes every row
+- Embed / generate go through the batched, cached services (seo_models), and
+  the fetch stage gets unique pages and keywords only
+- score = cosine between a keyword and the mean of the keywords targeting
+  the same URL (how on-topic the keyword is for its page), computed on the
+  unique pairs with one sparse matmul
+
+Python work per row is a handful of vectorised array ops, so on 1M rows the
+job is bounded by the models' throughput on the unique keywords.
+
+Usage:
+    python seo_batch.py keywords.csv [output.csv] [--no-generate] [--no-fetch] [--all-splits]
+
+Requires: pip install pandas numpy scipy (+ the model packages of seo_models)
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# -----------------------------
+# Config
+# -----------------------------
+SPLITS = {"train": 0.70, "val": 0.15, "test": 0.15}
+SCOPE = ("train",)        # splits the models and the fetch run on (None = all)
+SCORE_BLOCK = 65_536      # pairs scored per block
+RANDOM_STATE = 42
+
+# -----------------------------
+# Steps
+# -----------------------------
+def assign_splits(n, fractions=SPLITS, random_state=RANDOM_STATE):
+    """Categorical split label per row from one seeded permutation."""
+    names = list(fractions)
+    cuts = np.round(np.cumsum(list(fractions.values())) * n).astype(np.int64)
+    cuts[-1] = n
+    codes = np.empty(n, dtype=np.int8)
+    order = np.random.default_rng(random_state).permutation(n)
+    codes[order] = np.searchsorted(cuts, np.arange(n), side="right")
+    return pd.Categorical.from_codes(codes, categories=names)
+
+def topic_scores(vectors, url_codes, kw_codes, n_urls):
+    """Cosine of each (url, keyword) pair's keyword with its URL's mean keyword vector."""
+    pairs = sparse.csr_matrix((np.ones(len(url_codes), dtype=np.float32), (url_codes, kw_codes)),
+                              shape=(n_urls, len(vectors)))
+    centroids = np.asarray(pairs @ vectors, dtype=np.float32)
+    centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+
+    scores = np.empty(len(url_codes), dtype=np.float32)
+    for lo in range(0, len(url_codes), SCORE_BLOCK):
+        hi = lo + SCORE_BLOCK
+        scores[lo:hi] = np.einsum("ij,ij->i", vectors[kw_codes[lo:hi]], centroids[url_codes[lo:hi]])
+    return scores
+
+def _factorize(column, rows):
+    """(code per row, uniques) over the selected rows; -1 for other rows and missing values."""
+    codes = np.full(len(column), -1, dtype=np.int64)
+    codes[rows], uniques = pd.factorize(np.asarray(column)[rows], sort=False)
+    return codes, uniques
+
+def _take(values, codes, missing):
+    """values[codes] per row; rows without a code (-1) get `missing`."""
+    values = np.asarray(values)
+    if missing is np.nan and values.dtype.kind != "f":
+        values = values.astype(np.float64)
+    out = values[np.maximum(codes, 0)] if len(values) else np.empty(len(codes), dtype=values.dtype)
+    out[codes < 0] = missing
+    return out
+
+def _field(results, uniques, name):
+    """One float column out of fetch results (dict or exception per unique value)."""
+    return np.array([r.get(name, np.nan) if isinstance(r, dict) else np.nan
+                     for r in (results[u] for u in uniques)], dtype=np.float64)
+
+# -----------------------------
+# Job
+# -----------------------------
+def run_batch(frame, embedder=None, generator=None, fetch=None, keyword_col="keyword",
+              url_col="page_url", splits=SPLITS, random_state=RANDOM_STATE, scope=SCOPE):
+    """
+    Returns (result frame, timings). The result has the input columns plus
+    split, score, meta (if generator), lcp_ms / backlinks (if fetch); the last
+    four only for rows in the scope splits with both a keyword and a URL.
+    fetch(pages, keywords) -> seo_fetch.fetch_stage-style dict.
+    """
+    timings = {}
+    start = time.perf_counter()
+
+    def lap(name):
+        nonlocal start
+        now = time.perf_counter()
+        timings[name] = now - start
+        start = now
+
+    out = frame.copy()
+    out["split"] = assign_splits(len(frame), splits, random_state)
+    rows = np.asarray(out["split"].isin(scope)) if scope else np.ones(len(frame), dtype=bool)
+
+    kw_codes, keywords = _factorize(frame[keyword_col], rows)
+    url_codes, urls = _factorize(frame[url_col], rows)
+    paired = (kw_codes >= 0) & (url_codes >= 0)
+    pair_codes, pairs = _factorize(url_codes * max(len(keywords), 1) + kw_codes, paired)
+    pair_url, pair_kw = pairs // max(len(keywords), 1), pairs % max(len(keywords), 1)
+    lap("dedupe+split")
+
+    if embedder is not None:
+        vectors = embedder.embed(list(keywords))
+        lap("embed")
+        out["score"] = _take(topic_scores(vectors, pair_url, pair_kw, len(urls)), pair_codes, np.nan)
+        lap("score")
+
+    if generator is not None:
+        metas = np.asarray(generator.generate(list(keywords)), dtype=object)
+        out["meta"] = _take(metas, kw_codes, None)
+        lap("generate")
+
+    if fetch is not None:
+        fetched = fetch(list(urls), list(keywords))
+        out["lcp_ms"] = _take(_field(fetched["performance"], urls, "lcp_ms"), url_codes, np.nan)
+        out["backlinks"] = _take(_field(fetched["backlinks"], keywords, "backlinks"), kw_codes, np.nan)
+        timings["fetch_stats"] = fetched["stats"]
+        lap("fetch")
+
+    timings["rows"] = len(frame)
+    timings["unique_keywords"] = len(keywords)
+    timings["unique_urls"] = len(urls)
+    return out, timings
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    if not args:
+        print("Usage: python seo_batch.py keywords.csv [output.csv] [--no-generate] [--no-fetch] [--all-splits]")
+        return
+    import seo_models
+    from modelexzm import fetch_all
+
+    frame = pd.read_csv(args[0])
+    output = args[1] if len(args) > 1 else "seo_batch_output.csv"
+    start = time.perf_counter()
+    result, timings = run_batch(
+        frame,
+        embedder=seo_models.embedder(),
+        generator=None if "--no-generate" in sys.argv else seo_models.generator(),
+        fetch=None if "--no-fetch" in sys.argv else fetch_all,
+        scope=None if "--all-splits" in sys.argv else SCOPE,
+    )
+    result.to_csv(output, index=False)
+    seconds = time.perf_counter() - start
+
+    print(f"📊 {timings['rows']} rows | {timings['unique_keywords']} keywords | {timings['unique_urls']} URLs")
+    for name, value in timings.items():
+        if isinstance(value, float):
+            print(f"  {name:<14} {value:8.2f}s")
+    print(f"✅ {timings['rows'] / seconds:.0f} rows/s → saved as: {output}")
+
+if __name__ == "__main__":
+    main()
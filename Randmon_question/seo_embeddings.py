@@ -0,0 +1,179 @@
+"""
+Keyword embedding service for the SEO pipeline (modelexzm.py).
+
+- Every keyword is keyed by the SHA-1 of its normalised text, so identical
+  keywords are embedded once across runs
+- Cache on disk per model: vectors.f32 (append-only float32 matrix, read back
+  as a memory map) + keys.txt (one hash per line, row i = vector i) + meta.json
+- embed() looks everything up first and runs the model only on the misses,
+  in batches of batch_size; duplicates inside one call are encoded once
+- Vectors are L2-normalised, so cosine similarity is a plain dot product
+- threads sets torch's CPU thread count for inference
+- The model is only loaded on the first miss (shared via seo_models)
+- Appends hold an exclusive lock on the cache folder's lock file and
+  re-read keys.txt under it, so processes sharing a cache pick up each
+  other's rows and never write two vectors to the same row number
+
+Usage:
+    embedder = KeywordEmbedder()
+    vectors = embedder.embed(["bridal couture", "designer sarees"])
+
+Requires: pip install numpy sentence-transformers
+"""
+
+import hashlib
+import json
+import os
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:      # Windows
+    fcntl = None
+    import msvcrt
+
+# -----------------------------
+# Config
+# -----------------------------
+MODEL_NAME = "all-MiniLM-L6-v2"
+CACHE_DIR = os.path.join(".seo_cache", "embeddings")
+BATCH_SIZE = 64
+THREADS = None            # None = torch default (all cores)
+
+def keyword_key(keyword):
+    return hashlib.sha1(" ".join(str(keyword).lower().split()).encode("utf-8")).hexdigest()
+
+@contextmanager
+def file_lock(path):
+    """Exclusive lock on `path` (created if missing) across processes, held for the with-block."""
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+# -----------------------------
+# Embedder
+# -----------------------------
+class KeywordEmbedder:
+    def __init__(self, model_name=MODEL_NAME, cache_dir=CACHE_DIR, batch_size=BATCH_SIZE,
+                 threads=THREADS, model=None):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.threads = threads
+        self.model = model
+        self.dir = os.path.join(cache_dir, model_name.replace("/", "__"))
+        self.keys_path = os.path.join(self.dir, "keys.txt")
+        self.vectors_path = os.path.join(self.dir, "vectors.f32")
+        self.meta_path = os.path.join(self.dir, "meta.json")
+        self.lock_path = os.path.join(self.dir, "lock")
+        self.index = {}           # key -> row in vectors.f32
+        self.dim = None
+        self.vectors = None       # read-only memory map, reopened after appends
+        self.hits = self.misses = 0
+        os.makedirs(self.dir, exist_ok=True)
+        with file_lock(self.lock_path):
+            self._load()
+        if self.dim is not None:
+            self._map()
+
+    def _load(self):
+        """Reads the index back from disk (call with the lock held: it may trim a torn append)."""
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path) as f:
+                self.dim = json.load(f)["dim"]
+        if self.dim is None:
+            return
+        keys = []
+        if os.path.exists(self.keys_path):
+            with open(self.keys_path) as f:
+                keys = f.read().split()
+        rows = self._rows_on_disk()
+        if rows != len(keys):
+            # an interrupted append: keep only rows that have both a key and a vector
+            rows = min(rows, len(keys))
+            keys = keys[:rows]
+            with open(self.vectors_path, "ab") as f:
+                f.truncate(rows * 4 * self.dim)
+            with open(self.keys_path, "w") as f:
+                f.write("".join(k + "\n" for k in keys))
+        self.index = {k: i for i, k in enumerate(keys)}
+
+    def _rows_on_disk(self):
+        return os.path.getsize(self.vectors_path) // (4 * self.dim) if os.path.exists(self.vectors_path) else 0
+
+    def _map(self):
+        rows = len(self.index)
+        self.vectors = (np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(rows, self.dim))
+                        if rows else np.empty((0, self.dim), dtype=np.float32))
+
+    def _load_model(self):
+        if self.model is None:
+            from seo_models import sentence_model   # shared, loaded once per process
+            self.model = sentence_model(self.model_name, self.threads)
+        return self.model
+
+    def _encode(self, texts):
+        model = self._load_model()
+        out = []
+        for lo in range(0, len(texts), self.batch_size):
+            out.append(model.encode(texts[lo:lo + self.batch_size], batch_size=self.batch_size,
+                                    convert_to_numpy=True, normalize_embeddings=True,
+                                    show_progress_bar=False).astype(np.float32))
+        return np.concatenate(out)
+
+    def _append(self, keys, vectors):
+        with file_lock(self.lock_path):
+            # another process may have appended since we last read the cache
+            self._load()
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                with open(self.meta_path, "w") as f:
+                    json.dump({"model": self.model_name, "dim": self.dim}, f)
+            new = [i for i, k in enumerate(keys) if k not in self.index]
+            if new:
+                start = self._rows_on_disk()
+                # vectors first, keys second: a crash leaves extra vectors, trimmed on open
+                with open(self.vectors_path, "ab") as f:
+                    f.write(np.ascontiguousarray(vectors[new], dtype=np.float32).tobytes())
+                with open(self.keys_path, "a") as f:
+                    f.write("".join(keys[i] + "\n" for i in new))
+                for row, i in enumerate(new, start):
+                    self.index[keys[i]] = row
+        self._map()
+
+    def embed(self, keywords):
+        """float32 (n, dim) matrix of normalised embeddings, in the order given."""
+        keywords = [str(k) for k in keywords]
+        keys = [keyword_key(k) for k in keywords]
+
+        missing = {}
+        for key, keyword in zip(keys, keywords):
+            if key not in self.index and key not in missing:
+                missing[key] = keyword
+        self.misses += len(missing)
+        self.hits += len(keys) - len(missing)
+        if missing:
+            self._append(list(missing), self._encode(list(missing.values())))
+
+        if not keys:
+            return np.empty((0, self.dim or 0), dtype=np.float32)
+        rows = np.fromiter((self.index[k] for k in keys), dtype=np.int64, count=len(keys))
+        return np.asarray(self.vectors[rows])
+
+    def __len__(self):
+        return len(self.index)
+
+    def stats(self):
+        return {"cached": len(self.index), "hits": self.hits, "misses": self.misses}
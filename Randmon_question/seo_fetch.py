@@ -0,0 +1,468 @@
+"""
+Concurrent crawl / backlink / performance fetch stage for the SEO pipeline.
+
+- asyncio + a small keep-alive HTTP/1.1 client (stdlib only): connections are
+  pooled per host and reused across requests
+- Bounded concurrency: one global limit on requests in flight, plus a limit
+  on open connections per host
+- Per-host rate limit (token bucket, requests per second with a burst),
+  waited on before a global slot is taken
+- Response cache keyed by URL without the port (cache_key), so the stand-in's
+  random port still hits the cache on the next run: the ETag is sent back as
+  If-None-Match and a 304 answer is served from the cache (kept in memory and
+  in .seo_cache/http). Two servers sharing a key can't poison each other: a
+  foreign ETag just gets a full 200
+- A request that fails, times out, answers non-200 or isn't JSON where JSON
+  is expected maps to its exception; the stage always completes
+- StandInServer: a local asyncio HTTP server that answers the same three
+  endpoints with ETags and keep-alive, so the stage can be benchmarked offline
+
+Benchmark against the stand-in:
+    python seo_fetch.py [pages] [concurrency]
+
+Requires: nothing outside the standard library
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from http import HTTPStatus
+from urllib.parse import parse_qs, quote, urljoin, urlsplit, urlunsplit
+
+# -----------------------------
+# Config
+# -----------------------------
+CONCURRENCY = 64            # requests in flight overall
+HOST_CONNECTIONS = 16       # open connections per host
+HOST_RATE = None            # requests/second per host (None = unlimited)
+HOST_BURST = 50
+TIMEOUT = 10.0              # seconds per request
+CACHE_DIR = os.path.join(".seo_cache", "http")
+USER_AGENT = "seo-fetch/1.0"
+
+# where the three endpoints live; defaults point at a StandInServer
+BASE_URL = os.environ.get("SEO_FETCH_BASE", "http://127.0.0.1:8765/")
+BACKLINKS_PATH = "api/backlinks"
+PERFORMANCE_PATH = "api/performance"
+
+
+class FetchError(Exception):
+    """A response that arrived but can't be used (non-200, or not the JSON expected)."""
+
+
+class Response:
+    __slots__ = ("url", "status", "body", "from_cache", "seconds")
+
+    def __init__(self, url, status, body, from_cache=False, seconds=0.0):
+        self.url, self.status, self.body = url, status, body
+        self.from_cache, self.seconds = from_cache, seconds
+
+    def json(self):
+        return json.loads(self.body)
+
+    def __repr__(self):
+        return f"Response({self.url!r}, {self.status}, {len(self.body)} bytes, cached={self.from_cache})"
+
+# -----------------------------
+# Rate limit
+# -----------------------------
+class TokenBucket:
+    def __init__(self, rate, burst=HOST_BURST):
+        self.rate = rate
+        self.capacity = max(burst or 1, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        if not self.rate:
+            return
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+# -----------------------------
+# Response cache
+# -----------------------------
+class ResponseCache:
+    """url -> (etag, status, body); one .json + .body pair per URL on disk."""
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.dir = cache_dir
+        self.entries = {}
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, url):
+        return os.path.join(self.dir, hashlib.sha1(url.encode("utf-8")).hexdigest())
+
+    def get(self, url):
+        if url in self.entries or not self.dir:
+            return self.entries.get(url)
+        path = self._path(url)
+        try:
+            with open(path + ".json") as f:
+                meta = json.load(f)
+            with open(path + ".body", "rb") as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        self.entries[url] = (meta["etag"], meta["status"], body)
+        return self.entries[url]
+
+    def put(self, url, etag, status, body):
+        self.entries[url] = (etag, status, body)
+        if self.dir:
+            path = self._path(url)
+            with open(path + ".body", "wb") as f:
+                f.write(body)
+            with open(path + ".json", "w") as f:
+                json.dump({"url": url, "etag": etag, "status": status}, f)
+
+# -----------------------------
+# HTTP/1.1 client with per-host connection pools
+# -----------------------------
+class _HostPool:
+    def __init__(self, connections, rate, burst):
+        self.idle = []
+        self.slots = asyncio.Semaphore(connections)
+        self.bucket = TokenBucket(rate, burst)
+
+async def _read_response(reader):
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("connection closed")
+    parts = line.decode("latin-1").split(" ", 2)
+    status = int(parts[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    keep_alive = headers.get("connection", "").lower() != "close"
+    if status in (204, 304) or 100 <= status < 200:
+        body = b""
+    elif headers.get("transfer-encoding", "").lower() == "chunked":
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            if size == 0:
+                await reader.readline()
+                break
+            chunks.append(await reader.readexactly(size))
+            await reader.readline()
+        body = b"".join(chunks)
+    elif "content-length" in headers:
+        body = await reader.readexactly(int(headers["content-length"]))
+    else:
+        body = await reader.read()
+        keep_alive = False
+    return status, headers, body, keep_alive
+
+class Fetcher:
+    def __init__(self, concurrency=CONCURRENCY, host_connections=HOST_CONNECTIONS, host_rate=HOST_RATE,
+                 host_burst=HOST_BURST, timeout=TIMEOUT, cache_dir=CACHE_DIR):
+        self.limit = asyncio.Semaphore(concurrency)
+        self.host_connections, self.host_rate, self.host_burst = host_connections, host_rate, host_burst
+        self.timeout = timeout
+        self.cache = ResponseCache(cache_dir)
+        self.pools = {}
+        self.stats = {"requests": 0, "cache_hits": 0, "connections": 0, "errors": 0}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        for pool in self.pools.values():
+            for _, writer in pool.idle:
+                writer.close()
+            pool.idle.clear()
+
+    def _pool(self, key):
+        if key not in self.pools:
+            self.pools[key] = _HostPool(self.host_connections, self.host_rate, self.host_burst)
+        return self.pools[key]
+
+    async def _send(self, pool, key, request):
+        scheme, host, port = key
+        for attempt in range(2):
+            reused = bool(pool.idle)
+            if reused:
+                reader, writer = pool.idle.pop()
+            else:
+                reader, writer = await asyncio.open_connection(host, port, ssl=scheme == "https")
+                self.stats["connections"] += 1
+            done = False
+            try:
+                writer.write(request)
+                await writer.drain()
+                status, headers, body, keep_alive = await _read_response(reader)
+                done = True
+            except (ConnectionError, asyncio.IncompleteReadError):
+                if reused and attempt == 0:
+                    continue    # the server dropped an idle connection; retry on a fresh one
+                raise
+            finally:
+                # also on a wait_for timeout (CancelledError): a half-read connection can't be reused
+                if not (done and keep_alive):
+                    writer.close()
+            if keep_alive:
+                pool.idle.append((reader, writer))
+            return status, headers, body
+
+    async def fetch(self, url):
+        """GET with ETag revalidation; a 304 is answered from the cache."""
+        start = time.perf_counter()
+        parts = urlsplit(url)
+        scheme = parts.scheme or "http"
+        port = parts.port or (443 if scheme == "https" else 80)
+        key = (scheme, parts.hostname, port)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+
+        cached = self.cache.get(cache_key(url))
+        lines = [f"GET {path} HTTP/1.1", f"Host: {parts.netloc}", f"User-Agent: {USER_AGENT}",
+                 "Accept-Encoding: identity", "Connection: keep-alive"]
+        if cached and cached[0]:
+            lines.append(f"If-None-Match: {cached[0]}")
+        request = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+        pool = self._pool(key)
+        # wait for this host's rate limit before taking a global slot, so a
+        # throttled host doesn't hold slots other hosts could be using
+        await pool.bucket.acquire()
+        async with self.limit:
+            async with pool.slots:
+                self.stats["requests"] += 1
+                try:
+                    status, headers, body = await asyncio.wait_for(self._send(pool, key, request), self.timeout)
+                except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+                    self.stats["errors"] += 1
+                    raise
+
+        if status == 304 and cached:
+            self.stats["cache_hits"] += 1
+            return Response(url, cached[1], cached[2], True, time.perf_counter() - start)
+        if status == 200 and headers.get("etag"):
+            self.cache.put(cache_key(url), headers["etag"], status, body)
+        return Response(url, status, body, False, time.perf_counter() - start)
+
+    async def fetch_all(self, urls):
+        """Responses (or exceptions) in the order given; duplicate URLs are fetched once."""
+        unique = list(dict.fromkeys(urls))
+        results = await asyncio.gather(*(self.fetch(u) for u in unique), return_exceptions=True)
+        by_url = dict(zip(unique, results))
+        return [by_url[u] for u in urls]
+
+def cache_key(url):
+    """The URL without its port (and fragment): what the response cache is keyed on."""
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme or "http", parts.hostname or "", parts.path or "/", parts.query, ""))
+
+# -----------------------------
+# Pipeline stage
+# -----------------------------
+def page_url(page, base=BASE_URL):
+    return urljoin(base, page)
+
+def backlinks_url(keyword, base=BASE_URL):
+    return urljoin(base, f"{BACKLINKS_PATH}?keyword={quote(str(keyword))}")
+
+def performance_url(page, base=BASE_URL):
+    return urljoin(base, f"{PERFORMANCE_PATH}?page={quote(str(page))}")
+
+def as_json(result):
+    """Decoded JSON of a 200 response; the exception (or a FetchError) otherwise."""
+    if isinstance(result, Exception):
+        return result
+    if result.status != 200:
+        return FetchError(f"{result.url}: HTTP {result.status}")
+    try:
+        return result.json()
+    except ValueError as e:     # includes UnicodeDecodeError
+        return FetchError(f"{result.url}: not JSON ({e})")
+
+async def fetch_stage(pages, keywords, base=BASE_URL, **fetcher_kwargs):
+    """
+    Crawls every unique page, its performance report and the backlinks of
+    every unique keyword concurrently. Returns
+    {"pages": {page: Response}, "performance": {page: dict}, "backlinks": {keyword: dict}, "stats"}.
+    Failed requests map to the exception instead (see as_json).
+    """
+    pages = list(dict.fromkeys(pages))
+    keywords = list(dict.fromkeys(keywords))
+    urls = ([page_url(p, base) for p in pages] + [performance_url(p, base) for p in pages]
+            + [backlinks_url(k, base) for k in keywords])
+    async with Fetcher(**fetcher_kwargs) as fetcher:
+        results = await fetcher.fetch_all(urls)
+        stats = dict(fetcher.stats)
+
+    n = len(pages)
+    return {
+        "pages": dict(zip(pages, results[:n])),
+        "performance": {p: as_json(r) for p, r in zip(pages, results[n:2 * n])},
+        "backlinks": {k: as_json(r) for k, r in zip(keywords, results[2 * n:])},
+        "stats": stats,
+    }
+
+def run_fetch_stage(pages, keywords, base=BASE_URL, **fetcher_kwargs):
+    return asyncio.run(fetch_stage(pages, keywords, base, **fetcher_kwargs))
+
+# -----------------------------
+# Local stand-in server
+# -----------------------------
+class StandInServer:
+    """
+    Keep-alive HTTP/1.1 server on its own thread/event loop. Serves any page
+    path, /api/backlinks?keyword= and /api/performance?page=, with strong
+    ETags and 304s. latency adds a fixed delay per response.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0):
+        self.host, self.port, self.latency = host, port, latency
+        self.requests = 0
+        self._ready = threading.Event()
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}/"
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def __exit__(self, *exc):
+        self._loop.call_soon_threadsafe(self._stop.set)
+        self._thread.join()
+        return False
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        self._loop.run_until_complete(self._serve())
+        self._loop.close()
+
+    async def _serve(self):
+        self._stop = asyncio.Event()
+        self._writers = set()
+        server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = server.sockets[0].getsockname()[1]
+        self._ready.set()
+        async with server:
+            await self._stop.wait()
+        # handlers still waiting on a keep-alive client see EOF and return
+        for writer in list(self._writers):
+            writer.close()
+        await asyncio.gather(*(t for t in asyncio.all_tasks() if t is not asyncio.current_task()),
+                             return_exceptions=True)
+
+    @staticmethod
+    def _route(target):
+        parts = urlsplit(target)
+        query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        seed = int(hashlib.md5(target.encode("utf-8")).hexdigest()[:8], 16)
+        if parts.path == "/" + BACKLINKS_PATH:
+            body = json.dumps({"keyword": query.get("keyword", ""), "backlinks": seed % 5000,
+                               "referring_domains": seed % 700})
+            return 200, "application/json", body.encode()
+        if parts.path == "/" + PERFORMANCE_PATH:
+            body = json.dumps({"page": query.get("page", ""), "lcp_ms": 800 + seed % 3000,
+                               "cls": round((seed % 250) / 1000, 3), "ttfb_ms": 50 + seed % 400})
+            return 200, "application/json", body.encode()
+        links = "".join(f'<a href="/page{(seed + i) % 1000}.html">related {i}</a>' for i in range(10))
+        body = f"<html><head><title>{parts.path}</title></head><body>{links}{'x' * 2048}</body></html>"
+        return 200, "text/html", body.encode()
+
+    async def _handle(self, reader, writer):
+        self._writers.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                target = line.decode("latin-1").split(" ")[1]
+                headers = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = h.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                self.requests += 1
+
+                status, ctype, body = self._route(target)
+                etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+                if headers.get("if-none-match") == etag:
+                    status, body = 304, b""
+                reason = HTTPStatus(status).phrase
+                head = (f"HTTP/1.1 {status} {reason}\r\nContent-Type: {ctype}\r\nContent-Length: {len(body)}\r\n"
+                        f"ETag: {etag}\r\nConnection: keep-alive\r\n\r\n")
+                writer.write(head.encode("latin-1") + body)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, IndexError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+# -----------------------------
+# Benchmark
+# -----------------------------
+def benchmark(pages=2_000, concurrency=CONCURRENCY, latency=0.005, cache_dir=None):
+    """Cold run (200s) then warm run (304 revalidations) against a local stand-in."""
+    page_names = [f"page{i}.html" for i in range(pages)]
+    keywords = [f"keyword {i}" for i in range(pages)]
+    results = {}
+    with StandInServer(latency=latency) as server:
+        async def run_twice():
+            async with Fetcher(concurrency=concurrency, cache_dir=cache_dir) as fetcher:
+                urls = ([page_url(p, server.url) for p in page_names]
+                        + [performance_url(p, server.url) for p in page_names]
+                        + [backlinks_url(k, server.url) for k in keywords])
+                for run in ("cold", "warm"):
+                    start = time.perf_counter()
+                    responses = await fetcher.fetch_all(urls)
+                    seconds = time.perf_counter() - start
+                    errors = sum(isinstance(r, Exception) for r in responses)
+                    results[run] = {"requests": len(urls), "seconds": seconds,
+                                    "per_second": len(urls) / seconds, "errors": errors}
+                results["stats"] = dict(fetcher.stats)
+        asyncio.run(run_twice())
+    return results
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else CONCURRENCY
+    result = benchmark(pages, concurrency)
+    print(f"📊 {pages} pages (+ performance + backlinks), concurrency {concurrency}, 5 ms server latency")
+    for run in ("cold", "warm"):
+        r = result[run]
+        print(f"  {run:<5} {r['requests']} requests in {r['seconds']:.2f}s → {r['per_second']:.0f} req/s"
+              f" ({r['errors']} errors)")
+    s = result["stats"]
+    print(f"  connections opened: {s['connections']} | 304 cache hits: {s['cache_hits']}")
+
+if __name__ == "__main__":
+    main()
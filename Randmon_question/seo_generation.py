@@ -0,0 +1,166 @@
+"""
+Batched, cached meta-description generation for the SEO pipeline (modelexzm.py).
+
+- GPT-2 model + tokenizer loaded on first use (shared via seo_models) and reused
+- Prompts are generated in padded batches (left padding, pad = eos, so every
+  row continues from its own last token); misses are sorted by prompt length
+  first so a batch carries little padding
+- Outputs are cached by (keyword, settings) in an append-only JSONL file, so a
+  keyword is only generated again when the model or settings change
+- stream() takes any iterable of keywords and yields (keyword, description)
+  in input order, batch by batch, without holding the whole list
+- stats() reports descriptions per second spent in the model
+
+Throughput report on CPU:
+    python seo_generation.py [keywords] [batch sizes...]
+
+Requires: pip install torch transformers
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+
+# -----------------------------
+# Config
+# -----------------------------
+MODEL_NAME = "gpt2"
+CACHE_FILE = os.path.join(".seo_cache", "meta.jsonl")
+PROMPT = "SEO meta description for: '{keyword}'"
+MAX_NEW_TOKENS = 30       # the old max_length=40 minus a ~10 token prompt
+BATCH_SIZE = 16
+THREADS = None            # None = torch default (all cores)
+
+# -----------------------------
+# Generator
+# -----------------------------
+class MetaGenerator:
+    def __init__(self, model_name=MODEL_NAME, max_new_tokens=MAX_NEW_TOKENS, batch_size=BATCH_SIZE,
+                 prompt=PROMPT, cache_file=CACHE_FILE, threads=THREADS, model=None, tokenizer=None):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.threads = threads
+        self.model, self.tokenizer = model, tokenizer
+        # greedy decoding, as before: same keyword + settings -> same text, so caching is safe
+        self.settings = {"model": model_name, "prompt": prompt, "max_new_tokens": max_new_tokens,
+                         "do_sample": False}
+        self.cache_file = cache_file
+        self.cache = {}
+        self.generated = self.hits = 0
+        self.model_seconds = 0.0
+        if cache_file and os.path.exists(cache_file):
+            with open(cache_file, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue   # a torn last line from an interrupted run
+                    self.cache[entry["key"]] = entry["text"]
+
+    def key(self, keyword):
+        blob = json.dumps([keyword, self.settings], sort_keys=True)
+        return hashlib.sha1(blob.encode("utf-8")).hexdigest()
+
+    def _load_model(self):
+        if self.model is None:
+            from seo_models import gpt2   # shared, loaded once per process
+            self.model, self.tokenizer = gpt2(self.model_name, self.threads)
+        self.tokenizer.padding_side = "left"
+        self.tokenizer.pad_token = self.tokenizer.eos_token
+        return self.model, self.tokenizer
+
+    def _generate_batch(self, keywords):
+        import torch
+
+        model, tokenizer = self._load_model()
+        prompts = [self.settings["prompt"].format(keyword=k) for k in keywords]
+        inputs = tokenizer(prompts, return_tensors="pt", padding=True)
+        start = time.perf_counter()
+        with torch.inference_mode():
+            outputs = model.generate(**inputs, max_new_tokens=self.settings["max_new_tokens"],
+                                     do_sample=False, pad_token_id=tokenizer.eos_token_id)
+        self.model_seconds += time.perf_counter() - start
+        self.generated += len(keywords)
+        return tokenizer.batch_decode(outputs, skip_special_tokens=True)
+
+    def _store(self, entries):
+        if not self.cache_file:
+            return
+        os.makedirs(os.path.dirname(self.cache_file) or ".", exist_ok=True)
+        with open(self.cache_file, "a", encoding="utf-8") as f:
+            for key, text in entries:
+                f.write(json.dumps({"key": key, "text": text}) + "\n")
+
+    def generate(self, keywords):
+        """Descriptions for a list of keywords, in order; only cache misses hit the model."""
+        keywords = [str(k) for k in keywords]
+        keys = [self.key(k) for k in keywords]
+        missing = {}
+        for key, keyword in zip(keys, keywords):
+            if key not in self.cache and key not in missing:
+                missing[key] = keyword
+        self.hits += len(keys) - len(missing)
+
+        # similar prompt lengths together -> less padding per batch
+        todo = sorted(missing.items(), key=lambda item: len(item[1]))
+        for lo in range(0, len(todo), self.batch_size):
+            batch = todo[lo:lo + self.batch_size]
+            texts = self._generate_batch([keyword for _, keyword in batch])
+            entries = [(key, text) for (key, _), text in zip(batch, texts)]
+            self.cache.update(entries)
+            self._store(entries)
+        return [self.cache[k] for k in keys]
+
+    def stream(self, keywords):
+        """Yields (keyword, description) for any iterable, one batch in memory at a time."""
+        batch = []
+        for keyword in keywords:
+            batch.append(keyword)
+            if len(batch) == self.batch_size:
+                yield from zip(batch, self.generate(batch))
+                batch = []
+        if batch:
+            yield from zip(batch, self.generate(batch))
+
+    def stats(self):
+        return {
+            "generated": self.generated,
+            "cache_hits": self.hits,
+            "model_seconds": round(self.model_seconds, 3),
+            "per_second": self.generated / self.model_seconds if self.model_seconds else 0.0,
+        }
+
+# -----------------------------
+# Throughput report
+# -----------------------------
+def sample_keywords(n):
+    words = ["bridal", "designer", "luxury", "silk", "handmade", "vintage", "organic", "wedding",
+             "couture", "sarees", "boutique", "lehenga", "jewellery", "gowns", "shoes", "bags"]
+    return [f"{words[i % 16]} {words[(i // 16) % 16]} {i}" for i in range(n)]
+
+def throughput(n=64, batch_sizes=(1, 8, 16, 32)):
+    """{batch_size: descriptions/s} with caching off; the model is loaded once and shared."""
+    keywords = sample_keywords(n)
+    shared = MetaGenerator(cache_file=None)
+    shared._generate_batch(keywords[:1])          # weight load + warm-up, not timed
+    results = {}
+    for batch_size in batch_sizes:
+        gen = MetaGenerator(batch_size=batch_size, cache_file=None,
+                            model=shared.model, tokenizer=shared.tokenizer)
+        start = time.perf_counter()
+        for _ in gen.stream(keywords):
+            pass
+        results[batch_size] = n / (time.perf_counter() - start)
+    return results
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    batch_sizes = [int(b) for b in sys.argv[2:]] or [1, 8, 16, 32]
+    print(f"📊 {n} keywords, greedy, {MAX_NEW_TOKENS} new tokens, CPU")
+    for batch_size, rate in throughput(n, batch_sizes).items():
+        print(f"  batch {batch_size:<3} {rate:8.2f} descriptions/s")
+
+if __name__ == "__main__":
+    main()
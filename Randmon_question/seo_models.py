@@ -0,0 +1,193 @@
+"""
+Lazy, shared model loading for the SEO pipeline (modelexzm.py).
+
+- Importing this module (or seo_embeddings / seo_generation) loads nothing:
+  torch, sentence-transformers and transformers are imported on first use
+- sentence_model() / gpt2() / embedder() / generator() are lru_cache'd, so
+  every caller in the process shares one copy of the weights
+- A warm worker keeps both models loaded in a long-running process and serves
+  embed / generate requests over multiprocessing.connection (same pattern as
+  mt5_gateway.py), so short scripts skip the startup cost entirely
+- startup_profile() breaks cold start down into import, weight-load and
+  first-inference time (and a second inference, for comparison)
+
+Usage:
+    python seo_models.py serve [host:port]     # warm worker
+    python seo_models.py startup               # startup-time benchmark
+
+    client = WorkerClient()                    # from any other script
+    vectors = client.embed(["bridal couture"])
+
+Requires: pip install torch sentence-transformers transformers
+"""
+
+import os
+import sys
+import threading
+import time
+from functools import lru_cache
+from multiprocessing.connection import Client, Listener
+
+# -----------------------------
+# Config
+# -----------------------------
+EMBED_MODEL = "all-MiniLM-L6-v2"
+GEN_MODEL = "gpt2"
+THREADS = int(os.environ["SEO_THREADS"]) if os.environ.get("SEO_THREADS") else None
+HOST, PORT = "127.0.0.1", 6070
+AUTHKEY = b"seo-worker"
+
+# -----------------------------
+# Lazy getters
+# -----------------------------
+def _set_threads(threads):
+    if threads:
+        import torch
+        torch.set_num_threads(threads)
+
+@lru_cache(maxsize=None)
+def sentence_model(name=EMBED_MODEL, threads=THREADS):
+    _set_threads(threads)
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(name, device="cpu")
+
+@lru_cache(maxsize=None)
+def gpt2(name=GEN_MODEL, threads=THREADS):
+    """(model, tokenizer), tokenizer set up for left-padded batches."""
+    _set_threads(threads)
+    from transformers import GPT2LMHeadModel, GPT2Tokenizer
+    tokenizer = GPT2Tokenizer.from_pretrained(name)
+    tokenizer.padding_side = "left"
+    tokenizer.pad_token = tokenizer.eos_token
+    return GPT2LMHeadModel.from_pretrained(name).eval(), tokenizer
+
+@lru_cache(maxsize=None)
+def embedder():
+    from seo_embeddings import KeywordEmbedder
+    return KeywordEmbedder(threads=THREADS)
+
+@lru_cache(maxsize=None)
+def generator():
+    from seo_generation import MetaGenerator
+    return MetaGenerator(threads=THREADS)
+
+def warm():
+    """Loads both models and runs one tiny inference each (first-call kernels, caches)."""
+    embedder()._encode(["warm up"])
+    generator()._generate_batch(["warm up"])
+
+# -----------------------------
+# Warm worker
+# -----------------------------
+def parse_address(address):
+    if isinstance(address, tuple):
+        return address
+    host, _, port = str(address).rpartition(":")
+    return host or HOST, int(port)
+
+def serve(address=(HOST, PORT), authkey=AUTHKEY):
+    start = time.perf_counter()
+    warm()
+    print(f"✅ Models warm in {time.perf_counter() - start:.1f}s, serving on {address[0]}:{address[1]}")
+    lock = threading.Lock()   # one request on the models at a time
+    listener = Listener(address, authkey=authkey)
+    try:
+        while True:
+            conn = listener.accept()
+            threading.Thread(target=_handle, args=(conn, lock), daemon=True).start()
+    except KeyboardInterrupt:
+        print("🛑 Worker stopped")
+    finally:
+        listener.close()
+
+def _handle(conn, lock):
+    try:
+        while True:
+            op, *args = conn.recv()
+            try:
+                with lock:
+                    if op == "embed":
+                        result = embedder().embed(args[0])
+                    elif op == "generate":
+                        result = generator().generate(args[0])
+                    elif op == "stats":
+                        result = {"embed": embedder().stats(), "generate": generator().stats()}
+                    else:
+                        raise ValueError(f"unknown op {op!r}")
+                conn.send((True, result))
+            except Exception as e:
+                conn.send((False, f"{type(e).__name__}: {e}"))
+    except (EOFError, OSError):
+        pass
+    finally:
+        conn.close()
+
+class WorkerClient:
+    """embed() / generate() / stats() answered by a running `seo_models.py serve`."""
+
+    def __init__(self, address=(HOST, PORT), authkey=AUTHKEY):
+        self._conn = Client(parse_address(address), authkey=authkey)
+
+    def _call(self, *request):
+        self._conn.send(request)
+        ok, result = self._conn.recv()
+        if not ok:
+            raise RuntimeError(result)
+        return result
+
+    def embed(self, keywords):
+        return self._call("embed", [str(k) for k in keywords])
+
+    def generate(self, keywords):
+        return self._call("generate", [str(k) for k in keywords])
+
+    def stats(self):
+        return self._call("stats")
+
+    def close(self):
+        self._conn.close()
+
+# -----------------------------
+# Startup benchmark
+# -----------------------------
+def _timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+def startup_profile():
+    """Seconds per cold-start step; run it in a fresh interpreter (see main)."""
+    from seo_embeddings import KeywordEmbedder
+    from seo_generation import MetaGenerator
+
+    # _encode / _generate_batch skip the disk caches, so every call reaches the model
+    emb = KeywordEmbedder(threads=THREADS)
+    gen = MetaGenerator(cache_file=None, threads=THREADS)
+    steps = {
+        "import torch": _timed(lambda: __import__("torch")),
+        "import sentence_transformers": _timed(lambda: __import__("sentence_transformers")),
+        "import transformers": _timed(lambda: __import__("transformers")),
+        "load MiniLM weights": _timed(lambda: sentence_model(EMBED_MODEL, THREADS)),
+        "load GPT-2 weights": _timed(lambda: gpt2(GEN_MODEL, THREADS)),
+        "first embed": _timed(lambda: emb._encode(["bridal couture"])),
+        "second embed": _timed(lambda: emb._encode(["designer sarees"])),
+        "first generate": _timed(lambda: gen._generate_batch(["bridal couture"])),
+        "second generate": _timed(lambda: gen._generate_batch(["designer sarees"])),
+    }
+    return steps
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else "startup"
+    if command == "serve":
+        serve(parse_address(sys.argv[2]) if len(sys.argv) > 2 else (HOST, PORT))
+    elif command == "startup":
+        steps = startup_profile()
+        print("📊 SEO pipeline cold start")
+        for name, seconds in steps.items():
+            print(f"  {name:<30} {seconds:8.3f}s")
+        print(f"  {'total':<30} {sum(steps.values()):8.3f}s")
+    else:
+        print("Usage: python seo_models.py [serve [host:port] | startup]")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+import json
+import sys
+
+from product_benchmark import generate_csv, main
+
+
+def test_compare_runs_both_pipelines_on_a_small_csv(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / "tiny.csv"
+    generate_csv(str(path), 300)
+    monkeypatch.setattr(sys, "argv", ["product_benchmark.py", str(path), "--compare"])
+    main()
+
+    bench = tmp_path / "benchmarks"
+    assert (bench / "export_baseline" / "clustered_products.csv").exists()
+    assert json.loads((bench / "export_lean" / "manifest.json").read_text())["rows"] == 300
+
+    [report] = bench.glob("product_bench_*.json")
+    run = json.loads(report.read_text())["runs"]["tiny.csv"]
+    assert {"load", "encode", "scale", "elbow", "kmeans", "write"} <= set(run["lean"]["stages"])
+    assert run["peak_ratio"] > 0 and "working_ratio" in run
@@ -0,0 +1,38 @@
+import json
+import os
+
+import numpy as np
+
+from product_cache import file_digest, load_or_build, load_scaled
+
+CSV = """Product ID, Product Title, Merchant ID, Cluster ID, Cluster Label, Category ID, Category Label
+1, apple iphone, 10, 100, iphone, 2612, Mobile Phones
+2, apple iphone case, 11, 101, iphone case, 2612, Mobile Phones
+3, samsung tv, 12, 102, samsung tv, 2614, TVs
+4, lg tv, 13, 103, lg tv, 2614, TVs
+"""
+
+
+def test_scaled_matrix_is_mapped_read_only_unless_asked(tmp_path):
+    path = tmp_path / "products.csv"
+    path.write_text(CSV)
+    entry = load_or_build(str(path), cache_dir=str(tmp_path / "cache"))
+
+    mapped = load_scaled(entry)
+    assert isinstance(mapped, np.memmap) and not mapped.flags.writeable
+    owned = load_scaled(entry, writable=True)
+    assert not isinstance(owned, np.memmap) and owned.flags.writeable and owned.flags.c_contiguous
+    assert np.array_equal(mapped, owned) and owned.shape == (4, 7)
+
+
+def test_hash_memo_is_replaced_whole(tmp_path):
+    path = tmp_path / "products.csv"
+    path.write_text(CSV)
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    (cache_dir / "hashes.json").write_text('{"half": ')     # a writer killed mid-dump
+
+    digest = file_digest(str(path), str(cache_dir))
+    assert os.listdir(cache_dir) == ["hashes.json"]
+    memo = json.loads((cache_dir / "hashes.json").read_text())
+    assert memo[os.path.abspath(path)]["sha256"] == digest
@@ -0,0 +1,47 @@
+import pandas as pd
+
+from product_ingest import DTYPES
+from product_incremental import update_clusters
+from product_model import fingerprint_file, save_model
+from product_stream import stream_cluster
+
+HEADER = "Product ID, Product Title, Merchant ID, Cluster ID, Cluster Label, Category ID, Category Label\n"
+OLD = [
+    "1, apple iphone, 10, 100, iphone, 2612, Mobile Phones",
+    "2, apple iphone case, 11, 101, iphone case, 2612, Mobile Phones",
+    "3, samsung tv, 12, 102, samsung tv, 2614, TVs",
+    "4, lg tv, 13, 103, lg tv, 2614, TVs",
+]
+NEW = [
+    OLD[0],
+    "2, apple iphone case, 11, 101, iphone case, 2612, Mobile Phones Accessories",   # changed
+    OLD[2],                                                                          # 4 removed
+    "9007199254740993, sony tv, 14, 104, sony tv, 2614, TVs",                        # added, > 2^53
+]
+
+
+def write(path, rows):
+    path.write_text(HEADER + "\n".join(rows) + "\n")
+    return str(path)
+
+
+def test_delta_round_trips_ids_exactly(tmp_path):
+    old = write(tmp_path / "old.csv", OLD)
+    model_dir = str(tmp_path / "model")
+    fit = stream_cluster(old, 2, output_file=str(tmp_path / "clustered.csv"))
+    ids, hashes = fingerprint_file(old)
+    labels = pd.read_csv(tmp_path / "clustered.csv")["Cluster"].to_numpy()
+    save_model(model_dir, fit["kmeans"].cluster_centers_, fit["scaler"], fit["encoder"],
+               list(DTYPES), ids, hashes, labels)
+
+    delta_file = str(tmp_path / "delta.csv")
+    result = update_clusters(write(tmp_path / "new.csv", NEW), model_dir, delta_file)
+    assert (result["added"], result["changed"], result["removed"]) == (1, 1, 1)
+
+    delta = pd.read_csv(delta_file, dtype={"Product ID": "Int64", "Merchant ID": "Int64"})
+    assert dict(zip(delta["Product ID"], delta["Change"])) == {
+        2: "changed", 9007199254740993: "added", 4: "removed"}
+    assert delta.loc[delta["Change"] != "removed", "Merchant ID"].tolist() == [11, 14]
+    with open(delta_file) as f:
+        text = f.read()
+    assert "9007199254740993," in text and ".0," not in text
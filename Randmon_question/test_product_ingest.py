@@ -0,0 +1,24 @@
+import numpy as np
+
+from product_ingest import build_feature_matrix, iter_chunks
+
+CSV = """Product ID, Product Title, Merchant ID, Cluster ID, Cluster Label, Category ID, Category Label, Colour, Price
+1, apple iphone, 10, 100, iphone, 2612, Mobile Phones, black, 599.5
+2, apple iphone case, 11, 101, iphone case, 2612, Mobile Phones, red, 19.99
+3, samsung tv, 12, 102, samsung tv, 2614, TVs, black, 899.0
+"""
+
+
+def test_unknown_columns_are_inferred(tmp_path):
+    path = tmp_path / "products.csv"
+    path.write_text(CSV)
+    chunk = next(iter_chunks(str(path)))
+    assert chunk["Colour"].dtype == "category"
+    assert chunk["Price"].dtype == np.float32
+
+    features, ids, columns, encoder, rows_read, rows_kept = build_feature_matrix(str(path))
+    assert rows_kept == 3
+    colour = features[:, columns.index("Colour")]
+    assert colour[0] == colour[2] != colour[1]
+    assert encoder.decode("Colour", colour.astype(np.int64)).tolist() == ["black", "red", "black"]
+    assert np.allclose(features[:, columns.index("Price")], [599.5, 19.99, 899.0])
@@ -0,0 +1,21 @@
+import pytest
+
+from product_stream import stream_cluster
+
+CSV = """Product ID, Product Title, Merchant ID, Cluster ID, Cluster Label, Category ID, Category Label
+1, apple iphone, 10, 100, iphone, 2612, Mobile Phones
+2, apple iphone case, 11, 101, iphone case, 2612, Mobile Phones
+3, samsung tv, , 102, samsung tv, 2614, TVs
+"""
+
+
+def test_fewer_rows_than_clusters_is_a_clear_error(tmp_path):
+    path = tmp_path / "products.csv"
+    path.write_text(CSV)
+    output = tmp_path / "clustered.csv"
+    with pytest.raises(ValueError, match="2 rows .* fewer than k=3"):
+        stream_cluster(str(path), 3, output_file=str(output))
+    assert not output.exists()
+
+    result = stream_cluster(str(path), 2, output_file=str(output))
+    assert result["rows"] == 2 and sorted(result["counts"]) == [1, 1]
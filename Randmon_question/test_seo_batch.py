@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+from seo_batch import run_batch
+
+
+class FakeEmbedder:
+    def __init__(self):
+        self.seen = []
+
+    def embed(self, keywords):
+        self.seen.extend(keywords)
+        vectors = np.array([[len(k), sum(map(ord, k)) % 7, 1.0] for k in keywords], dtype=np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+class FakeGenerator:
+    def generate(self, keywords):
+        return [f"meta for {k}" for k in keywords]
+
+
+def fake_fetch(pages, keywords):
+    return {"performance": {p: {"lcp_ms": 1000.0} for p in pages},
+            "backlinks": {k: {"backlinks": len(k)} for k in keywords},
+            "stats": {}}
+
+
+def frame_with_gaps():
+    return pd.DataFrame({
+        "keyword": ["shoes", "boots", None, "shoes", "socks", np.nan, "boots", "hats"],
+        "page_url": ["/a", "/a", "/b", None, "/b", "/c", "/c", "/a"],
+    })
+
+
+def test_missing_keys_get_no_results():
+    embedder = FakeEmbedder()
+    out, timings = run_batch(frame_with_gaps(), embedder, FakeGenerator(), fake_fetch, scope=None)
+    no_kw = out["keyword"].isna()
+    no_url = out["page_url"].isna()
+    assert out.loc[no_kw | no_url, "score"].isna().all()
+    assert out.loc[~(no_kw | no_url), "score"].notna().all()
+    assert out.loc[no_kw, "meta"].isna().all() and out.loc[no_kw, "backlinks"].isna().all()
+    assert out.loc[no_url, "lcp_ms"].isna().all()
+    assert out.loc[~no_kw, "meta"].tolist() == [f"meta for {k}" for k in out.loc[~no_kw, "keyword"]]
+    assert sorted(embedder.seen) == ["boots", "hats", "shoes", "socks"]
+    assert timings["unique_keywords"] == 4 and timings["unique_urls"] == 3
+
+
+def test_models_only_see_the_train_split_by_default():
+    frame = pd.DataFrame({"keyword": [f"kw {i}" for i in range(40)],
+                          "page_url": [f"/p{i % 5}" for i in range(40)]})
+    embedder = FakeEmbedder()
+    out, _ = run_batch(frame, embedder, FakeGenerator(), fake_fetch)
+    train = out["split"] == "train"
+    assert sorted(embedder.seen) == sorted(out.loc[train, "keyword"])
+    assert out.loc[train, "score"].notna().all() and out.loc[~train, "score"].isna().all()
+    assert out.loc[~train, "meta"].isna().all() and out.loc[~train, "lcp_ms"].isna().all()
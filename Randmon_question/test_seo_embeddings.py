@@ -0,0 +1,24 @@
+import numpy as np
+
+from seo_embeddings import KeywordEmbedder
+
+
+class FakeModel:
+    def encode(self, texts, **kwargs):
+        vectors = np.array([[len(t), sum(map(ord, t)) % 11, 1.0] for t in texts], dtype=np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_two_embedders_on_one_cache_keep_rows_aligned(tmp_path):
+    first = KeywordEmbedder(cache_dir=str(tmp_path), model=FakeModel())
+    second = KeywordEmbedder(cache_dir=str(tmp_path), model=FakeModel())   # opened before first appends
+    first.embed(["shoes", "boots"])
+    second.embed(["socks", "shoes"])
+
+    words = ["shoes", "boots", "socks"]
+    expected = FakeModel().encode(words)
+    fresh = KeywordEmbedder(cache_dir=str(tmp_path), model=FakeModel())
+    assert len(fresh) == 3
+    for embedder in (fresh, second):
+        assert np.allclose(embedder.embed(words), expected)
+    assert fresh.stats()["misses"] == 0
@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+import seo_fetch
+from seo_fetch import FetchError, Fetcher, StandInServer, cache_key, run_fetch_stage
+
+
+class HtmlEverywhere(StandInServer):
+    """A base URL that answers every endpoint with a web page."""
+
+    @staticmethod
+    def _route(target):
+        return 200, "text/html", b"<html><body>not an API</body></html>"
+
+
+class Overloaded(StandInServer):
+    @staticmethod
+    def _route(target):
+        return 503, "text/plain", b"try later"
+
+
+def test_non_json_base_url_maps_to_errors():
+    with HtmlEverywhere() as server:
+        result = run_fetch_stage(["a.html", "b.html"], ["shoes"], server.url, cache_dir=None)
+    assert [r.status for r in result["pages"].values()] == [200, 200]
+    assert all(isinstance(r, FetchError) for r in result["performance"].values())
+    assert isinstance(result["backlinks"]["shoes"], FetchError)
+
+
+def test_non_200_responses_map_to_errors():
+    with Overloaded() as server:
+        result = run_fetch_stage(["a.html"], ["shoes"], server.url, cache_dir=None)
+    assert "HTTP 503" in str(result["performance"]["a.html"])
+    assert "HTTP 503" in str(result["backlinks"]["shoes"])
+
+
+def test_timed_out_connection_is_closed(monkeypatch):
+    writers = []
+    open_connection = asyncio.open_connection
+
+    async def spy(*args, **kwargs):
+        reader, writer = await open_connection(*args, **kwargs)
+        writers.append(writer)
+        return reader, writer
+
+    monkeypatch.setattr(seo_fetch.asyncio, "open_connection", spy)
+
+    async def run(url):
+        async with Fetcher(timeout=0.05, cache_dir=None) as fetcher:
+            with pytest.raises(asyncio.TimeoutError):
+                await fetcher.fetch(url)
+            assert writers and all(w.is_closing() for w in writers)
+            assert not fetcher.pools[("http", "127.0.0.1", int(url.split(":")[2].rstrip("/")))].idle
+
+    with StandInServer(latency=0.5) as server:
+        asyncio.run(run(server.url))
+
+
+def test_cache_survives_a_new_stand_in_port(tmp_path):
+    cache_dir = str(tmp_path / "http")
+    for expect_cached in (False, True):
+        with StandInServer() as server:
+            result = run_fetch_stage(["a.html"], [], server.url, cache_dir=cache_dir)
+        assert result["pages"]["a.html"].from_cache is expect_cached
+    assert cache_key("http://127.0.0.1:8765/a.html") == cache_key("http://127.0.0.1:9999/a.html")
+
+
+def test_throttled_host_does_not_hold_the_global_limit():
+    async def run(slow, fast):
+        async with Fetcher(concurrency=1, host_rate=2, host_burst=1, cache_dir=None) as fetcher:
+            return await asyncio.gather(fetcher.fetch(slow + "a.html"), fetcher.fetch(slow + "b.html"),
+                                        fetcher.fetch(fast + "a.html"))
+
+    with StandInServer() as slow, StandInServer() as fast:
+        first, second, other = asyncio.run(run(slow.url, fast.url))
+    assert [r.status for r in (first, second, other)] == [200, 200, 200]
+    assert second.seconds >= 0.4       # waited for a token on its own host
+    assert other.seconds < 0.3         # the other host didn't wait behind it
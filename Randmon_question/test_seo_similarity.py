@@ -0,0 +1,53 @@
+import numpy as np
+
+from seo_similarity import ExactIndex, IVFIndex, KeywordIndex, synthetic_vectors
+
+
+def test_all_top_k_clamps_k_on_a_small_corpus():
+    vectors = synthetic_vectors(3, dim=8, topics=2)
+    scores, ids = KeywordIndex(["a", "b", "c"], vectors).all_top_k(k=10)
+    assert scores.shape == ids.shape == (3, 2)
+    assert not (ids == np.arange(3)[:, None]).any()
+
+
+def test_all_top_k_of_a_single_keyword_is_empty():
+    scores, ids = KeywordIndex(["a"], synthetic_vectors(1, dim=8, topics=1)).all_top_k(k=5)
+    assert ids.shape == (1, 0)
+
+
+def test_all_top_k_through_ivf_on_a_small_corpus():
+    vectors = synthetic_vectors(6, dim=8, topics=3)
+    index = KeywordIndex(list("abcdef"), vectors, exact_below=0, nlist=2, nprobe=2)
+    assert isinstance(index.index, IVFIndex)
+    scores, ids = index.all_top_k(k=10)
+    assert ids.shape == (6, 5)
+    assert (ids >= 0).all() and not (ids == np.arange(6)[:, None]).any()
+
+
+def test_ivf_probing_every_list_matches_exact_search():
+    data = synthetic_vectors(2_000, dim=16, topics=20)
+    queries = data[:300]
+    _, truth = ExactIndex(data).search(queries, 5)
+    ivf = IVFIndex(data, nlist=10)
+    scores, found = ivf.search(queries, 5, nprobe=10)
+    assert (found == truth).all()
+    assert (np.diff(scores, axis=1) <= 0).all()
+
+
+def test_ivf_pads_missing_results():
+    ivf = IVFIndex(synthetic_vectors(4, dim=8, topics=2), nlist=2)
+    scores, ids = ivf.search(synthetic_vectors(2, dim=8, topics=2, seed=1), 10, nprobe=1)
+    assert ids.shape == (2, 10)
+    assert ((ids == -1) == np.isinf(scores)).all()
+
+
+def test_recall_grows_with_nprobe():
+    data = synthetic_vectors(5_000, dim=64, topics=200, groups=10)
+    queries = data[:300]
+    _, truth = ExactIndex(data).search(queries, 10)
+    ivf = IVFIndex(data, nlist=50)
+    recall = []
+    for nprobe in (1, 4, 50):
+        _, found = ivf.search(queries, 10, nprobe=nprobe)
+        recall.append(np.mean([len(np.intersect1d(a, b)) / 10 for a, b in zip(found, truth)]))
+    assert recall[0] < 0.8 and recall[0] < recall[1] < recall[2] == 1.0
@@ -0,0 +1,91 @@
+import queue
+import threading
+
+import pytest
+
+from whatsappmessage import MessageIndex, MessageStore, scan_lines
+
+
+@pytest.fixture
+def open_store(tmp_path):
+    stores = []
+
+    def open_store(data):
+        path = tmp_path / "messages.txt"
+        path.write_bytes(data)
+        stores.append(MessageStore(str(path)))
+        return stores[-1]
+
+    yield open_store
+    for store in stores:
+        store.close()
+
+
+def drain(out):
+    items = []
+    while not out.empty():
+        items.append(out.get())
+    return items
+
+
+def test_scan_lines_batches_non_empty_lines(open_store):
+    store = open_store(b"\xef\xbb\xbfapple pie\r\n\r\n  \nbanana split\nApple crumble\r\ncherry")
+    out = queue.Queue()
+    scan_lines(store, threading.Event(), out, batch=2)
+    *batches, done = drain(out)
+
+    assert done == ("done", 4, False)
+    assert [len(b[1]) for b in batches] == [2, 2, 0]    # the last one only reports progress
+    assert batches[-1][3] == store.size
+    for _, starts, ends, _, _ in batches:
+        store.extend(starts, ends)
+    assert store[:] == ["apple pie", "banana split", "Apple crumble", "cherry"]
+    assert batches[0][4]["apple"] == [0] and batches[1][4]["apple"] == [2]
+
+
+def test_scan_lines_stops_when_cancelled(open_store):
+    store = open_store(b"".join(b"line %d\n" % i for i in range(10)))
+    cancel = threading.Event()
+
+    class CancelAfterFirstBatch(queue.Queue):
+        def put(self, item, *args, **kwargs):
+            super().put(item, *args, **kwargs)
+            cancel.set()
+
+    out = CancelAfterFirstBatch()
+    scan_lines(store, cancel, out, batch=3)
+    items = drain(out)
+    assert [item[0] for item in items] == ["batch", "batch", "done"]
+    assert items[-1] == ("done", 3, False)
+
+
+@pytest.mark.parametrize("data, truncated", [
+    (b"a\nb\n", False),
+    (b"a\nb\n\n  \r\n\n", False),     # only blank lines after the limit
+    (b"a\nb\n\nc\n", True),
+    (b"a\nb\nc", True),
+])
+def test_scan_lines_truncated_flag(open_store, data, truncated):
+    out = queue.Queue()
+    scan_lines(open_store(data), threading.Event(), out, limit=2)
+    assert drain(out)[-1] == ("done", 2, truncated)
+
+
+def test_search_across_merged_batches(open_store):
+    store = open_store(b"apple pie\nbanana split\napplesauce cake\nbanana bread\npineapple cake\n")
+    out = queue.Queue()
+    scan_lines(store, threading.Event(), out, batch=2)
+    index = MessageIndex()
+    for item in drain(out)[:-1]:
+        index.add(item[4])
+        if index.version == 1:
+            assert index.search("apple") == [0]
+            assert index.search("bread") == []
+
+    assert index.version == 3
+    assert index.search("apple") == [0, 2]                      # prefix: not pineapple
+    assert index.search("apple", substring=True) == [0, 2, 4]
+    assert index.search("ban") == [1, 3]
+    assert index.search("cake apple") == [2]
+    assert index.search("nana", substring=True) == [1, 3]
+    assert index.search("nana") == []
@@ -5,23 +5,256 @@ Load a list of messages (one per line) or auto-generate.
 Click "Copy Next" to copy the next message to clipboard.
 Then switch to WhatsApp group and press Ctrl+V, Enter to send manually.
 
+The list view is virtualized: only the rows that fit in the window are in the
+Text widget (one line per message, a horizontal scrollbar for long ones), and
+moving the "→" marker rewrites two lines in place, so stepping through 100k+
+messages stays instant.
+
+Files are loaded on a background thread: it scans the memory-mapped file for
+line offsets and hands batches to the UI through root.after polling (with a
+progress readout and a Cancel button). Messages are kept as a MessageStore of
+(start, end) byte offsets into the mapped file, decoded only when shown or copied.
+
+Dispatch mode copies a range of messages to the clipboard one by one on a fixed
+interval from a background thread (a bell rings on each copy), skipping
+messages whose text was already dispatched (hash set). It still only fills the
+clipboard: you paste and press Enter in WhatsApp yourself.
+
+The search box is backed by an inverted index (token -> message ids) that grows
+with every loaded batch; the loader thread tokenizes (files and pasted /
+generated lists alike), the UI only merges. Terms
+match as prefixes (bisect over the sorted vocabulary) or, with "substring"
+ticked, anywhere inside a token; "Find next" jumps the marker to the next hit.
+
 Requires: pip install pyperclip
 """
 
 import tkinter as tk
+import tkinter.font as tkfont
 from tkinter import filedialog, messagebox, simpledialog
 import pyperclip
 import os
+import mmap
+import queue
+import threading
+import time
+import hashlib
+import heapq
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+
+MAX_MESSAGES = 1_000_000
+HEADER_LINES = 2        # header text + blank line above the message rows
+MARK, NO_MARK = "→ ", "  "
+LOAD_BATCH = 50_000     # line offsets per batch handed to the UI
+POLL_MS = 50            # how often the UI drains the loader / dispatch queues
+DISPATCH_INTERVAL = 5.0 # default seconds between clipboard copies in dispatch mode
+TOKEN_RE = re.compile(r"\w+")
+NON_BLANK_RE = re.compile(rb"\S")     # same whitespace as bytes.strip()
+
+
+class MessageStore:
+    """Messages as (start, end) byte offsets into a memory-mapped UTF-8 file."""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+        self.size = os.fstat(self.file.fileno()).st_size
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b""
+        self.starts = array("Q")
+        self.ends = array("Q")
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        return self.mm[self.starts[i]:self.ends[i]].decode("utf-8", "replace")
+
+    def extend(self, starts, ends):
+        self.starts.extend(starts)
+        self.ends.extend(ends)
+
+    def close(self):
+        if self.size:
+            self.mm.close()
+        self.file.close()
+
+
+def tokenize_batch(texts, first_id):
+    """{token: [message ids]} for consecutive messages starting at first_id."""
+    partial = {}
+    for i, text in enumerate(texts, first_id):
+        for token in set(TOKEN_RE.findall(text.lower())):
+            partial.setdefault(token, []).append(i)
+    return partial
+
+
+class MessageIndex:
+    """Inverted index token -> message ids (ascending), grown batch by batch."""
+
+    def __init__(self):
+        self.postings = {}
+        self.vocab = []          # sorted tokens
+        self.new_tokens = []     # added since vocab was last sorted
+        self.version = 0         # batches merged so far (cached search hits are per version)
+        self.blob = None         # "\n".join(vocab) for substring scans
+        self.blob_starts = array("I")
+
+    def add(self, partial):
+        self.version += 1
+        for token, ids in partial.items():
+            ids_so_far = self.postings.get(token)
+            if ids_so_far is None:
+                self.postings[token] = array("I", ids)
+                self.new_tokens.append(token)
+            else:
+                ids_so_far.extend(ids)
+
+    def _refresh_vocab(self):
+        if self.new_tokens:
+            self.vocab = list(heapq.merge(self.vocab, sorted(self.new_tokens)))
+            self.new_tokens = []
+            self.blob = None
+
+    def tokens_with_prefix(self, prefix):
+        self._refresh_vocab()
+        lo = bisect_left(self.vocab, prefix)
+        hi = bisect_left(self.vocab, prefix + "\U0010ffff")
+        return self.vocab[lo:hi]
+
+    def tokens_containing(self, part):
+        self._refresh_vocab()
+        if self.blob is None:
+            self.blob = "\n".join(self.vocab)
+            self.blob_starts = array("I")
+            pos = 0
+            for token in self.vocab:
+                self.blob_starts.append(pos)
+                pos += len(token) + 1
+        found = []
+        pos = self.blob.find(part)
+        while pos >= 0:
+            i = bisect_right(self.blob_starts, pos) - 1
+            found.append(self.vocab[i])
+            pos = self.blob.find(part, self.blob_starts[i] + len(self.vocab[i]) + 1)   # next token
+        return found
+
+    def search(self, query, substring=False):
+        """Sorted ids of messages matching every term of the query."""
+        result = None
+        for term in TOKEN_RE.findall(query.lower()):
+            tokens = self.tokens_containing(term) if substring else self.tokens_with_prefix(term)
+            ids = set()
+            for token in tokens:
+                ids.update(self.postings[token])
+            result = ids if result is None else result & ids
+            if not result:
+                return []
+        return sorted(result) if result else []
 
-MAX_MESSAGES = 100
+
+def scan_lines(store, cancel, out, limit=MAX_MESSAGES, batch=LOAD_BATCH):
+    """
+    Worker thread: finds the non-empty lines of store's file and puts
+    ("batch", starts, ends, bytes_done, tokens) and finally ("done", count,
+    truncated) or ("error", text) on the queue. tokens is the batch's
+    tokenize_batch() result. Never touches Tk.
+    """
+    try:
+        mm, size = store.mm, store.size
+        pos = 3 if mm[:3] == b"\xef\xbb\xbf" else 0
+        starts, ends = array("Q"), array("Q")
+        count = 0
+        while pos < size and count < limit and not cancel.is_set():
+            nl = mm.find(b"\n", pos)
+            end = size if nl < 0 else nl
+            stop = end - 1 if end > pos and mm[end - 1] == 13 else end   # drop \r of \r\n
+            if mm[pos:stop].strip():
+                starts.append(pos)
+                ends.append(stop)
+                count += 1
+                if len(starts) >= batch:
+                    out.put(("batch", starts, ends, end, _batch_tokens(mm, starts, ends, count)))
+                    starts, ends = array("Q"), array("Q")
+            pos = end + 1
+        out.put(("batch", starts, ends, min(pos, size), _batch_tokens(mm, starts, ends, count)))
+        # only blank lines past the limit don't count as cut off
+        truncated = count >= limit and NON_BLANK_RE.search(mm, pos) is not None
+        out.put(("done", count, truncated))
+    except Exception as e:   # e.g. the file was closed by a newer load
+        out.put(("error", str(e)))
+
+
+def _batch_tokens(mm, starts, ends, count):
+    texts = (mm[s:e].decode("utf-8", "replace") for s, e in zip(starts, ends))
+    return tokenize_batch(texts, count - len(starts))
+
+
+def index_messages(messages, cancel, out, batch=LOAD_BATCH):
+    """
+    Worker thread: tokenizes an in-memory message list batch by batch and puts
+    ("tokens", messages_done, tokens) and finally ("done", count, False) or
+    ("error", text) on the queue. Never touches Tk.
+    """
+    try:
+        for lo in range(0, len(messages), batch):
+            if cancel.is_set():
+                break
+            hi = min(lo + batch, len(messages))
+            out.put(("tokens", hi, tokenize_batch(messages[lo:hi], lo)))
+        out.put(("done", len(messages), False))
+    except Exception as e:
+        out.put(("error", str(e)))
+
+
+def message_key(text):
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+
+
+def dispatch_range(messages, start, stop, interval, seen, cancel, out):
+    """
+    Worker thread: copies messages[start:stop] to the clipboard every `interval`
+    seconds, skipping texts already in `seen`. Puts ("copied", i), ("skipped", i)
+    and finally ("done",) or ("error", text) on the queue.
+    """
+    try:
+        for i in range(start, stop):
+            if cancel.is_set():
+                break
+            text = messages[i]
+            key = message_key(text)
+            if key in seen:
+                out.put(("skipped", i))
+                continue
+            seen.add(key)
+            pyperclip.copy(text)
+            out.put(("copied", i))
+            if cancel.wait(interval):
+                break
+        out.put(("done",))
+    except Exception as e:
+        out.put(("error", str(e)))
 
 class MessageHelper:
     def __init__(self, root):
         self.root = root
         root.title("Safe WhatsApp Message Helper")
-        root.geometry("600x420")
+        root.geometry("760x480")
         self.messages = []
         self.index = 0
+        self.top = 0            # first message shown in the view
+        self.shown = (0, 0)     # [start, end) of the messages currently in the Text widget
+        self.loader = None      # (cancel event, queue) while a file loads or a list is indexed
+        self.load_progress = 0.0
+        self.dispatcher = None  # (cancel event, queue) while dispatching
+        self.dispatched = set() # hashes of texts already dispatched
+        self.dispatch_stats = None
+        self.search_index = MessageIndex()
+        self.hits = []
+        self.hits_for = None    # (query, substring, index version) the hits were computed for
 
         # UI
         top_frame = tk.Frame(root, pady=10)
@@ -30,12 +263,38 @@ class MessageHelper:
         tk.Button(top_frame, text="Load from file", command=self.load_file).pack(side="left", padx=6)
         tk.Button(top_frame, text="Paste messages", command=self.paste_messages).pack(side="left", padx=6)
         tk.Button(top_frame, text="Generate sample 100", command=self.generate_sample).pack(side="left", padx=6)
+        tk.Button(top_frame, text="Cancel load", command=self.cancel_load).pack(side="left", padx=6)
+
+        search = tk.Frame(root)
+        search.pack(fill="x", padx=10)
+        tk.Label(search, text="Search:").pack(side="left")
+        self.search_var = tk.StringVar()
+        entry = tk.Entry(search, textvariable=self.search_var)
+        entry.pack(side="left", fill="x", expand=True, padx=6)
+        entry.bind("<Return>", lambda e: self.find_next())
+        self.substring_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(search, text="substring", variable=self.substring_var).pack(side="left")
+        tk.Button(search, text="Find next", command=self.find_next).pack(side="left", padx=6)
+        self.search_info = tk.StringVar()
+        tk.Label(search, textvariable=self.search_info, width=22, anchor="w").pack(side="left")
 
         mid = tk.Frame(root)
         mid.pack(fill="both", expand=True, padx=10, pady=8)
 
-        self.txt = tk.Text(mid, wrap="word")
+        self.scroll = tk.Scrollbar(mid, command=self.on_scroll)
+        self.scroll.pack(side="right", fill="y")
+        # rows stay one line each (the view is virtualized), so long messages scroll sideways
+        self.xscroll = tk.Scrollbar(mid, orient="horizontal")
+        self.xscroll.pack(side="bottom", fill="x")
+        self.txt = tk.Text(mid, wrap="none", xscrollcommand=self.xscroll.set)
         self.txt.pack(fill="both", expand=True)
+        self.xscroll.config(command=self.txt.xview)
+        self.line_height = tkfont.Font(font=self.txt["font"]).metrics("linespace")
+        self.txt.bind("<Configure>", lambda e: self.messages and self.render_window())
+        self.txt.bind("<MouseWheel>", lambda e: self.scroll_by(-1 if e.delta > 0 else 1, 3))
+        self.txt.bind("<Button-4>", lambda e: self.scroll_by(-1, 3))
+        self.txt.bind("<Button-5>", lambda e: self.scroll_by(1, 3))
+        self.txt.bind("<Shift-MouseWheel>", lambda e: self.txt.xview_scroll(-1 if e.delta > 0 else 1, "units") or "break")
 
         bottom = tk.Frame(root, pady=8)
         bottom.pack(fill="x")
@@ -47,6 +306,8 @@ class MessageHelper:
         tk.Button(bottom, text="Copy Prev ←", command=self.copy_prev, width=12).pack(side="left", padx=6)
         tk.Button(bottom, text="Reset", command=self.reset_list, width=8).pack(side="left", padx=6)
         tk.Button(bottom, text="Open folder", command=self.open_folder, width=10).pack(side="left", padx=6)
+        tk.Button(bottom, text="Dispatch…", command=self.start_dispatch, width=9).pack(side="left", padx=6)
+        tk.Button(bottom, text="Stop", command=self.stop_dispatch, width=5).pack(side="left", padx=6)
 
         tk.Label(bottom, textvariable=self.status_var).pack(side="right", padx=8)
 
@@ -58,10 +319,47 @@ class MessageHelper:
             "3. Switch to WhatsApp Desktop window, paste (Ctrl+V) and press Enter to send.\n\n"
             "This app DOES NOT send messages automatically — you send them manually to stay within rules."
         )
-        self.txt.insert("1.0", intro)
+        self.show_text(intro)
 
     def update_status(self):
-        self.status_var.set(f"Message {self.index}/{len(self.messages)} (max {MAX_MESSAGES})")
+        loading = ""
+        if self.loader:
+            verb = "loading" if isinstance(self.messages, MessageStore) else "indexing"
+            loading = f" — {verb} {self.load_progress:.0%}"
+        dispatch = ""
+        if self.dispatch_stats:
+            d = self.dispatch_stats
+            elapsed = d.get("ended", time.perf_counter()) - d["started"]
+            rate = d["copied"] / elapsed * 60 if elapsed > 0 else 0.0
+            state = "dispatching" if self.dispatcher else "dispatched"
+            dispatch = f" — {state} {d['copied']}/{d['total']} ({rate:.1f}/min, {d['skipped']} dupes skipped)"
+        self.status_var.set(f"Message {self.index}/{len(self.messages)} (max {MAX_MESSAGES}){loading}{dispatch}")
+
+    def set_messages(self, messages):
+        # replaces the current list (closing a previous file store, stopping its loader)
+        self.cancel_load()
+        self.stop_dispatch()
+        if isinstance(self.messages, MessageStore):
+            self.messages.close()
+        self.messages = messages
+        self.index = 0
+        self.dispatched = set()
+        self.dispatch_stats = None
+        self.search_index = MessageIndex()
+        self.hits, self.hits_for = [], None
+        self.search_info.set("")
+        if messages and not isinstance(messages, MessageStore):
+            # in-memory lists are shown right away and indexed off the Tk thread;
+            # files are indexed as they load
+            self.start_loader(index_messages, messages)
+
+    def start_loader(self, target, source):
+        # target(source, cancel, out) runs on a worker thread; poll_loader merges its results
+        cancel, out = threading.Event(), queue.Queue()
+        self.loader = (cancel, out)
+        self.load_progress = 0.0
+        threading.Thread(target=target, args=(source, cancel, out), daemon=True).start()
+        self.root.after(POLL_MS, self.poll_loader, self.loader)
 
     def load_file(self):
         path = filedialog.askopenfilename(
@@ -71,23 +369,66 @@ class MessageHelper:
         if not path:
             return
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                lines = [line.rstrip("\n") for line in f]
+            store = MessageStore(path)
         except Exception as e:
             messagebox.showerror("Error", f"Could not read file:\n{e}")
             return
-        # flatten and filter empty lines, limit to MAX_MESSAGES
-        msgs = [ln for ln in lines if ln.strip()]
-        if len(msgs) > MAX_MESSAGES:
-            if not messagebox.askyesno("Too many messages",
-                                       f"File contains {len(msgs)} messages. Only first {MAX_MESSAGES} will be used. Continue?"):
-                return
-            msgs = msgs[:MAX_MESSAGES]
-        self.messages = msgs
-        self.index = 0
-        self.refresh_text_area()
+        self.set_messages(store)
+        self.show_text(f"Loading {os.path.basename(path)}…")
+        self.start_loader(scan_lines, store)
+        self.update_status()
+
+    def poll_loader(self, loader):
+        if loader is not self.loader:
+            return      # cancelled or replaced by a newer load
+        _, out = loader
+        store = self.messages
+        from_file = isinstance(store, MessageStore)
+        first = len(store) == 0
+        finished = None
+        while True:
+            try:
+                item = out.get_nowait()
+            except queue.Empty:
+                break
+            if item[0] == "batch":
+                _, starts, ends, done, tokens = item
+                store.extend(starts, ends)
+                self.search_index.add(tokens)
+                self.load_progress = done / store.size if store.size else 1.0
+            elif item[0] == "tokens":
+                _, done, tokens = item
+                self.search_index.add(tokens)
+                self.load_progress = done / len(store)
+            else:
+                finished = item
+        # an in-memory list is already on screen; only a file's rows change here
+        if from_file and len(store) and (first or self.shown[1] - self.shown[0] < self.visible_rows()):
+            self.render_window()
+        elif from_file and len(store):
+            # rows on screen are unchanged; only the header count and scrollbar move
+            self.txt.delete("1.0", "1.end")
+            self.txt.insert("1.0", f"Loaded {len(store)} messages. Click 'Copy Next' to copy message to clipboard.")
+            self.scroll.set(self.shown[0] / len(store), self.shown[1] / len(store))
+
+        if finished is None:
+            self.root.after(POLL_MS, self.poll_loader, loader)
+        else:
+            self.loader = None
+            if finished[0] == "error":
+                messagebox.showerror("Error", f"Could not {'read file' if from_file else 'index messages'}:\n{finished[1]}")
+            elif not len(store):
+                self.show_text("No non-empty lines found in file.")
+            elif finished[2]:
+                messagebox.showinfo("Too many messages", f"Only the first {MAX_MESSAGES} messages were loaded.")
         self.update_status()
 
+    def cancel_load(self):
+        if self.loader:
+            self.loader[0].set()
+            self.loader = None
+            self.update_status()
+
     def paste_messages(self):
         # get clipboard, paste as many lines as present
         content = pyperclip.paste()
@@ -103,27 +444,84 @@ class MessageHelper:
                                        f"Clipboard contains {len(lines)} messages. Only first {MAX_MESSAGES} will be used. Continue?"):
                 return
             lines = lines[:MAX_MESSAGES]
-        self.messages = lines
-        self.index = 0
+        self.set_messages(lines)
         self.refresh_text_area()
         self.update_status()
 
     def generate_sample(self):
-        count = simpledialog.askinteger("How many?", "Number of sample messages (max 100):", initialvalue=20, minvalue=1, maxvalue=MAX_MESSAGES)
+        count = simpledialog.askinteger("How many?", f"Number of sample messages (max {MAX_MESSAGES}):", initialvalue=20, minvalue=1, maxvalue=MAX_MESSAGES)
         if not count:
             return
-        self.messages = [f"Hello — sample message #{i+1} 😊" for i in range(count)]
-        self.index = 0
+        self.set_messages([f"Hello — sample message #{i+1} 😊" for i in range(count)])
         self.refresh_text_area()
         self.update_status()
 
-    def refresh_text_area(self):
+    # ---------- virtualized list view ----------
+    def show_text(self, text):
+        # plain text (intro / empty state) instead of the message rows
+        self.shown = (0, 0)
         self.txt.delete("1.0", "end")
-        header = f"Loaded {len(self.messages)} messages. Click 'Copy Next' to copy message to clipboard.\n\n"
-        self.txt.insert("1.0", header)
-        for i, m in enumerate(self.messages, start=1):
-            mark = "→" if i-1 == self.index else "  "
-            self.txt.insert("end", f"{mark} [{i}] {m}\n\n")
+        self.txt.insert("1.0", text)
+        self.scroll.set(0, 1)
+
+    def visible_rows(self):
+        height = self.txt.winfo_height()
+        if height <= 1:          # not laid out yet
+            return 20
+        return max(1, height // self.line_height - HEADER_LINES)
+
+    def row_text(self, i):
+        mark = MARK if i == self.index else NO_MARK
+        return f"{mark}[{i+1}] {self.messages[i]}"
+
+    def render_window(self):
+        # O(visible rows): only the messages that fit are put in the widget
+        n = len(self.messages)
+        rows = self.visible_rows()
+        self.top = max(0, min(self.top, n - rows))
+        end = min(n, self.top + rows)
+        header = f"Loaded {n} messages. Click 'Copy Next' to copy message to clipboard."
+        self.txt.delete("1.0", "end")
+        self.txt.insert("1.0", "\n".join([header, ""] + [self.row_text(i) for i in range(self.top, end)]))
+        self.shown = (self.top, end)
+        self.scroll.set(self.top / n if n else 0, end / n if n else 1)
+
+    def refresh_text_area(self):
+        self.top = 0
+        self.render_window()
+
+    def set_marker(self, i, mark):
+        start, end = self.shown
+        if start <= i < end:
+            line = HEADER_LINES + 1 + i - start
+            self.txt.delete(f"{line}.0", f"{line}.{len(mark)}")
+            self.txt.insert(f"{line}.0", mark)
+
+    def move_index(self, new_index):
+        old, self.index = self.index, new_index
+        start, end = self.shown
+        if new_index < len(self.messages) and not start <= new_index < end:
+            # marker left the window: recentre on it
+            self.top = new_index - self.visible_rows() // 2
+            self.render_window()
+            return
+        self.set_marker(old, NO_MARK)
+        self.set_marker(new_index, MARK)
+
+    def scroll_by(self, direction, amount):
+        if self.messages:
+            self.top += direction * amount
+            self.render_window()
+        return "break"
+
+    def on_scroll(self, action, value, unit=None):
+        if not self.messages:
+            return
+        if action == "moveto":
+            self.top = int(float(value) * len(self.messages))
+            self.render_window()
+        else:
+            self.scroll_by(int(value), self.visible_rows() if unit == "pages" else 1)
 
     def copy_next(self):
         if not self.messages:
@@ -134,32 +532,114 @@ class MessageHelper:
             return
         msg = self.messages[self.index]
         pyperclip.copy(msg)
-        self.index += 1
+        self.move_index(self.index + 1)
         self.update_status()
-        self.refresh_text_area()
         # small visual confirmation
         self.root.after(100, lambda: self.root.focus_force())
 
     def copy_prev(self):
         if not self.messages:
             return
-        if self.index <= 1:
-            self.index = 0
-        else:
-            self.index -= 1
+        self.move_index(max(self.index - 1, 0))
         if self.index < len(self.messages):
             pyperclip.copy(self.messages[self.index])
         self.update_status()
-        self.refresh_text_area()
+
+    # ---------- search ----------
+    def find_next(self):
+        query = self.search_var.get().strip()
+        if not query or not self.messages:
+            return
+        key = (query, self.substring_var.get(), self.search_index.version)
+        start = time.perf_counter()
+        if key != self.hits_for:
+            self.hits = self.search_index.search(query, substring=key[1])
+            self.hits_for = key
+            after = self.index            # a fresh search may land on the current message
+        else:
+            after = self.index + 1        # "Find next" again moves past it
+        ms = (time.perf_counter() - start) * 1000
+        if not self.hits:
+            self.search_info.set(f"no matches ({ms:.1f} ms)")
+            return
+        pos = bisect_left(self.hits, after)
+        if pos == len(self.hits):
+            pos = 0                       # wrap around
+        self.move_index(self.hits[pos])
+        self.search_info.set(f"hit {pos + 1}/{len(self.hits)} ({ms:.1f} ms)")
+        self.update_status()
+
+    # ---------- dispatch mode ----------
+    def start_dispatch(self):
+        if not self.messages:
+            messagebox.showinfo("No messages", "Load or generate messages first.")
+            return
+        if self.dispatcher:
+            messagebox.showinfo("Dispatch", "A dispatch is already running. Press Stop first.")
+            return
+        n = len(self.messages)
+        first = simpledialog.askinteger("Dispatch", f"First message (1-{n}):",
+                                        initialvalue=min(self.index + 1, n), minvalue=1, maxvalue=n)
+        if not first:
+            return
+        last = simpledialog.askinteger("Dispatch", f"Last message ({first}-{n}):",
+                                       initialvalue=n, minvalue=first, maxvalue=n)
+        if not last:
+            return
+        interval = simpledialog.askfloat("Dispatch", "Seconds between copies (time to paste + send):",
+                                         initialvalue=DISPATCH_INTERVAL, minvalue=0.5)
+        if not interval:
+            return
+
+        cancel, out = threading.Event(), queue.Queue()
+        self.dispatcher = (cancel, out)
+        self.dispatch_stats = {"copied": 0, "skipped": 0, "total": last - first + 1,
+                               "started": time.perf_counter()}
+        threading.Thread(target=dispatch_range, daemon=True,
+                         args=(self.messages, first - 1, last, interval, self.dispatched, cancel, out)).start()
+        self.root.after(POLL_MS, self.poll_dispatch, self.dispatcher)
+        self.update_status()
+
+    def poll_dispatch(self, dispatcher):
+        if dispatcher is not self.dispatcher:
+            return
+        _, out = dispatcher
+        finished = None
+        while True:
+            try:
+                item = out.get_nowait()
+            except queue.Empty:
+                break
+            if item[0] == "copied":
+                self.dispatch_stats["copied"] += 1
+                self.move_index(item[1] + 1)
+                self.root.bell()      # cue to paste + send
+            elif item[0] == "skipped":
+                self.dispatch_stats["skipped"] += 1
+            else:
+                finished = item
+        if finished is None:
+            self.root.after(POLL_MS, self.poll_dispatch, dispatcher)
+        else:
+            self.dispatcher = None
+            self.dispatch_stats["ended"] = time.perf_counter()
+            if finished[0] == "error":
+                messagebox.showerror("Dispatch", f"Dispatch stopped:\n{finished[1]}")
+        self.update_status()
+
+    def stop_dispatch(self):
+        if self.dispatcher:
+            self.dispatcher[0].set()
+            self.dispatcher = None
+            self.dispatch_stats["ended"] = time.perf_counter()
+            self.update_status()
 
     def reset_list(self):
         if not self.messages:
             return
         if messagebox.askyesno("Reset", "Clear all loaded messages?"):
-            self.messages = []
-            self.index = 0
-            self.txt.delete("1.0", "end")
-            self.txt.insert("1.0", "No messages loaded. Use 'Load from file' or 'Generate sample 100'.")
+            self.set_messages([])
+            self.show_text("No messages loaded. Use 'Load from file' or 'Generate sample 100'.")
             self.update_status()
 
     def open_folder(self):
@@ -0,0 +1,409 @@
+"""
+Offline cycle simulator for the cyclic BUY/SELL STOP scripts.
+
+- Replays recorded ticks through a simulated broker (no MT5 needed)
+- Broker enforces stop_level, SLIPPAGE deviation and requote retries like place_pending_stop
+- Latency and slippage are pluggable models, fitted from recorded order_send timings/fills
+- Simulates the anchor pattern (dummy.py) and the gap pattern (Randmon_question/script.py)
+- Monte Carlo runs over the models give P&L and throughput with a p5..p95 error band
+
+Tick file (CSV):       time,bid,ask            (time in seconds, time_msc also accepted)
+Order-send log (CSV):  side,requested,filled,latency_ms,retcode
+
+Usage:
+    python backtest.py ticks.csv [order_log.csv] [anchor|gap] [runs]
+"""
+
+import csv
+import math
+import random
+import statistics
+import sys
+from array import array
+from datetime import datetime
+
+# ------------------- Config ------------------- #
+SYMBOL = "XAUUSD_"        # only used for printing
+SLIPPAGE = 500            # max deviation in points (same as the live scripts)
+LOSS_TARGET = 500.0       # equity loss stop (in $)
+PROFIT_UNIT = 60          # profit per volume unit for TP calculation (anchor / dummy.py)
+GAP = 1.0                 # distance between orders for the gap strategy
+FORMULA_UNIT = 25         # gap strategy TP per volume unit (script.py's formula25)
+FORMULA_VOL_MIN = 0.02    # gap strategy first volume (script.py)
+FORMULA_VOL_STEP = 0.02   # gap strategy volume step, uncapped (script.py)
+POINT = 0.01              # symbol_info.point
+DIGITS = 2                # symbol_info.digits
+STOP_LEVEL_POINTS = 0     # symbol_info.trade_stops_level
+CONTRACT_SIZE = 100       # $ per 1.0 price move per 1.0 lot (XAUUSD)
+POLL_INTERVAL = 0.5       # seconds between strategy polls
+RETRY_DELAY = 1.0         # place_pending_stop retry delay
+
+RETCODE_DONE = 10009
+RETCODE_REQUOTE = 10004
+RETCODE_INVALID_PRICE = 10015
+
+# ------------------- Helpers ------------------- #
+def now():
+    return datetime.now().strftime("%H:%M:%S")
+
+def printl(*args, **kwargs):
+    print(f"[{now()}]", *args, **kwargs)
+
+def stop_level():
+    return STOP_LEVEL_POINTS * POINT
+
+def volume_pattern_generator():
+    # same sequence as dummy.py
+    pattern = [0.01, 0.02, 0.03, 0.04, 0.05, 0.06, 0.07, 0.08, 0.09, 0.10]
+    for vol in pattern:
+        yield vol
+    while True:
+        yield 0.10
+
+def formula25_generator(vol_min=FORMULA_VOL_MIN, vol_step=FORMULA_VOL_STEP, profit_unit=FORMULA_UNIT):
+    # same sequence as Randmon_question/script.py: (volume, cumulative TP), no volume cap
+    target_profit = 0.0
+    vol = vol_min
+    while True:
+        target_profit += vol * profit_unit
+        yield (round(vol, 2), round(target_profit, 2))
+        vol += vol_step
+
+# ------------------- Tick Loading ------------------- #
+def load_ticks(path):
+    """Reads a tick CSV into three compact arrays (time, bid, ask)."""
+    times, bids, asks = array("d"), array("d"), array("d")
+    with open(path, newline="") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            if row.get("time_msc"):
+                t = float(row["time_msc"]) / 1000.0
+            else:
+                t = float(row["time"])
+            times.append(t)
+            bids.append(float(row["bid"]))
+            asks.append(float(row["ask"]))
+    return times, bids, asks
+
+# ------------------- Latency / Slippage Models ------------------- #
+class ConstantLatency:
+    def __init__(self, seconds=0.0):
+        self.seconds = seconds
+
+    def sample(self, rng):
+        return self.seconds
+
+class EmpiricalLatency:
+    """Resamples recorded order_send round-trip times (seconds)."""
+    def __init__(self, samples):
+        self.samples = list(samples)
+
+    def sample(self, rng):
+        return rng.choice(self.samples)
+
+class NoSlippage:
+    requote_rate = 0.0
+
+    def sample(self, rng):
+        return 0.0
+
+class EmpiricalSlippage:
+    """
+    Resamples recorded fill slippage in points (positive = against us).
+    requote_rate is the share of sends that came back as a requote.
+    """
+    def __init__(self, samples, requote_rate=0.0):
+        self.samples = list(samples) or [0.0]
+        self.requote_rate = requote_rate
+
+    def sample(self, rng):
+        return rng.choice(self.samples)
+
+def fit_models(log_path):
+    """Builds (latency, slippage) models from a recorded order_send log."""
+    latencies, slips = [], []
+    sends = requotes = 0
+    with open(log_path, newline="") as f:
+        for row in csv.DictReader(f):
+            sends += 1
+            latencies.append(float(row["latency_ms"]) / 1000.0)
+            retcode = int(row["retcode"])
+            if retcode == RETCODE_REQUOTE:
+                requotes += 1
+                continue
+            if retcode != RETCODE_DONE or not row.get("filled"):
+                continue
+            diff = (float(row["filled"]) - float(row["requested"])) / POINT
+            slips.append(diff if row["side"].upper() == "BUY" else -diff)
+    if not latencies:
+        return ConstantLatency(), NoSlippage()
+    return EmpiricalLatency(latencies), EmpiricalSlippage(slips, requotes / sends)
+
+# ------------------- Strategies ------------------- #
+class AnchorStrategy:
+    """dummy.py pattern: SELL always back at base_int, BUY at base_int + triggered_count."""
+    def __init__(self, profit_unit=PROFIT_UNIT):
+        self.profit_unit = profit_unit
+        self.vol_gen = volume_pattern_generator()
+
+    def start(self, bid, ask):
+        candidate_buy = round(ask + stop_level() + 2 * POINT, DIGITS)
+        self.fixed_decimal = candidate_buy - int(candidate_buy)
+        self.base_int = int(candidate_buy)
+        vol = next(self.vol_gen)
+        self.tp_target = vol * self.profit_unit
+        price = self.base_int + self.fixed_decimal
+        max_allowed_sell = bid - stop_level() - 2 * POINT
+        if price > max_allowed_sell:
+            allowed_int = int(math.floor(max_allowed_sell - POINT - self.fixed_decimal))
+            price = allowed_int + self.fixed_decimal
+        return "SELL", round(price, DIGITS), vol
+
+    def on_trigger(self, side, triggered_count, bid, ask):
+        vol = next(self.vol_gen)
+        self.tp_target += vol * self.profit_unit
+        if side == "SELL":
+            buy_int = self.base_int + triggered_count
+            price = buy_int + self.fixed_decimal
+            min_allowed_buy = ask + stop_level() + 2 * POINT
+            if price < min_allowed_buy:
+                price = int(math.ceil(min_allowed_buy - self.fixed_decimal)) + self.fixed_decimal
+            return "BUY", round(price, DIGITS), vol
+        price = self.base_int + self.fixed_decimal
+        max_allowed_sell = bid - stop_level() - 2 * POINT
+        if price > max_allowed_sell:
+            price = int(math.floor(max_allowed_sell - self.fixed_decimal)) + self.fixed_decimal
+        return "SELL", round(price, DIGITS), vol
+
+    def placed(self, side, price):
+        pass
+
+class GapStrategy:
+    """
+    script.py pattern: start with BUY, then alternate at +/- gap from the last price.
+    Like the live loop, the ladder continues from the price the broker accepted
+    (placed() is called with the clamped price), not from the requested one.
+    Volumes and TP follow script.py's formula25_generator: the TP is the
+    cumulative vol * profit_unit of the orders that have triggered so far.
+    """
+    def __init__(self, gap=GAP, profit_unit=FORMULA_UNIT):
+        self.gap = gap
+        self.profit_unit = profit_unit
+        self.vol_gen = formula25_generator(profit_unit=profit_unit)
+
+    def start(self, bid, ask):
+        vol, self.pending_tp = next(self.vol_gen)
+        self.tp_target = self.pending_tp
+        self.active_price = round(ask + POINT * 10, DIGITS)
+        return "BUY", self.active_price, vol
+
+    def on_trigger(self, side, triggered_count, bid, ask):
+        # the order that just triggered brings its TP; the next one carries its own
+        self.tp_target = self.pending_tp
+        vol, self.pending_tp = next(self.vol_gen)
+        if side == "BUY":
+            self.active_price = round(self.active_price - self.gap, DIGITS)
+            return "SELL", self.active_price, vol
+        self.active_price = round(self.active_price + self.gap, DIGITS)
+        return "BUY", self.active_price, vol
+
+    def placed(self, side, price):
+        # place_pending_stop returns the clamped price and script.py chains from it
+        self.active_price = price
+
+STRATEGIES = {"anchor": AnchorStrategy, "gap": GapStrategy}
+
+# ------------------- Simulator ------------------- #
+def clamp_to_broker(side, price, bid, ask):
+    # same adjustment place_pending_stop makes before sending
+    if side == "BUY":
+        return round(max(price, ask + stop_level() + 2 * POINT), DIGITS)
+    return round(min(price, bid - stop_level() - 2 * POINT), DIGITS)
+
+def signed_slip(slippage, rng, max_slip):
+    # fitted slippage is signed (negative = in our favour); the deviation caps both sides
+    return min(max(slippage.sample(rng) * POINT, -max_slip), max_slip)
+
+def floating_pnl(positions, bid, ask):
+    pnl = 0.0
+    for side, vol, open_price in positions:
+        if side == "BUY":
+            pnl += (bid - open_price) * vol * CONTRACT_SIZE
+        else:
+            pnl += (open_price - ask) * vol * CONTRACT_SIZE
+    return pnl
+
+def simulate_cycle(ticks, strategy, latency, slippage, rng, start=0):
+    """
+    Runs one cycle from tick index `start` until TP, SL or end of data.
+    Returns a dict with outcome, pnl, trades, sends, requotes, rejects, duration, end.
+    """
+    times, bids, asks = ticks
+    n = len(times)
+    if start >= n:
+        return None
+    max_slip = SLIPPAGE * POINT
+
+    side, price, vol = strategy.start(bids[start], asks[start])
+    price = clamp_to_broker(side, price, bids[start], asks[start])
+    strategy.placed(side, price)
+    request = {"side": side, "price": price, "vol": vol, "arrive": times[start] + latency.sample(rng)}
+    order = None
+    reaction = None          # (time, side) of a trigger the strategy hasn't seen yet
+    positions = []
+    triggered = sends = requotes = rejects = 0
+    outcome = "open"
+    i = start
+
+    while i < n:
+        t, bid, ask = times[i], bids[i], asks[i]
+
+        # strategy reacts to the last trigger on its next poll
+        if reaction is not None and t >= reaction[0]:
+            side, price, vol = strategy.on_trigger(reaction[1], triggered, bid, ask)
+            price = clamp_to_broker(side, price, bid, ask)
+            strategy.placed(side, price)
+            request = {"side": side, "price": price, "vol": vol, "arrive": t + latency.sample(rng)}
+            order = None
+            reaction = None
+
+        # in-flight order_send reaches the server
+        if request is not None and t >= request["arrive"]:
+            sends += 1
+            if rng.random() < slippage.requote_rate:
+                requotes += 1
+                request["arrive"] = t + RETRY_DELAY + latency.sample(rng)
+            elif (request["side"] == "BUY" and request["price"] < ask + stop_level()) or \
+                 (request["side"] == "SELL" and request["price"] > bid - stop_level()):
+                rejects += 1
+                request["arrive"] = t + RETRY_DELAY + latency.sample(rng)
+            else:
+                order = request
+                request = None
+
+        # live pending stop triggers
+        if order is not None:
+            hit = ask >= order["price"] if order["side"] == "BUY" else bid <= order["price"]
+            if hit:
+                slip = signed_slip(slippage, rng, max_slip)
+                if order["side"] == "BUY":
+                    fill = max(order["price"], ask) + slip
+                else:
+                    fill = min(order["price"], bid) - slip
+                positions.append((order["side"], order["vol"], fill))
+                triggered += 1
+                reaction = (t + rng.uniform(0.0, POLL_INTERVAL), order["side"])
+                order = None
+
+        if positions:
+            pnl = floating_pnl(positions, bid, ask)
+            if pnl >= strategy.tp_target or pnl <= -LOSS_TARGET:
+                outcome = "profit" if pnl >= strategy.tp_target else "loss"
+                break
+        i += 1
+
+    if i >= n:
+        i = n - 1
+    # close at market after one order_send round trip
+    close_at = times[i] + latency.sample(rng)
+    j = i
+    while j < n - 1 and times[j] < close_at:
+        j += 1
+    close_slip = signed_slip(slippage, rng, max_slip)
+    pnl = floating_pnl(positions, bids[j] - close_slip, asks[j] + close_slip) if positions else 0.0
+    return {
+        "outcome": outcome,
+        "pnl": round(pnl, 2),
+        "trades": triggered,
+        "sends": sends,
+        "requotes": requotes,
+        "rejects": rejects,
+        "duration": times[j] - times[start],
+        "end": j + 1,
+    }
+
+def run_session(ticks, strategy_cls, latency, slippage, rng, **strategy_kwargs):
+    """Runs back-to-back cycles over the whole tick history (like restarting the bot)."""
+    cycles = []
+    start = 0
+    while start < len(ticks[0]) - 1:
+        result = simulate_cycle(ticks, strategy_cls(**strategy_kwargs), latency, slippage, rng, start)
+        if result is None:
+            break
+        cycles.append(result)
+        if result["outcome"] == "open":
+            break
+        start = result["end"]
+    return cycles
+
+def summarize_session(cycles, hours):
+    pnl = sum(c["pnl"] for c in cycles)
+    trades = sum(c["trades"] for c in cycles)
+    return {
+        "pnl": round(pnl, 2),
+        "cycles": len(cycles),
+        "trades": trades,
+        "trades_per_hour": trades / hours if hours > 0 else 0.0,
+        "requotes": sum(c["requotes"] for c in cycles),
+        "rejects": sum(c["rejects"] for c in cycles),
+    }
+
+def percentile(values, q):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    k = (len(values) - 1) * q
+    lo, hi = int(math.floor(k)), int(math.ceil(k))
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+def backtest(ticks, strategy_cls, latency, slippage, runs=200, seed=42, **strategy_kwargs):
+    """
+    Monte Carlo over the latency/slippage models.
+    Returns per-run summaries plus mean and p5/p50/p95 of P&L and throughput.
+    """
+    rng = random.Random(seed)
+    hours = (ticks[0][-1] - ticks[0][0]) / 3600.0
+    sessions = []
+    for _ in range(runs):
+        cycles = run_session(ticks, strategy_cls, latency, slippage, rng, **strategy_kwargs)
+        sessions.append(summarize_session(cycles, hours))
+    pnls = [s["pnl"] for s in sessions]
+    tph = [s["trades_per_hour"] for s in sessions]
+    return {
+        "runs": sessions,
+        "pnl_mean": statistics.fmean(pnls),
+        "pnl_band": (percentile(pnls, 0.05), percentile(pnls, 0.5), percentile(pnls, 0.95)),
+        "trades_per_hour_mean": statistics.fmean(tph),
+        "trades_per_hour_band": (percentile(tph, 0.05), percentile(tph, 0.5), percentile(tph, 0.95)),
+    }
+
+# ------------------- Main ------------------- #
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return
+    ticks = load_ticks(sys.argv[1])
+    if sys.argv[2:] and sys.argv[2].endswith(".csv"):
+        latency, slippage = fit_models(sys.argv[2])
+        rest = sys.argv[3:]
+    else:
+        latency, slippage = ConstantLatency(), NoSlippage()
+        rest = sys.argv[2:]
+    name = rest[0] if rest else "anchor"
+    runs = int(rest[1]) if len(rest) > 1 else 200
+
+    printl(f"📂 Loaded {len(ticks[0])} ticks for {SYMBOL}")
+    printl(f"🧪 Strategy={name} runs={runs} latency={type(latency).__name__} slippage={type(slippage).__name__}")
+
+    naive = backtest(ticks, STRATEGIES[name], ConstantLatency(), NoSlippage(), runs=1)
+    result = backtest(ticks, STRATEGIES[name], latency, slippage, runs=runs)
+
+    lo, mid, hi = result["pnl_band"]
+    tlo, tmid, thi = result["trades_per_hour_band"]
+    print(f"\n📊 Naive simulation : P&L={naive['pnl_mean']:.2f} | trades/h={naive['trades_per_hour_mean']:.1f}")
+    print(f"📊 Modelled (mean)  : P&L={result['pnl_mean']:.2f} | trades/h={result['trades_per_hour_mean']:.1f}")
+    print(f"📈 P&L band         : p5={lo:.2f}  p50={mid:.2f}  p95={hi:.2f}")
+    print(f"📈 Trades/h band    : p5={tlo:.1f}  p50={tmid:.1f}  p95={thi:.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import MetaTrader5 as mt5
+import os
 import time
 from datetime import datetime
 import math
@@ -25,6 +26,17 @@ sell_step = 1             # unused in new pattern but kept for compatibility
 sell_next_price = None
 
 # ------------------- MT5 Init ------------------- #
+# MT5_GATEWAY=host:port runs this bot as a worker of mt5_gateway.py instead of
+# opening its own terminal connection
+if os.environ.get("MT5_GATEWAY"):
+    from mt5_gateway import GatewayClient
+    mt5 = GatewayClient(os.environ["MT5_GATEWAY"])
+
+# MT5_RECORD=session.rec.gz records every mt5 call for mt5_replay.py
+if os.environ.get("MT5_RECORD"):
+    from mt5_replay import RecordingMT5
+    mt5 = RecordingMT5(mt5, os.environ["MT5_RECORD"])
+
 if not mt5.initialize():
     print("❌ Initialize() failed, error =", mt5.last_error())
     quit()
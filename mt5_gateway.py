@@ -0,0 +1,417 @@
+"""
+Out-of-process MT5 gateway shared by many strategy workers.
+
+- One gateway process owns the MetaTrader5 session (the binding is single-terminal
+  and not thread-safe, so every mt5 call happens on one thread)
+- Ticks, account info and position deltas are broadcast to subscribed workers
+  over a local socket (multiprocessing.connection)
+- Worker order_send requests are queued and executed one at a time; a newer
+  pending order for the same symbol/magic/comment supersedes one still queued,
+  and identical read calls issued in the same batch share one mt5 call
+- Account info is re-broadcast after every order batch, so a worker never reads
+  the pre-order margin/equity once its order_send has returned
+- GatewayClient mimics the parts of the mt5 module the bot scripts use, so a
+  script can run through the gateway by setting MT5_GATEWAY=host:port
+
+Usage:
+    python mt5_gateway.py [port] [SYMBOL ...]
+"""
+
+import pickle
+import queue
+import threading
+import time
+from datetime import datetime
+from multiprocessing.connection import Client, Listener
+from types import SimpleNamespace
+
+# ------------------- Config ------------------- #
+HOST = "127.0.0.1"
+PORT = 6050
+AUTHKEY = b"mt5-gateway"
+SYMBOLS = ["XAUUSD_"]     # symbols polled and broadcast
+POLL_INTERVAL = 0.05      # seconds between tick/position polls
+CALL_TIMEOUT = 30.0       # client-side timeout for a gateway round trip
+
+# ------------------- Helpers ------------------- #
+def now():
+    return datetime.now().strftime("%H:%M:%S")
+
+def printl(*args, **kwargs):
+    print(f"[{now()}]", *args, **kwargs)
+
+def to_plain(value):
+    """Turns MT5 named tuples (and tuples of them) into dicts so they can be pickled."""
+    if hasattr(value, "_asdict"):
+        return {k: to_plain(v) for k, v in value._asdict().items()}
+    if isinstance(value, (tuple, list)):
+        return [to_plain(v) for v in value]
+    return value
+
+def to_namespace(value):
+    """Inverse of to_plain on the client side: attribute access like the real objects."""
+    if isinstance(value, dict):
+        return SimpleNamespace(**{k: to_namespace(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(to_namespace(v) for v in value)
+    return value
+
+def call_key(name, args, kwargs, req_id):
+    """
+    Coalescing key for a forwarded call: identical calls share one mt5 call.
+    Arguments are compared by their pickled form, so dict arguments
+    (order_check(request)) work; anything unpicklable is never coalesced.
+    """
+    try:
+        return name, pickle.dumps((args, sorted(kwargs.items())))
+    except Exception:
+        return name, req_id
+
+def parse_address(address):
+    if isinstance(address, tuple):
+        return address
+    host, _, port = address.rpartition(":")
+    return (host or HOST, int(port))
+
+# ------------------- Gateway ------------------- #
+class Gateway:
+    def __init__(self, mt5, symbols=SYMBOLS, address=(HOST, PORT), authkey=AUTHKEY):
+        self.mt5 = mt5
+        self.symbols = list(symbols)
+        self.address = address
+        self.authkey = authkey
+        self.commands = queue.Queue()
+        self.subscribers = {}        # conn -> set of symbols
+        self.last_ticks = {}         # symbol -> time_msc
+        self.last_positions = {}     # symbol -> {ticket: position dict}
+        self.running = False
+        self.stats = {"orders": 0, "superseded": 0, "calls": 0, "shared_calls": 0, "errors": 0}
+        self.constants = {k: getattr(mt5, k) for k in dir(mt5)
+                          if k.isupper() and isinstance(getattr(mt5, k), int)}
+
+    # ---- connection handling (reader threads only enqueue) ----
+    def serve_forever(self):
+        if not self.mt5.initialize():
+            printl("❌ Initialize() failed, error =", self.mt5.last_error())
+            return
+        for sym in self.symbols:
+            if not self.mt5.symbol_select(sym, True):
+                printl(f"⚠️ Failed to select symbol {sym}")
+        printl(f"✅ MT5 Initialized — gateway listening on {self.address[0]}:{self.address[1]}")
+
+        self.running = True
+        listener = Listener(self.address, authkey=self.authkey)
+        threading.Thread(target=self._accept_loop, args=(listener,), daemon=True).start()
+        try:
+            self._mt5_loop()
+        except KeyboardInterrupt:
+            printl("🛑 Gateway stopped by user.")
+        finally:
+            self.running = False
+            listener.close()
+            self.mt5.shutdown()
+            printl("MT5 connection closed.")
+
+    def _accept_loop(self, listener):
+        while self.running:
+            try:
+                conn = listener.accept()
+            except OSError:
+                break
+            self.commands.put(("hello", conn, None))
+            threading.Thread(target=self._reader, args=(conn,), daemon=True).start()
+
+    def _reader(self, conn):
+        while self.running:
+            try:
+                msg = conn.recv()
+            except (EOFError, OSError):
+                self.commands.put(("bye", conn, None))
+                return
+            self.commands.put((msg[0], conn, msg[1:]))
+
+    def _send(self, conn, msg):
+        try:
+            conn.send(msg)
+        except (OSError, ValueError):
+            self.subscribers.pop(conn, None)
+
+    # ---- the single mt5 thread ----
+    def _mt5_loop(self):
+        next_poll = 0.0
+        while self.running:
+            timeout = max(0.0, next_poll - time.monotonic())
+            batch = []
+            try:
+                batch.append(self.commands.get(timeout=timeout))
+                while True:
+                    batch.append(self.commands.get_nowait())
+            except queue.Empty:
+                pass
+            if batch:
+                self._execute_batch(batch)
+            if time.monotonic() >= next_poll:
+                self._poll()
+                next_poll = time.monotonic() + POLL_INTERVAL
+
+    def _execute_batch(self, batch):
+        orders = {}       # coalescing key -> (conn, req_id, request)
+        calls = {}        # call_key -> (name, args, kwargs, [(conn, req_id)])
+        for kind, conn, payload in batch:
+            if kind == "hello":
+                self.subscribers[conn] = set()
+                self._send(conn, ("constants", self.constants))
+            elif kind == "bye":
+                self.subscribers.pop(conn, None)
+            elif kind == "subscribe":
+                symbols = set(payload[0])
+                self.subscribers.setdefault(conn, set()).update(symbols)
+                for sym in symbols:
+                    if sym not in self.symbols:
+                        self.mt5.symbol_select(sym, True)
+                        self.symbols.append(sym)
+                    snapshot = self.last_positions.get(sym)
+                    if snapshot is None:
+                        snapshot = self.last_positions[sym] = self._positions_snapshot(sym)
+                    self._send(conn, ("positions", sym, {"snapshot": list(snapshot.values())}))
+            elif kind == "order":
+                req_id, request = payload
+                # workers block on order_send, so one connection never has two queued;
+                # supersede across workers trading the same symbol/magic/comment
+                key = (request.get("action"), request.get("symbol"),
+                       request.get("magic"), request.get("comment"), request.get("position"))
+                if request.get("action") == self.constants.get("TRADE_ACTION_PENDING") and key in orders:
+                    old_conn, old_id, _ = orders[key]
+                    self.stats["superseded"] += 1
+                    self._send(old_conn, ("reply", old_id, None, (-10006, "Superseded by a newer request")))
+                elif request.get("action") != self.constants.get("TRADE_ACTION_PENDING"):
+                    key = key + (req_id,)
+                orders[key] = (conn, req_id, request)
+            elif kind == "call":
+                req_id, name, args, kwargs = payload
+                waiters = calls.setdefault(call_key(name, args, kwargs, req_id), (name, args, kwargs, []))[3]
+                waiters.append((conn, req_id))
+
+        for name, args, kwargs, waiters in calls.values():
+            self.stats["calls"] += 1
+            self.stats["shared_calls"] += len(waiters) - 1
+            result, error = self._invoke(name, *args, **kwargs)
+            for conn, req_id in waiters:
+                self._send(conn, ("reply", req_id, result, error))
+
+        replies = []
+        for conn, req_id, request in orders.values():
+            self.stats["orders"] += 1
+            result, error = self._invoke("order_send", request)
+            replies.append((conn, ("reply", req_id, result, error)))
+        if replies:
+            # the cached account is stale after any order result; refresh it before
+            # the replies so each worker sees the new state when order_send returns
+            msg = ("account", to_plain(self.mt5.account_info()))
+            for conn in set(self.subscribers) | {conn for conn, _ in replies}:
+                self._send(conn, msg)
+        for conn, msg in replies:
+            self._send(conn, msg)
+
+    def _invoke(self, name, *args, **kwargs):
+        """(result, error) of one mt5 call; a failing call only answers its own requesters."""
+        try:
+            result = to_plain(getattr(self.mt5, name)(*args, **kwargs))
+        except Exception as e:
+            self.stats["errors"] += 1
+            printl(f"⚠️ {name} failed: {type(e).__name__}: {e}")
+            return None, (-10007, f"{type(e).__name__}: {e}")
+        return result, (None if result is not None else self.mt5.last_error())
+
+    def _positions_snapshot(self, symbol):
+        positions = self.mt5.positions_get(symbol=symbol) or ()
+        return {p.ticket: to_plain(p) for p in positions}
+
+    def _poll(self):
+        if not self.subscribers:
+            return
+        account = to_plain(self.mt5.account_info())
+        for sym in self.symbols:
+            listeners = [c for c, syms in self.subscribers.items() if sym in syms]
+            if not listeners:
+                continue
+            tick = self.mt5.symbol_info_tick(sym)
+            if tick is not None and tick.time_msc != self.last_ticks.get(sym):
+                self.last_ticks[sym] = tick.time_msc
+                msg = ("tick", sym, to_plain(tick), account)
+                for conn in listeners:
+                    self._send(conn, msg)
+
+            current = self._positions_snapshot(sym)
+            previous = self.last_positions.get(sym, {})
+            opened = [p for t, p in current.items() if t not in previous]
+            closed = [t for t in previous if t not in current]
+            changed = [p for t, p in current.items() if t in previous and previous[t] != p]
+            self.last_positions[sym] = current
+            if opened or closed or changed:
+                msg = ("positions", sym, {"opened": opened, "closed": closed, "changed": changed})
+                for conn in listeners:
+                    self._send(conn, msg)
+
+# ------------------- Worker-side client ------------------- #
+class GatewayClient:
+    """
+    Drop-in stand-in for the mt5 module inside a strategy worker.
+    Ticks, positions and account info are served from the broadcast cache;
+    everything else is a round trip through the gateway.
+    """
+    def __init__(self, address=(HOST, PORT), authkey=AUTHKEY):
+        self._address = parse_address(address)
+        self._authkey = authkey
+        self._conn = None
+        self._lock = threading.Lock()
+        self._waiters = {}
+        self._next_id = 0
+        self._ticks = {}
+        self._positions = {}
+        self._account = None
+        self._last_error = (1, "Success")
+        self._ready = threading.Event()
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        # anything not cached locally is forwarded as a plain call
+        return lambda *args, **kwargs: self._call(name, args, kwargs)
+
+    # ---- connection ----
+    def initialize(self, *args, **kwargs):
+        try:
+            self._conn = Client(self._address, authkey=self._authkey)
+        except OSError as e:
+            self._last_error = (-10003, f"Gateway unreachable: {e}")
+            return False
+        threading.Thread(target=self._receiver, daemon=True).start()
+        return self._ready.wait(CALL_TIMEOUT)
+
+    def shutdown(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def last_error(self):
+        return self._last_error
+
+    def _receiver(self):
+        conn = self._conn
+        while True:
+            try:
+                msg = conn.recv()
+            except (EOFError, OSError, AttributeError):
+                break
+            kind = msg[0]
+            if kind == "constants":
+                self.__dict__.update(msg[1])
+                self._ready.set()
+            elif kind == "tick":
+                _, sym, tick, account = msg
+                self._ticks[sym] = to_namespace(tick)
+                self._account = to_namespace(account)
+            elif kind == "account":
+                self._account = to_namespace(msg[1])
+            elif kind == "positions":
+                _, sym, delta = msg
+                book = self._positions.setdefault(sym, {})
+                if "snapshot" in delta:
+                    book.clear()
+                    delta = {"opened": delta["snapshot"], "closed": [], "changed": []}
+                for p in delta["opened"] + delta["changed"]:
+                    book[p["ticket"]] = to_namespace(p)
+                for ticket in delta["closed"]:
+                    book.pop(ticket, None)
+            elif kind == "reply":
+                _, req_id, result, error = msg
+                with self._lock:
+                    waiter = self._waiters.pop(req_id, None)
+                if waiter is not None:
+                    waiter["result"] = to_namespace(result)
+                    waiter["error"] = error
+                    waiter["done"].set()
+        # a dead gateway is a disconnected terminal: no cached market data,
+        # every further call fails, and anyone still waiting is woken
+        with self._lock:
+            if self._conn is not None and self._conn is not conn:
+                return      # shut down and re-initialized meanwhile
+            self._ticks.clear()
+            self._positions.clear()
+            self._account = None
+            self._conn = None
+            self._last_error = (-10004, "Gateway connection lost")
+            for waiter in self._waiters.values():
+                waiter["error"] = self._last_error
+                waiter["done"].set()
+            self._waiters.clear()
+
+    def _request(self, *msg):
+        waiter = {"done": threading.Event(), "result": None, "error": None}
+        with self._lock:
+            if self._conn is None:
+                self._last_error = (-10004, "Not connected to gateway")
+                return None
+            self._next_id += 1
+            req_id = self._next_id
+            self._waiters[req_id] = waiter
+            try:
+                self._conn.send((msg[0], req_id) + msg[1:])
+            except (OSError, ValueError):
+                del self._waiters[req_id]
+                self._last_error = (-10004, "Gateway connection lost")
+                return None
+        if not waiter["done"].wait(CALL_TIMEOUT):
+            with self._lock:
+                self._waiters.pop(req_id, None)
+            self._last_error = (-10005, "Gateway timeout")
+            return None
+        if waiter["error"] is not None:
+            self._last_error = waiter["error"]
+        return waiter["result"]
+
+    def _call(self, name, args, kwargs):
+        return self._request("call", name, tuple(args), kwargs)
+
+    # ---- cached views ----
+    def symbol_select(self, symbol, enable=True):
+        with self._lock:
+            if self._conn is None:
+                self._last_error = (-10004, "Not connected to gateway")
+                return False
+            self._conn.send(("subscribe", [symbol]))
+        return True
+
+    def symbol_info_tick(self, symbol):
+        tick = self._ticks.get(symbol)
+        if tick is None:
+            tick = self._call("symbol_info_tick", (symbol,), {})
+        return tick
+
+    def positions_get(self, symbol=None, **kwargs):
+        if symbol is not None and symbol in self._positions and not kwargs:
+            return tuple(self._positions[symbol].values())
+        return self._call("positions_get", (), dict(kwargs, **({"symbol": symbol} if symbol else {})))
+
+    def account_info(self):
+        if self._account is not None:
+            return self._account
+        return self._call("account_info", (), {})
+
+    def order_send(self, request):
+        return self._request("order", dict(request))
+
+# ------------------- Main ------------------- #
+def main():
+    import sys
+    import MetaTrader5 as mt5
+
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else PORT
+    symbols = sys.argv[2:] or SYMBOLS
+    gateway = Gateway(mt5, symbols, (HOST, port))
+    gateway.serve_forever()
+    printl(f"📊 Gateway stats: {gateway.stats}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""
+Deterministic record/replay harness for the cycle bots.
+
+- RecordingMT5 wraps the real mt5 module and writes every call + response to a
+  gzip'd pickle stream (repeated identical responses are stored as a marker)
+- ReplayMT5 walks the recording as one timeline: each call is answered by the
+  next recorded call with the same name and arguments, so an added or removed
+  read only moves the clock instead of shifting every later response
+  (strict=True raises ReplayMismatch on the first call that differs instead).
+  Every order_send request the strategy makes is logged (its "decisions")
+- replay() loads a bot script (e.g. dummy.py) against a recording with sleeps and
+  sounds disabled, so a full session runs at CPU speed
+- diff compares the decisions of two versions of a script on the same recording
+- export turns a recording into the order-send log that backtest.py fits models from
+
+Record a live session:
+    MT5_RECORD=session.rec.gz python dummy.py
+Replay / compare:
+    python mt5_replay.py replay session.rec.gz dummy.py [--strict]
+    python mt5_replay.py diff session.rec.gz old_dummy.py dummy.py
+    python mt5_replay.py export session.rec.gz order_log.csv
+"""
+
+import bisect
+import csv
+import difflib
+import gzip
+import importlib.util
+import io
+import json
+import pickle
+import sys
+import time
+from contextlib import redirect_stdout
+from types import SimpleNamespace
+
+from mt5_gateway import to_namespace, to_plain
+
+CONSTANTS = "__constants__"
+
+class ReplayExhausted(BaseException):
+    """
+    Raised when the strategy asks for more data than was recorded.
+    BaseException so the bots' `except Exception` blocks don't swallow it.
+    """
+
+class ReplayMismatch(BaseException):
+    """Strict replay: the strategy made a different call than the recording has next."""
+
+def call_key(name, args, kwargs):
+    """
+    What a replayed call is matched on: the function and its arguments
+    (symbol, ticket, ...). order_send matches on the name only, because its
+    request is the decision under test and differs between script versions.
+    """
+    if name == "order_send":
+        return (name,)
+    return name, pickle.dumps((to_plain(tuple(args)), sorted(kwargs.items())))
+
+# ------------------- Recording ------------------- #
+class RecordingMT5:
+    def __init__(self, mt5, path):
+        self._mt5 = mt5
+        self._file = gzip.open(path, "wb")
+        self._last = {}
+        constants = {k: getattr(mt5, k) for k in dir(mt5)
+                     if k.isupper() and isinstance(getattr(mt5, k), int)}
+        pickle.dump((CONSTANTS, constants), self._file)
+
+    def __getattr__(self, name):
+        attr = getattr(self._mt5, name)
+        if not callable(attr):
+            return attr
+
+        def recorded(*args, **kwargs):
+            start = time.perf_counter()
+            result = attr(*args, **kwargs)
+            elapsed_us = int((time.perf_counter() - start) * 1e6)
+            plain = to_plain(result)
+            same = self._last.get(name) == plain
+            self._last[name] = plain
+            # name, args, kwargs, same-as-last flag, result, elapsed microseconds
+            pickle.dump((name, to_plain(args), kwargs, same, None if same else plain, elapsed_us), self._file)
+            if name == "shutdown":
+                self._file.close()
+            return result
+        return recorded
+
+def read_recording(path):
+    """Returns (constants, [(name, args, kwargs, result, elapsed_us), ...])."""
+    calls = []
+    last = {}
+    constants = {}
+    with gzip.open(path, "rb") as f:
+        while True:
+            try:
+                record = pickle.load(f)
+            except EOFError:
+                break
+            if record[0] == CONSTANTS:
+                constants = record[1]
+                continue
+            name, args, kwargs, same, result, elapsed_us = record
+            if same:
+                result = last.get(name)
+            last[name] = result
+            calls.append((name, args, kwargs, result, elapsed_us))
+    return constants, calls
+
+# ------------------- Replay ------------------- #
+class ReplayMT5:
+    def __init__(self, path, strict=False):
+        constants, calls = read_recording(path)
+        self.__dict__.update(constants)
+        self._keys = [call_key(name, args, kwargs) for name, args, kwargs, _, _ in calls]
+        self._results = [result for _, _, _, result, _ in calls]
+        self._positions = {}             # call key -> recorded positions, ascending
+        for i, key in enumerate(self._keys):
+            self._positions.setdefault(key, []).append(i)
+        self._cursor = 0                 # next unread position in the recording
+        self._strict = strict
+        self.decisions = []
+        self.calls = 0
+        self.skipped = 0                 # recorded calls the strategy didn't make
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        def replayed(*args, **kwargs):
+            self.calls += 1
+            if name == "order_send":
+                self.decisions.append(to_plain(args[0] if args else kwargs.get("request")))
+            if name == "shutdown":
+                return None
+            return to_namespace(self._results[self._next(name, call_key(name, args, kwargs))])
+        return replayed
+
+    def _next(self, name, key):
+        """Position of the next recorded call matching key; skipped calls move the clock."""
+        if self._strict and self._cursor < len(self._keys) and self._keys[self._cursor] != key:
+            raise ReplayMismatch(f"call #{self.calls}: strategy called {name}, "
+                                 f"recording has {self._keys[self._cursor][0]}")
+        positions = self._positions.get(key, [])
+        i = bisect.bisect_left(positions, self._cursor)
+        if i >= len(positions):
+            raise ReplayExhausted(name)
+        pos = positions[i]
+        self.skipped += pos - self._cursor
+        self._cursor = pos + 1
+        return pos
+
+def load_strategy(script_path, fake_mt5):
+    """Imports a bot script with MetaTrader5 swapped for the replay stand-in."""
+    saved = sys.modules.get("MetaTrader5")
+    sys.modules["MetaTrader5"] = fake_mt5
+    try:
+        spec = importlib.util.spec_from_file_location("replayed_strategy", script_path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        if saved is not None:
+            sys.modules["MetaTrader5"] = saved
+        else:
+            sys.modules.pop("MetaTrader5", None)
+    # full speed: no sleeping, no sound
+    module.time = SimpleNamespace(sleep=lambda seconds: None, time=time.time, perf_counter=time.perf_counter)
+    if hasattr(module, "play_mp3_repeat"):
+        module.play_mp3_repeat = lambda *args, **kwargs: None
+    return module
+
+def replay(recording, script_path, verbose=False, strict=False):
+    """Runs script_path's main() against a recording. Returns (decisions, stats)."""
+    fake = ReplayMT5(recording, strict)
+    out = sys.stdout if verbose else io.StringIO()
+    start = time.perf_counter()
+    with redirect_stdout(out):
+        try:
+            module = load_strategy(script_path, fake)
+            module.main()
+        except (ReplayExhausted, SystemExit):
+            pass
+    stats = {"calls": fake.calls, "orders": len(fake.decisions), "skipped": fake.skipped,
+             "seconds": time.perf_counter() - start}
+    return fake.decisions, stats
+
+def describe(decision):
+    keys = ("action", "type", "price", "volume", "position", "comment")
+    return " ".join(f"{k}={decision.get(k)}" for k in keys if k in decision)
+
+def diff_decisions(old, new):
+    """Unified diff of two decision lists, one order_send per line."""
+    return list(difflib.unified_diff(
+        [describe(d) for d in old], [describe(d) for d in new],
+        fromfile="old", tofile="new", lineterm="",
+    ))
+
+# ------------------- Export for backtest.py ------------------- #
+def export_order_log(recording, csv_path):
+    """Writes side,requested,filled,latency_ms,retcode rows for backtest.fit_models."""
+    constants, calls = read_recording(recording)
+    trade_actions = {constants.get(k) for k in ("TRADE_ACTION_DEAL", "TRADE_ACTION_PENDING")} - {None}
+    sides = {}
+    for side in ("BUY", "SELL"):
+        for suffix in ("", "_LIMIT", "_STOP", "_STOP_LIMIT"):
+            value = constants.get(f"ORDER_TYPE_{side}{suffix}")
+            if value is not None:
+                sides[value] = side
+    rows = 0
+    with open(csv_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["side", "requested", "filled", "latency_ms", "retcode"])
+        for name, args, kwargs, result, elapsed_us in calls:
+            if name != "order_send" or not args:
+                continue
+            request = args[0]
+            # only orders that can fill; removes / modifies have no side or price to fit
+            side = sides.get(request.get("type"))
+            if request.get("action") not in trade_actions or side is None:
+                continue
+            retcode = result.get("retcode") if result else -1
+            filled = result.get("price") if result else ""
+            writer.writerow([side, request.get("price"), filled or "", elapsed_us / 1000.0, retcode])
+            rows += 1
+    return rows
+
+# ------------------- Main ------------------- #
+def main():
+    if len(sys.argv) < 4:
+        print(__doc__)
+        return
+    command, recording = sys.argv[1], sys.argv[2]
+    if command == "replay":
+        decisions, stats = replay(recording, sys.argv[3], verbose="-v" in sys.argv, strict="--strict" in sys.argv)
+        print(f"✅ Replayed {stats['calls']} calls in {stats['seconds']:.2f}s → {stats['orders']} order_send decisions "
+              f"({stats['skipped']} recorded calls skipped)")
+        print(json.dumps(decisions[:20], indent=1, default=str))
+    elif command == "diff":
+        old, old_stats = replay(recording, sys.argv[3])
+        new, new_stats = replay(recording, sys.argv[4])
+        lines = diff_decisions(old, new)
+        print(f"📊 old: {old_stats['orders']} orders, {old_stats['skipped']} skipped ({old_stats['seconds']:.2f}s) | "
+              f"new: {new_stats['orders']} orders, {new_stats['skipped']} skipped ({new_stats['seconds']:.2f}s)")
+        if not lines:
+            print("✅ Identical order decisions.")
+        else:
+            print("\n".join(lines))
+    elif command == "export":
+        rows = export_order_log(recording, sys.argv[3])
+        print(f"✅ Exported {rows} order_send rows to {sys.argv[3]}")
+    else:
+        print(__doc__)
+
+if __name__ == "__main__":
+    main()
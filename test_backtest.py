@@ -0,0 +1,89 @@
+import random
+from array import array
+
+import backtest
+from backtest import (ConstantLatency, EmpiricalSlippage, GapStrategy, NoSlippage,
+                      formula25_generator, signed_slip, simulate_cycle)
+
+
+def make_ticks(rows):
+    times, bids, asks = array("d"), array("d"), array("d")
+    for t, bid, ask in rows:
+        times.append(t)
+        bids.append(bid)
+        asks.append(ask)
+    return times, bids, asks
+
+
+class RecordingGap(GapStrategy):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.sent = []
+        self.targets = []
+        self.vols = []
+
+    def start(self, bid, ask):
+        order = super().start(bid, ask)
+        self.vols.append(order[2])
+        return order
+
+    def on_trigger(self, side, triggered_count, bid, ask):
+        order = super().on_trigger(side, triggered_count, bid, ask)
+        self.targets.append(self.tp_target)
+        self.vols.append(order[2])
+        return order
+
+    def placed(self, side, price):
+        super().placed(side, price)
+        self.sent.append((side, price))
+
+
+def test_gap_ladder_chains_from_clamped_price():
+    ticks = make_ticks([
+        (0.0, 99.90, 100.00),     # BUY STOP at 100.10
+        (1.0, 100.10, 100.20),    # BUY triggers
+        (2.0, 98.00, 98.10),      # SELL wanted at 99.10, clamped to 97.98
+        (3.0, 97.90, 98.00),      # SELL triggers
+        (4.0, 97.90, 98.00),      # next BUY: 97.98 + gap, not 99.10 + gap
+        (5.0, 97.90, 98.00),
+    ])
+    strategy = RecordingGap(gap=1.0)
+    simulate_cycle(ticks, strategy, ConstantLatency(), NoSlippage(), random.Random(0))
+    assert strategy.sent == [("BUY", 100.10), ("SELL", 97.98), ("BUY", 98.98)]
+
+
+def test_anchor_strategy_accepts_placed():
+    ticks = make_ticks([(0.0, 99.90, 100.00), (1.0, 99.90, 100.00)])
+    result = simulate_cycle(ticks, backtest.AnchorStrategy(), ConstantLatency(), NoSlippage(),
+                            random.Random(0))
+    assert result["outcome"] == "open"
+
+
+def test_formula25_matches_script():
+    gen = formula25_generator()
+    assert [next(gen) for _ in range(6)] == [
+        (0.02, 0.5), (0.04, 1.5), (0.06, 3.0), (0.08, 5.0), (0.10, 7.5), (0.12, 10.5)]
+    assert next(gen)[0] == 0.14      # no volume cap
+
+
+def test_gap_volumes_and_tp_follow_script():
+    rows = [(0.0, 99.90, 100.00)]
+    for k in range(6):        # swing through both stops every cycle without reaching TP
+        rows += [(4 * k + 1, 100.90, 101.00), (4 * k + 2, 99.95, 100.05),
+                 (4 * k + 3, 98.90, 99.00), (4 * k + 4, 99.95, 100.05)]
+    strategy = RecordingGap(gap=1.0)
+    result = simulate_cycle(make_ticks(rows), strategy, ConstantLatency(), NoSlippage(), random.Random(0))
+    assert result["trades"] == 12
+    gen = formula25_generator()
+    expected = [next(gen) for _ in range(13)]
+    assert strategy.vols == [vol for vol, _ in expected]
+    # the TP in force after a trigger is the cumulative target of the order that triggered
+    assert strategy.targets == [tp for _, tp in expected[:-1]]
+
+
+def test_slippage_keeps_favourable_fills_within_bounds():
+    rng = random.Random(0)
+    assert signed_slip(EmpiricalSlippage([-3.0]), rng, 1.0) == -3.0 * backtest.POINT
+    assert signed_slip(EmpiricalSlippage([4.0]), rng, 1.0) == 4.0 * backtest.POINT
+    assert signed_slip(EmpiricalSlippage([-1e6]), rng, 1.0) == -1.0
+    assert signed_slip(EmpiricalSlippage([1e6]), rng, 1.0) == 1.0
@@ -0,0 +1,170 @@
+import threading
+from collections import namedtuple
+from multiprocessing import Pipe
+
+from mt5_gateway import Gateway, GatewayClient
+
+Account = namedtuple("Account", "equity margin")
+CheckResult = namedtuple("CheckResult", "retcode comment")
+Tick = namedtuple("Tick", "time_msc bid ask")
+
+
+class FakeMT5:
+    TRADE_ACTION_DEAL = 1
+    TRADE_ACTION_PENDING = 5
+
+    def __init__(self):
+        self.calls = []
+
+    def order_check(self, request):
+        self.calls.append(("order_check", request))
+        return CheckResult(0, "Done")
+
+    def symbol_info(self, symbol):
+        self.calls.append(("symbol_info", symbol))
+        raise RuntimeError(f"unknown symbol {symbol}")
+
+    def order_send(self, request):
+        self.calls.append(("order_send", request))
+        raise ValueError("bad request")
+
+    def account_info(self):
+        return None
+
+    def last_error(self):
+        return (1, "Success")
+
+
+class TradingMT5(FakeMT5):
+    """Accepts orders; every fill uses margin."""
+
+    def __init__(self):
+        super().__init__()
+        self.margin = 0.0
+
+    def order_send(self, request):
+        self.calls.append(("order_send", request))
+        self.margin += 10.0
+        return CheckResult(10009, "Done")
+
+    def account_info(self):
+        return Account(1000.0, self.margin)
+
+
+class FakeConn:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, msg):
+        self.sent.append(msg)
+
+    def replies(self):
+        return {m[1]: (m[2], m[3]) for m in self.sent if m[0] == "reply"}
+
+
+def test_dict_argument_calls_are_coalesced():
+    mt5 = FakeMT5()
+    gateway = Gateway(mt5)
+    a, b = FakeConn(), FakeConn()
+    request = {"action": 1, "symbol": "XAUUSD_", "volume": 0.01}
+    gateway._execute_batch([
+        ("call", a, (1, "order_check", (request,), {})),
+        ("call", b, (2, "order_check", (dict(request),), {})),
+    ])
+    assert mt5.calls == [("order_check", request)]
+    assert a.replies()[1] == ({"retcode": 0, "comment": "Done"}, None)
+    assert b.replies()[2] == ({"retcode": 0, "comment": "Done"}, None)
+    assert gateway.stats["shared_calls"] == 1
+
+
+def test_unpicklable_arguments_are_not_coalesced():
+    gateway = Gateway(FakeMT5())
+    gateway.mt5.echo = lambda value: "ok"
+    conn = FakeConn()
+    lock = threading.Lock()
+    gateway._execute_batch([
+        ("call", conn, (1, "echo", (lock,), {})),
+        ("call", conn, (2, "echo", (lock,), {})),
+    ])
+    assert conn.replies() == {1: ("ok", None), 2: ("ok", None)}
+    assert gateway.stats["shared_calls"] == 0
+
+
+def test_failing_call_only_answers_its_requester():
+    gateway = Gateway(FakeMT5())
+    bad, good, trader = FakeConn(), FakeConn(), FakeConn()
+    gateway._execute_batch([
+        ("call", bad, (1, "symbol_info", ("NOPE",), {})),
+        ("call", bad, (2, "no_such_function", (), {})),
+        ("call", good, (3, "order_check", ({"action": 1},), {})),
+        ("order", trader, (4, {"action": 1, "symbol": "XAUUSD_"})),
+    ])
+    replies = bad.replies()
+    assert replies[1][0] is None and "unknown symbol" in replies[1][1][1]
+    assert replies[2][0] is None and "AttributeError" in replies[2][1][1]
+    assert good.replies()[3] == ({"retcode": 0, "comment": "Done"}, None)
+    assert trader.replies()[4][0] is None and "bad request" in trader.replies()[4][1][1]
+    assert gateway.stats["errors"] == 3
+
+
+def test_client_drops_cached_data_when_gateway_dies():
+    client = GatewayClient()
+    client_end, gateway_end = Pipe()
+    client._conn = client_end
+    receiver = threading.Thread(target=client._receiver)
+    receiver.start()
+
+    gateway_end.send(("constants", {"TRADE_ACTION_PENDING": 5}))
+    gateway_end.send(("tick", "XAUUSD_", {"time_msc": 1, "bid": 1.0, "ask": 1.1}, {"equity": 100.0}))
+    gateway_end.send(("positions", "XAUUSD_", {"snapshot": [{"ticket": 7, "volume": 0.01}]}))
+    assert client._ready.wait(5)
+    gateway_end.close()
+    receiver.join(5)
+
+    assert not receiver.is_alive()
+    assert client.symbol_info_tick("XAUUSD_") is None
+    assert client.account_info() is None
+    assert client.positions_get(symbol="XAUUSD_") is None
+    assert client.order_send({"action": 5}) is None
+    assert client.symbol_select("XAUUSD_") is False
+    assert client.last_error()[0] == -10004
+
+
+def test_order_result_refreshes_the_account_first():
+    gateway = Gateway(TradingMT5())
+    watcher, trader = FakeConn(), FakeConn()
+    gateway.subscribers[watcher] = {"XAUUSD_"}
+    gateway._execute_batch([("order", trader, (1, {"action": 1, "symbol": "XAUUSD_"}))])
+    assert [m[0] for m in trader.sent] == ["account", "reply"]
+    assert trader.sent[0] == ("account", {"equity": 1000.0, "margin": 10.0})
+    assert watcher.sent == [trader.sent[0]]
+
+
+def test_pending_order_supersedes_across_workers():
+    mt5 = TradingMT5()
+    gateway = Gateway(mt5)
+    first, second = FakeConn(), FakeConn()
+    request = {"action": 5, "symbol": "XAUUSD_", "magic": 7, "comment": "cycle", "price": 1.0}
+    gateway._execute_batch([
+        ("order", first, (1, request)),
+        ("order", second, (2, dict(request, price=2.0))),
+    ])
+    assert first.replies()[1] == (None, (-10006, "Superseded by a newer request"))
+    assert second.replies()[2] == ({"retcode": 10009, "comment": "Done"}, None)
+    assert [c[1]["price"] for c in mt5.calls] == [2.0]
+
+
+def test_client_takes_the_refreshed_account():
+    client = GatewayClient()
+    client_end, gateway_end = Pipe()
+    client._conn = client_end
+    receiver = threading.Thread(target=client._receiver, daemon=True)
+    receiver.start()
+
+    gateway_end.send(("tick", "XAUUSD_", {"time_msc": 1, "bid": 1.0, "ask": 1.1}, {"equity": 100.0}))
+    gateway_end.send(("account", {"equity": 90.0}))
+    gateway_end.send(("constants", {"TRADE_ACTION_PENDING": 5}))
+    assert client._ready.wait(5)
+    assert client.account_info().equity == 90.0
+    gateway_end.close()
+    receiver.join(5)
@@ -0,0 +1,83 @@
+import csv
+from collections import namedtuple
+
+import pytest
+
+from mt5_replay import ReplayExhausted, ReplayMismatch, ReplayMT5, RecordingMT5, export_order_log
+
+Tick = namedtuple("Tick", "time_msc bid ask")
+SendResult = namedtuple("SendResult", "retcode price")
+
+
+class FakeMT5:
+    ORDER_TYPE_BUY, ORDER_TYPE_SELL = 0, 1
+    ORDER_TYPE_BUY_STOP, ORDER_TYPE_SELL_STOP = 4, 5
+    TRADE_ACTION_DEAL, TRADE_ACTION_PENDING, TRADE_ACTION_REMOVE = 1, 5, 8
+
+    def __init__(self):
+        self.clock = 0
+
+    def symbol_info_tick(self, symbol):
+        self.clock += 1
+        return Tick(self.clock, 100.0 + self.clock, 100.1 + self.clock)
+
+    def positions_get(self, symbol=None):
+        return self.clock
+
+    def order_send(self, request):
+        return SendResult(10009, request.get("price", 0.0))
+
+    def shutdown(self):
+        return None
+
+
+def record_session(path):
+    mt5 = RecordingMT5(FakeMT5(), str(path))
+    for _ in range(3):
+        mt5.symbol_info_tick("XAUUSD_")
+        mt5.positions_get(symbol="XAUUSD_")
+    mt5.order_send({"action": 5, "type": 4, "price": 104.0})
+    mt5.order_send({"action": 8, "order": 123})
+    mt5.order_send({"action": 1, "type": 1, "price": 103.0})
+    mt5.shutdown()
+
+
+def test_extra_read_does_not_shift_later_responses(tmp_path):
+    path = tmp_path / "session.rec.gz"
+    record_session(path)
+    mt5 = ReplayMT5(str(path))
+    assert mt5.symbol_info_tick("XAUUSD_").time_msc == 1
+    assert mt5.symbol_info_tick("XAUUSD_").time_msc == 2     # extra read moves the clock
+    assert mt5.positions_get(symbol="XAUUSD_") == 2           # positions from the same moment
+    assert mt5.symbol_info_tick("XAUUSD_").time_msc == 3
+    assert mt5.positions_get(symbol="XAUUSD_") == 3
+    assert mt5.skipped == 1
+    with pytest.raises(ReplayExhausted):
+        mt5.symbol_info_tick("XAUUSD_")
+
+
+def test_arguments_are_part_of_the_match(tmp_path):
+    path = tmp_path / "session.rec.gz"
+    record_session(path)
+    mt5 = ReplayMT5(str(path))
+    with pytest.raises(ReplayExhausted):
+        mt5.symbol_info_tick("EURUSD")
+
+
+def test_strict_replay_fails_on_first_difference(tmp_path):
+    path = tmp_path / "session.rec.gz"
+    record_session(path)
+    mt5 = ReplayMT5(str(path), strict=True)
+    mt5.symbol_info_tick("XAUUSD_")
+    with pytest.raises(ReplayMismatch):
+        mt5.symbol_info_tick("XAUUSD_")
+
+
+def test_export_maps_sides_and_skips_removes(tmp_path):
+    path = tmp_path / "session.rec.gz"
+    record_session(path)
+    out = tmp_path / "order_log.csv"
+    assert export_order_log(str(path), str(out)) == 2
+    with open(out, newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [(r["side"], r["requested"]) for r in rows] == [("BUY", "104.0"), ("SELL", "103.0")]
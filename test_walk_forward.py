@@ -0,0 +1,81 @@
+import glob
+import math
+import os
+from array import array
+
+import backtest
+import walk_forward
+from walk_forward import make_windows
+
+
+def make_ticks(hours, closed=(), step=10.0):
+    """A slow sine of ticks every `step` seconds, none inside the `closed` (start_h, end_h) ranges."""
+    times, bids, asks = array("d"), array("d"), array("d")
+    t = 0.0
+    while t < hours * 3600:
+        if not any(a * 3600 <= t < b * 3600 for a, b in closed):
+            bid = 2000.0 + 5.0 * math.sin(t / 900.0)
+            times.append(t)
+            bids.append(bid)
+            asks.append(bid + 0.2)
+        t += step
+    return times, bids, asks
+
+
+def test_windows_over_a_closure_are_skipped():
+    times = make_ticks(12, closed=[(5, 8)])[0]
+    windows, skipped = make_windows(times, 2, 1, 1, min_ticks=10)
+    assert skipped > 0
+    for lo, mid, hi in windows:
+        assert mid - lo >= 10 and hi - mid >= 10
+
+
+def test_empty_history_has_no_windows():
+    assert make_windows(array("d"), 2, 1, 1) == ([], 0)
+
+
+def test_walk_forward_survives_market_closure(tmp_path, monkeypatch):
+    monkeypatch.setattr(walk_forward, "CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(walk_forward, "TRAIN_HOURS", 2)
+    monkeypatch.setattr(walk_forward, "TEST_HOURS", 1)
+    monkeypatch.setattr(walk_forward, "STEP_HOURS", 1)
+    monkeypatch.setattr(walk_forward, "MIN_TICKS", 10)
+    monkeypatch.setattr(walk_forward, "RUNS", 2)
+    monkeypatch.setattr(walk_forward, "GAPS", [1.0])
+    monkeypatch.setattr(walk_forward, "GAP_PROFIT_UNITS", [25, 50])
+    ticks = make_ticks(12, closed=[(5, 8)])
+
+    report = walk_forward.walk_forward(ticks, "gap", workers=2)
+    assert report
+    assert all(not (5 * 3600 <= row["test"][0] < 8 * 3600) for row in report)
+
+    again = walk_forward.walk_forward(ticks, "gap", workers=2)    # served from the cache
+    assert [r["test_pnl"] for r in again] == [r["test_pnl"] for r in report]
+
+
+def test_unreadable_cache_entries_are_recomputed(tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / "cache")
+    monkeypatch.setattr(walk_forward, "CACHE_DIR", cache_dir)
+    monkeypatch.setattr(walk_forward, "TRAIN_HOURS", 2)
+    monkeypatch.setattr(walk_forward, "TEST_HOURS", 1)
+    monkeypatch.setattr(walk_forward, "STEP_HOURS", 2)
+    monkeypatch.setattr(walk_forward, "MIN_TICKS", 10)
+    monkeypatch.setattr(walk_forward, "RUNS", 2)
+    monkeypatch.setattr(walk_forward, "PROFIT_UNITS", [60])
+    ticks = make_ticks(6)
+    report = walk_forward.walk_forward(ticks, "anchor", workers=1)
+
+    entries = glob.glob(os.path.join(cache_dir, "*"))
+    assert entries and all(e.endswith(".json") for e in entries)
+    for entry in entries:
+        with open(entry, "w") as f:
+            f.write('{"pnl_mean": ')       # a run killed mid-write
+    again = walk_forward.walk_forward(ticks, "anchor", workers=1)
+    assert [r["test_pnl"] for r in again] == [r["test_pnl"] for r in report]
+    assert all(walk_forward.read_cached(e) is not None for e in entries)
+
+
+def test_cache_key_follows_backtest_config(monkeypatch):
+    before = walk_forward.sim_digest()
+    monkeypatch.setattr(backtest, "LOSS_TARGET", backtest.LOSS_TARGET * 2)
+    assert walk_forward.sim_digest() != before
@@ -0,0 +1,228 @@
+"""
+Walk-forward optimization of gap / PROFIT_UNIT over recorded tick history.
+
+- Slices the tick history into rolling train/test windows; windows with fewer
+  than MIN_TICKS ticks on either side (market closed) are skipped
+- Grid-searches the strategy parameters on every training window in a process pool;
+  each worker gets the tick history once (pool initializer) and jobs only carry
+  index ranges
+- Evaluates the winning parameters on the window that follows (out-of-sample)
+- Caches each (window, params, models) simulation result on disk, so a rerun
+  only recomputes windows whose ticks or settings changed; the key includes
+  backtest.py's config constants and source, and unreadable entries are recomputed
+
+Usage:
+    python walk_forward.py ticks.csv [order_log.csv] [anchor|gap]
+"""
+
+import hashlib
+import json
+import os
+import sys
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import product
+
+import backtest
+
+# ------------------- Config ------------------- #
+TRAIN_HOURS = 24 * 5      # training window length
+TEST_HOURS = 24           # out-of-sample window length
+STEP_HOURS = 24           # how far each window rolls forward
+GAPS = [0.5, 1.0, 1.5, 2.0, 3.0]
+PROFIT_UNITS = [30, 60, 120, 250, 500]
+GAP_PROFIT_UNITS = [10, 25, 50, 100]   # gap strategy TP per volume (script.py uses 25)
+RUNS = 50                 # Monte Carlo runs per evaluation
+SEED = 42
+CACHE_DIR = ".walk_forward_cache"
+MIN_TICKS = 100           # smaller train/test slices (weekends, holidays) are skipped
+WORKERS = os.cpu_count() or 1
+
+# ------------------- Helpers ------------------- #
+def now():
+    return datetime.now().strftime("%H:%M:%S")
+
+def printl(*args, **kwargs):
+    print(f"[{now()}]", *args, **kwargs)
+
+def make_windows(times, train_hours, test_hours, step_hours, min_ticks=MIN_TICKS):
+    """
+    Returns ([(train_start, train_end, test_end), ...] as tick indices, skipped count).
+    A window is skipped when its train or test slice has fewer than min_ticks ticks.
+    """
+    windows = []
+    skipped = 0
+    if not len(times):
+        return windows, skipped
+    start_t = times[0]
+    while True:
+        train_end_t = start_t + train_hours * 3600
+        test_end_t = train_end_t + test_hours * 3600
+        if test_end_t > times[-1]:
+            break
+        lo, mid, hi = (bisect_left(times, start_t), bisect_left(times, train_end_t),
+                       bisect_left(times, test_end_t))
+        if mid - lo < max(min_ticks, 2) or hi - mid < max(min_ticks, 2):
+            skipped += 1
+        else:
+            windows.append((lo, mid, hi))
+        start_t += step_hours * 3600
+    return windows, skipped
+
+def slice_ticks(ticks, lo, hi):
+    return tuple(arr[lo:hi] for arr in ticks)
+
+# the full tick history inside a pool worker, set once by the initializer
+_worker_ticks = None
+
+def init_worker(ticks):
+    global _worker_ticks
+    _worker_ticks = ticks
+
+def model_key(model):
+    return [type(model).__name__, getattr(model, "seconds", None),
+            getattr(model, "samples", None), getattr(model, "requote_rate", None)]
+
+def ticks_digest(ticks, lo=0, hi=None):
+    h = hashlib.sha1()
+    for arr in ticks:
+        h.update(memoryview(arr)[lo:hi])
+    return h.hexdigest()
+
+def sim_digest():
+    """backtest.py's config constants and source: any change to the simulator misses the cache."""
+    config = {k: v for k, v in vars(backtest).items()
+              if k.isupper() and isinstance(v, (bool, int, float, str))}
+    h = hashlib.sha1(json.dumps(config, sort_keys=True).encode())
+    with open(backtest.__file__, "rb") as f:
+        h.update(f.read())
+    return h.hexdigest()
+
+def grid(strategy):
+    if strategy == "gap":
+        return [{"gap": g, "profit_unit": p} for g, p in product(GAPS, GAP_PROFIT_UNITS)]
+    return [{"profit_unit": p} for p in PROFIT_UNITS]
+
+# ------------------- Cached evaluation ------------------- #
+def cache_path(digest, strategy, params, models_digest, sim):
+    key = json.dumps([sim, digest, strategy, params, RUNS, SEED, models_digest], sort_keys=True)
+    return os.path.join(CACHE_DIR, hashlib.sha1(key.encode()).hexdigest() + ".json")
+
+def evaluate(task):
+    """Runs in a worker process: Monte Carlo backtest of one parameter set on one slice."""
+    lo, hi, strategy, params, latency, slippage, path = task
+    ticks = slice_ticks(_worker_ticks, lo, hi)
+    result = backtest.backtest(ticks, backtest.STRATEGIES[strategy], latency, slippage,
+                               runs=RUNS, seed=SEED, **params)
+    summary = {"params": params, "pnl_mean": result["pnl_mean"], "pnl_band": result["pnl_band"],
+               "trades_per_hour_mean": result["trades_per_hour_mean"]}
+    # write then rename, so a killed run never leaves a truncated entry behind
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(summary, f)
+    os.replace(tmp, path)
+    return summary
+
+def read_cached(path):
+    """A cached summary, or None when the entry is missing or unreadable."""
+    try:
+        with open(path) as f:
+            summary = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return summary if isinstance(summary, dict) and "pnl_mean" in summary else None
+
+def evaluate_many(ticks, jobs, latency, slippage, pool):
+    """
+    jobs: list of (lo, hi, strategy, params) over the pool's tick history.
+    Returns summaries in the same order, reading cached ones from disk and
+    running the rest in the pool.
+    """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    models_digest = hashlib.sha1(json.dumps([model_key(latency), model_key(slippage)]).encode()).hexdigest()
+    sim = sim_digest()
+    digests = {}
+    results = [None] * len(jobs)
+    pending = []
+    for i, (lo, hi, strategy, params) in enumerate(jobs):
+        if (lo, hi) not in digests:
+            digests[lo, hi] = ticks_digest(ticks, lo, hi)
+        path = cache_path(digests[lo, hi], strategy, params, models_digest, sim)
+        results[i] = read_cached(path)
+        if results[i] is None:
+            pending.append((i, (lo, hi, strategy, params, latency, slippage, path)))
+    if pending:
+        for (i, _), summary in zip(pending, pool.map(evaluate, [t for _, t in pending])):
+            results[i] = summary
+    return results, len(pending)
+
+# ------------------- Walk-forward ------------------- #
+def walk_forward(ticks, strategy="anchor", latency=None, slippage=None, workers=WORKERS):
+    latency = latency or backtest.ConstantLatency()
+    slippage = slippage or backtest.NoSlippage()
+    windows, skipped = make_windows(ticks[0], TRAIN_HOURS, TEST_HOURS, STEP_HOURS)
+    if skipped:
+        printl(f"⏭️ Skipped {skipped} windows with fewer than {MIN_TICKS} train or test ticks")
+    if not windows:
+        return []
+    params_grid = grid(strategy)
+    report = []
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(ticks,)) as pool:
+        # 1) every training window × every parameter set, all in one pool pass
+        jobs = [(lo, mid, strategy, p) for lo, mid, _ in windows for p in params_grid]
+        train_results, computed = evaluate_many(ticks, jobs, latency, slippage, pool)
+        printl(f"🧮 Training: {len(jobs)} evaluations ({computed} computed, {len(jobs) - computed} cached)")
+
+        best = []
+        for w in range(len(windows)):
+            chunk = train_results[w * len(params_grid):(w + 1) * len(params_grid)]
+            best.append(max(chunk, key=lambda r: r["pnl_mean"]))
+
+        # 2) winners on the following window
+        test_jobs = [(mid, hi, strategy, b["params"]) for (_, mid, hi), b in zip(windows, best)]
+        test_results, computed = evaluate_many(ticks, test_jobs, latency, slippage, pool)
+        printl(f"🧪 Testing: {len(test_jobs)} evaluations ({computed} computed, {len(test_jobs) - computed} cached)")
+
+    for (lo, mid, hi), b, t in zip(windows, best, test_results):
+        report.append({
+            "train": (ticks[0][lo], ticks[0][mid - 1]),
+            "test": (ticks[0][mid], ticks[0][hi - 1]),
+            "params": b["params"],
+            "train_pnl": b["pnl_mean"],
+            "test_pnl": t["pnl_mean"],
+            "test_band": t["pnl_band"],
+        })
+    return report
+
+# ------------------- Main ------------------- #
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return
+    ticks = backtest.load_ticks(sys.argv[1])
+    latency = slippage = None
+    rest = sys.argv[2:]
+    if rest and rest[0].endswith(".csv"):
+        latency, slippage = backtest.fit_models(rest[0])
+        rest = rest[1:]
+    strategy = rest[0] if rest else "anchor"
+
+    report = walk_forward(ticks, strategy, latency, slippage)
+    if not report:
+        printl("❌ Not enough history for one train/test window.")
+        return
+
+    print(f"\n📊 Walk-forward ({strategy}): train={TRAIN_HOURS}h test={TEST_HOURS}h step={STEP_HOURS}h")
+    print(f"{'Test window start':<20} {'Params':<32} {'Train P&L':>10} {'Test P&L':>10}")
+    print("-" * 76)
+    for row in report:
+        start = datetime.fromtimestamp(row["test"][0]).strftime("%Y-%m-%d %H:%M")
+        print(f"{start:<20} {json.dumps(row['params']):<32} {row['train_pnl']:>10.2f} {row['test_pnl']:>10.2f}")
+    print("-" * 76)
+    total = sum(r["test_pnl"] for r in report)
+    print(f"✅ Out-of-sample P&L over {len(report)} windows: {total:.2f}\n")
+
+if __name__ == "__main__":
+    main()